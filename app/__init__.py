@@ -85,6 +85,7 @@ def create_app():
     from app.routes.competition_routes import competition_bp
     from app.routes.admin_routes import bp as admin_bp
     from app.routes.tickets import bp as tickets_bp
+    from app.routes.job_routes import bp as jobs_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(teams_bp)
@@ -104,6 +105,7 @@ def create_app():
     app.register_blueprint(competition_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(tickets_bp)
+    app.register_blueprint(jobs_bp)
 
     # Register CLI commands
     @app.cli.command()
@@ -129,4 +131,28 @@ def create_app():
     from app.services.seed_admin import register_seed_admin_command
     register_seed_admin_command(app)
 
+    # Register the rebuild standings command
+    from app.services.competition_standings_service import register_rebuild_standings_command
+    register_rebuild_standings_command(app)
+
+    # Register the standings history backfill command
+    from app.services.standings_history_service import register_backfill_standings_history_command
+    register_backfill_standings_history_command(app)
+
+    # Register the stats rebuild command
+    from app.services.match_stats_service import register_rebuild_stats_command
+    register_rebuild_stats_command(app)
+
+    # Register the background job worker
+    from app.services.job_service import register_job_worker_command
+    register_job_worker_command(app)
+
+    # Register the outbox worker
+    from app.services.outbox_service import register_outbox_worker_command
+    register_outbox_worker_command(app)
+
+    # Register the bulk results import
+    from app.services.result_import_service import register_import_results_command
+    register_import_results_command(app)
+
     return app
\ No newline at end of file
@@ -1,3 +1,12 @@
 from flask_sqlalchemy import SQLAlchemy
 
 db = SQLAlchemy()
+
+
+def dialect_insert(model):
+    """INSERT for the session's dialect, with its on_conflict_do_nothing/do_update()"""
+    from sqlalchemy.dialects import postgresql, sqlite
+
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return sqlite.insert(model)
+    return postgresql.insert(model)
@@ -8,8 +8,11 @@ from .match_event import MatchEvent
 from .match_interest import MatchInterest
 from .player_stats import PlayerStats
 from .team_stats import TeamStats
+from .match_stats_ledger import TeamStatsLedger, PlayerStatsLedger
 from .message import Message
 from .ticket import Ticket
+from .job import Job
+from .outbox_event import OutboxEvent
 
 # Location Models
 from .country import Country
@@ -24,6 +27,8 @@ from .competition_team import CompetitionTeam
 from .competition_group import CompetitionGroup
 from .knockout_round import KnockoutRound
 from .competition_advancement_rule import CompetitionAdvancementRule
+from .competition_standing import CompetitionStanding
+from .competition_standing_snapshot import CompetitionStandingSnapshot
 
 # Enums
 from .enums import MatchStatus, EventType, MatchInterestStatus
@@ -30,6 +30,9 @@ class Competition(db.Model):
     points_draw = db.Column(db.Integer, default=1)
     points_loss = db.Column(db.Integer, default=0)
     
+    # Tiebreaker criteria in order; NULL uses the default order
+    tiebreaker_order = db.Column(db.JSON, nullable=True)
+    
     # Status
     status = db.Column(db.String(50), default='draft')  # draft, ongoing, completed
     
@@ -48,6 +51,8 @@ class Competition(db.Model):
     groups = db.relationship('CompetitionGroup', backref='competition', lazy=True, cascade='all, delete-orphan')
     knockout_rounds = db.relationship('KnockoutRound', backref='competition', lazy=True, cascade='all, delete-orphan')
     matches = db.relationship('Match', backref='competition', lazy=True, foreign_keys='Match.competition_id')
+    standings = db.relationship('CompetitionStanding', backref='competition', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    standings_history = db.relationship('CompetitionStandingSnapshot', backref='competition', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
     advancement_rules_from = db.relationship('CompetitionAdvancementRule', foreign_keys='CompetitionAdvancementRule.from_competition_id', backref='source_competition', lazy=True)
     advancement_rules_to = db.relationship('CompetitionAdvancementRule', foreign_keys='CompetitionAdvancementRule.to_competition_id', backref='destination_competition', lazy=True)
     
@@ -55,7 +60,7 @@ class Competition(db.Model):
         db.UniqueConstraint('season_id', 'name', name='uq_competition_season_name'),
     )
 
-    def to_dict(self):
+    def to_dict(self, number_of_teams=None):
         return {
             'id': str(self.id),
             'season_id': str(self.season_id),
@@ -67,8 +72,9 @@ class Competition(db.Model):
             'points_win': self.points_win,
             'points_draw': self.points_draw,
             'points_loss': self.points_loss,
+            'tiebreaker_order': list(self.tiebreaker_order) if self.tiebreaker_order is not None else None,
             'max_teams': self.max_teams,
-            'number_of_teams': len(self.teams),
+            'number_of_teams': len(self.teams) if number_of_teams is None else number_of_teams,
             'region_id': str(self.region_id) if self.region_id else None,
             'county_id': str(self.county_id) if self.county_id else None,
             'created_by': str(self.created_by) if self.created_by else None,
@@ -0,0 +1,51 @@
+import uuid
+from app.extensions.db import db
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+
+
+class CompetitionStanding(db.Model):
+    """Persisted standings read model: one row per (competition, group, team)"""
+    __tablename__ = 'competition_standings'
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    competition_id = db.Column(UUID(as_uuid=True), db.ForeignKey('competitions.id', ondelete='CASCADE'), nullable=False)
+    team_id = db.Column(UUID(as_uuid=True), db.ForeignKey('teams.id', ondelete='CASCADE'), nullable=False)
+    
+    # Group the results were earned in (NULL for league/knockout matches)
+    group_id = db.Column(UUID(as_uuid=True), db.ForeignKey('competition_groups.id', ondelete='CASCADE'), nullable=True)
+    
+    # Results only; points are applied at read time from the competition's points system
+    played = db.Column(db.Integer, default=0, nullable=False)
+    wins = db.Column(db.Integer, default=0, nullable=False)
+    draws = db.Column(db.Integer, default=0, nullable=False)
+    losses = db.Column(db.Integer, default=0, nullable=False)
+    goals_for = db.Column(db.Integer, default=0, nullable=False)
+    goals_against = db.Column(db.Integer, default=0, nullable=False)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        # NULLS NOT DISTINCT so league/knockout rows (group_id NULL) are unique too
+        db.Index('uq_competition_standing', 'competition_id', 'group_id', 'team_id',
+                 unique=True, postgresql_nulls_not_distinct=True),
+        db.Index('ix_competition_standings_competition_group', 'competition_id', 'group_id'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': str(self.id),
+            'competition_id': str(self.competition_id),
+            'group_id': str(self.group_id) if self.group_id else None,
+            'team_id': str(self.team_id),
+            'played': self.played,
+            'wins': self.wins,
+            'draws': self.draws,
+            'losses': self.losses,
+            'goals_for': self.goals_for,
+            'goals_against': self.goals_against,
+            'goal_difference': self.goals_for - self.goals_against,
+        }
+
+    def __repr__(self):
+        return f'<CompetitionStanding {self.competition_id}/{self.team_id}>'
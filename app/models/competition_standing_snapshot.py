@@ -0,0 +1,51 @@
+import uuid
+from app.extensions.db import db
+from sqlalchemy.dialects.postgresql import UUID
+
+
+class CompetitionStandingSnapshot(db.Model):
+    """Standings history: one packed row per team per matchday of a competition"""
+    __tablename__ = 'competition_standings_history'
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    competition_id = db.Column(UUID(as_uuid=True), db.ForeignKey('competitions.id', ondelete='CASCADE'), nullable=False)
+    team_id = db.Column(UUID(as_uuid=True), db.ForeignKey('teams.id', ondelete='CASCADE'), nullable=False)
+    
+    # Matchday = a calendar day on which the competition had finished matches
+    as_of = db.Column(db.Date, nullable=False)
+    matchday = db.Column(db.SmallInteger, nullable=False)
+    
+    # Table after that matchday
+    position = db.Column(db.SmallInteger, nullable=False)
+    played = db.Column(db.SmallInteger, default=0, nullable=False)
+    # Kept so a later matchday can be replayed from this one without the matches before it
+    wins = db.Column(db.SmallInteger, default=0, nullable=False, server_default='0')
+    draws = db.Column(db.SmallInteger, default=0, nullable=False, server_default='0')
+    losses = db.Column(db.SmallInteger, default=0, nullable=False, server_default='0')
+    points = db.Column(db.SmallInteger, default=0, nullable=False)
+    goals_for = db.Column(db.SmallInteger, default=0, nullable=False)
+    goals_against = db.Column(db.SmallInteger, default=0, nullable=False)
+    
+    __table_args__ = (
+        # Also serves the history range scan (competition_id, as_of)
+        db.UniqueConstraint('competition_id', 'as_of', 'team_id', name='uq_competition_standing_snapshot'),
+    )
+
+    def to_dict(self):
+        return {
+            'team_id': str(self.team_id),
+            'as_of': self.as_of.isoformat(),
+            'matchday': self.matchday,
+            'position': self.position,
+            'played': self.played,
+            'wins': self.wins,
+            'draws': self.draws,
+            'losses': self.losses,
+            'points': self.points,
+            'goals_for': self.goals_for,
+            'goals_against': self.goals_against,
+            'goal_difference': self.goals_for - self.goals_against,
+        }
+
+    def __repr__(self):
+        return f'<CompetitionStandingSnapshot {self.competition_id}/{self.as_of}/{self.team_id}>'
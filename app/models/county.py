@@ -11,6 +11,10 @@ class County(db.Model):
     name = db.Column(db.Text, nullable=False)
     code = db.Column(db.String(20), nullable=True)  # e.g., 'KE_NAIROBI'
     
+    # Optional centroid, used for travel distances in geographic group draws
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
 
@@ -30,6 +34,8 @@ class County(db.Model):
             'region_id': str(self.region_id),
             'name': self.name,
             'code': self.code,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
         }
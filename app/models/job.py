@@ -0,0 +1,58 @@
+import uuid
+from app.extensions.db import db
+from sqlalchemy.dialects.postgresql import UUID
+
+
+class Job(db.Model):
+    """Background job; the table is the queue (see services/job_service.py)"""
+    __tablename__ = 'jobs'
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_type = db.Column(db.String(100), nullable=False)  # e.g. 'generate_fixtures', 'apply_rules'
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+
+    # Submitting the same key again returns the existing job instead of queueing another
+    idempotency_key = db.Column(db.String(255), unique=True, nullable=True)
+
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    progress = db.Column(db.SmallInteger, nullable=False, default=0)  # 0-100
+    progress_message = db.Column(db.Text)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+
+    attempts = db.Column(db.SmallInteger, nullable=False, default=0)
+    max_attempts = db.Column(db.SmallInteger, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
+
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+
+    __table_args__ = (
+        # Workers poll for the oldest runnable job
+        db.Index('ix_jobs_status_run_after', 'status', 'run_after'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': str(self.id),
+            'job_type': self.job_type,
+            'payload': self.payload,
+            'status': self.status,
+            'progress': self.progress,
+            'progress_message': self.progress_message,
+            'result': self.result,
+            'error': self.error,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def __repr__(self):
+        return f'<Job {self.job_type} {self.status}>'
@@ -1,20 +1,39 @@
 import uuid
+from datetime import datetime
 from app.extensions.db import db
 from sqlalchemy.dialects.postgresql import UUID
 from app.models.enums import MatchStatus
 
+
+# Period -> (minute it starts after, regulation length in minutes)
+MATCH_PERIODS = {
+    '1H': (0, 45),
+    '2H': (45, 45),
+    'ET': (90, 30),
+}
+
+
+def _utc_iso(value):
+    return (value.isoformat() + 'Z') if value and value.tzinfo is None else (value.isoformat() if value else None)
+
+
 class Match(db.Model):
     __tablename__ = "matches"
 
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
-    home_team_id = db.Column(UUID(as_uuid=True), db.ForeignKey("teams.id"), nullable=False)
-    away_team_id = db.Column(UUID(as_uuid=True), db.ForeignKey("teams.id"), nullable=False)
+    # Null only on knockout placeholders whose teams haven't qualified yet
+    home_team_id = db.Column(UUID(as_uuid=True), db.ForeignKey("teams.id"), nullable=True)
+    away_team_id = db.Column(UUID(as_uuid=True), db.ForeignKey("teams.id"), nullable=True)
     
     # Competition structure
     competition_id = db.Column(UUID(as_uuid=True), db.ForeignKey("competitions.id"), nullable=True)
+    # Matches of a coach-run tournament (tournaments table) instead of a competition
+    tournament_id = db.Column(UUID(as_uuid=True), db.ForeignKey("tournaments.id"), nullable=True)
     group_id = db.Column(UUID(as_uuid=True), db.ForeignKey("competition_groups.id"), nullable=True)
     knockout_round_id = db.Column(UUID(as_uuid=True), db.ForeignKey("knockout_rounds.id"), nullable=True)
+    # Position of the tie within its knockout round (0-based, top of the bracket first)
+    bracket_slot = db.Column(db.SmallInteger, nullable=True)
 
     match_date = db.Column(db.DateTime, nullable=False)
     venue = db.Column(db.Text)
@@ -26,10 +45,18 @@ class Match(db.Model):
     status = db.Column(db.Enum(MatchStatus), default=MatchStatus.scheduled)
     home_score = db.Column(db.Integer, default=0)
     away_score = db.Column(db.Integer, default=0)
+    # Final minute of a finished match; live minutes are computed from the clock below
     current_minute = db.Column(db.Integer, default=0)
     started_at = db.Column(db.DateTime)
     ended_at = db.Column(db.DateTime)
 
+    # Match clock (see services/match_clock.py). The live minute is derived
+    # from these on read, so nothing is written while the clock runs.
+    period = db.Column(db.Text)                      # '1H', '2H' or 'ET'
+    period_started_at = db.Column(db.DateTime)       # kickoff of the current period
+    paused_at = db.Column(db.DateTime)               # set while the clock is stopped
+    paused_seconds = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # stopped time in this period
+
     created_by = db.Column(UUID(as_uuid=True), db.ForeignKey("coaches.id"))
 
     created_at = db.Column(db.DateTime, server_default=db.func.now())
@@ -40,16 +67,74 @@ class Match(db.Model):
     home_team = db.relationship('Team', foreign_keys=[home_team_id], backref='home_matches')
     away_team = db.relationship('Team', foreign_keys=[away_team_id], backref='away_matches')
 
+    __table_args__ = (
+        # Live tables look up in-progress matches of one competition
+        db.Index('ix_matches_competition_status', 'competition_id', 'status'),
+        db.Index('ix_matches_tournament_status', 'tournament_id', 'status'),
+        # Team calendars (conflict checks) read one team's matches by date
+        db.Index('ix_matches_home_team_date', 'home_team_id', 'match_date'),
+        db.Index('ix_matches_away_team_date', 'away_team_id', 'match_date'),
+    )
+
+    def is_coached_by(self, coach_id):
+        """Whether the coach owns either side; placeholder ties may not have both teams yet"""
+        return any(
+            team is not None and str(team.coach_id) == str(coach_id)
+            for team in (self.home_team, self.away_team)
+        )
+
+    def clock_elapsed_seconds(self, now=None):
+        """Seconds played in the current period, excluding stoppages; None without a running clock"""
+        if self.status not in (MatchStatus.live, MatchStatus.paused) or not self.period_started_at:
+            return None
+        now = self.paused_at or now or datetime.utcnow()
+        return max(0, int((now - self.period_started_at).total_seconds()) - (self.paused_seconds or 0))
+
+    def clock_minute(self, now=None):
+        """The minute being played (1-based, stoppage time included); the stored final minute otherwise"""
+        elapsed = self.clock_elapsed_seconds(now)
+        if elapsed is None:
+            return self.current_minute or 0
+        offset, _ = MATCH_PERIODS.get(self.period, (0, 45))
+        return offset + elapsed // 60 + 1
+
+    def clock_dict(self, now=None):
+        """The clock as clients need it to tick locally without polling"""
+        now = now or datetime.utcnow()
+        elapsed = self.clock_elapsed_seconds(now)
+        minute = self.clock_minute(now)
+
+        display = str(minute) if minute else None
+        if elapsed is not None:
+            offset, length = MATCH_PERIODS.get(self.period, (0, 45))
+            if minute > offset + length:
+                display = f"{offset + length}+{minute - offset - length}"
+
+        return {
+            'period': self.period,
+            'minute': minute,
+            'display': display,
+            'running': self.status == MatchStatus.live and elapsed is not None and self.paused_at is None,
+            'elapsed_seconds': elapsed,
+            'period_started_at': _utc_iso(self.period_started_at),
+            'paused_at': _utc_iso(self.paused_at),
+            'paused_seconds': self.paused_seconds or 0,
+            'server_time': _utc_iso(now),
+        }
+
     def to_dict(self):
+        now = datetime.utcnow()
         return {
             'id': str(self.id),
-            'home_team_id': str(self.home_team_id),
-            'away_team_id': str(self.away_team_id),
+            'home_team_id': str(self.home_team_id) if self.home_team_id else None,
+            'away_team_id': str(self.away_team_id) if self.away_team_id else None,
             'home_team': self.home_team.to_dict() if self.home_team else None,
             'away_team': self.away_team.to_dict() if self.away_team else None,
             'competition_id': str(self.competition_id) if self.competition_id else None,
+            'tournament_id': str(self.tournament_id) if self.tournament_id else None,
             'group_id': str(self.group_id) if self.group_id else None,
             'knockout_round_id': str(self.knockout_round_id) if self.knockout_round_id else None,
+            'bracket_slot': self.bracket_slot,
             'match_date': self.match_date.isoformat() if self.match_date else None,
             'venue': self.venue,
             'country': self.country,
@@ -58,10 +143,11 @@ class Match(db.Model):
             'status': self.status.value if self.status else None,
             'home_score': self.home_score,
             'away_score': self.away_score,
-            'current_minute': self.current_minute,
+            'current_minute': self.clock_minute(now),
+            'clock': self.clock_dict(now),
             # ensure datetime strings include a timezone indicator (UTC)
-            'started_at': (self.started_at.isoformat() + 'Z') if self.started_at and self.started_at.tzinfo is None else (self.started_at.isoformat() if self.started_at else None),
-            'ended_at': (self.ended_at.isoformat() + 'Z') if self.ended_at and self.ended_at.tzinfo is None else (self.ended_at.isoformat() if self.ended_at else None),
+            'started_at': _utc_iso(self.started_at),
+            'ended_at': _utc_iso(self.ended_at),
             'created_by': str(self.created_by) if self.created_by else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
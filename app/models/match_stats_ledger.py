@@ -0,0 +1,53 @@
+import uuid
+from app.extensions.db import db
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+
+
+class TeamStatsLedger(db.Model):
+    """What one finished match contributed to a team's season stats"""
+    __tablename__ = 'team_stats_ledger'
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    match_id = db.Column(UUID(as_uuid=True), db.ForeignKey('matches.id', ondelete='CASCADE'), nullable=False)
+    team_id = db.Column(UUID(as_uuid=True), db.ForeignKey('teams.id', ondelete='CASCADE'), nullable=False)
+    season = db.Column(db.Text, nullable=False)
+
+    matches_played = db.Column(db.Integer, default=0, nullable=False)
+    wins = db.Column(db.Integer, default=0, nullable=False)
+    draws = db.Column(db.Integer, default=0, nullable=False)
+    losses = db.Column(db.Integer, default=0, nullable=False)
+    goals_for = db.Column(db.Integer, default=0, nullable=False)
+    goals_against = db.Column(db.Integer, default=0, nullable=False)
+    clean_sheets = db.Column(db.Integer, default=0, nullable=False)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('match_id', 'team_id', name='uq_team_stats_ledger_match_team'),
+        # Rebuilds sum a season per team
+        db.Index('ix_team_stats_ledger_season_team', 'season', 'team_id'),
+    )
+
+
+class PlayerStatsLedger(db.Model):
+    """What one finished match contributed to a player's season stats"""
+    __tablename__ = 'player_stats_ledger'
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    match_id = db.Column(UUID(as_uuid=True), db.ForeignKey('matches.id', ondelete='CASCADE'), nullable=False)
+    player_id = db.Column(UUID(as_uuid=True), db.ForeignKey('players.id', ondelete='CASCADE'), nullable=False)
+    season = db.Column(db.Text, nullable=False)
+
+    matches_played = db.Column(db.Integer, default=0, nullable=False)
+    minutes_played = db.Column(db.Integer, default=0, nullable=False)
+    goals = db.Column(db.Integer, default=0, nullable=False)
+    yellow_cards = db.Column(db.Integer, default=0, nullable=False)
+    red_cards = db.Column(db.Integer, default=0, nullable=False)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('match_id', 'player_id', name='uq_player_stats_ledger_match_player'),
+        db.Index('ix_player_stats_ledger_season_player', 'season', 'player_id'),
+    )
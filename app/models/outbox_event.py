@@ -0,0 +1,51 @@
+import uuid
+from app.extensions.db import db
+from sqlalchemy.dialects.postgresql import UUID
+
+
+class OutboxEvent(db.Model):
+    """
+    Domain event written in the same transaction as the change it describes,
+    and processed afterwards by `flask run-outbox` (see services/outbox_service.py)
+    """
+    __tablename__ = 'outbox_events'
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    event_type = db.Column(db.String(100), nullable=False)  # e.g. 'MatchFinished', 'GoalScored'
+    aggregate_id = db.Column(UUID(as_uuid=True), nullable=True)  # the match the event is about
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, processed, failed
+    # Handlers that already ran, so a retry only runs the rest
+    completed_handlers = db.Column(db.JSON, nullable=False, default=list)
+    attempts = db.Column(db.SmallInteger, nullable=False, default=0)
+    error = db.Column(db.Text)
+
+    available_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+    processed_at = db.Column(db.DateTime)
+
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+
+    __table_args__ = (
+        # Workers take the oldest pending events
+        db.Index('ix_outbox_events_status_available_at', 'status', 'available_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': str(self.id),
+            'event_type': self.event_type,
+            'aggregate_id': str(self.aggregate_id) if self.aggregate_id else None,
+            'payload': self.payload,
+            'status': self.status,
+            'completed_handlers': self.completed_handlers,
+            'attempts': self.attempts,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'processed_at': self.processed_at.isoformat() if self.processed_at else None,
+        }
+
+    def __repr__(self):
+        return f'<OutboxEvent {self.event_type} {self.status}>'
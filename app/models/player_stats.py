@@ -11,7 +11,7 @@ class PlayerStats(db.Model):
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     player_id = db.Column(UUID(as_uuid=True), db.ForeignKey("players.id"), nullable=False)
 
-    season = db.Column(db.Text, default="2024")
+    season = db.Column(db.Text, nullable=False, default="2024")
     matches_played = db.Column(db.Integer, default=0)
     minutes_played = db.Column(db.Integer, default=0)
     goals = db.Column(db.Integer, default=0)
@@ -22,6 +22,11 @@ class PlayerStats(db.Model):
     shots_off_target = db.Column(db.Integer, default=0)
 
     updated_at = db.Column(db.DateTime, server_default=db.func.now())
+
+    __table_args__ = (
+        # One row per player and season; match stats are upserted against it
+        db.UniqueConstraint('player_id', 'season', name='uq_player_stats_player_season'),
+    )
     
     def to_dict(self):
         return {
@@ -8,7 +8,7 @@ class TeamStats(db.Model):
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     team_id = db.Column(UUID(as_uuid=True), db.ForeignKey("teams.id"), nullable=False)
 
-    season = db.Column(db.Text, default="2024")
+    season = db.Column(db.Text, nullable=False, default="2024")
     matches_played = db.Column(db.Integer, default=0)
     wins = db.Column(db.Integer, default=0)
     draws = db.Column(db.Integer, default=0)
@@ -19,6 +19,11 @@ class TeamStats(db.Model):
 
     updated_at = db.Column(db.DateTime, server_default=db.func.now())
 
+    __table_args__ = (
+        # One row per team and season; match stats are upserted against it
+        db.UniqueConstraint('team_id', 'season', name='uq_team_stats_team_season'),
+    )
+
     def to_dict(self):
         return {
             'id': str(self.id),
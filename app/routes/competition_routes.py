@@ -1,13 +1,19 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, current_app, stream_with_context
 from app.models import Competition, CompetitionTeam, Team, KnockoutRound, Match, CompetitionGroup
 from app.services.competition_service import CompetitionService
 from app.services.scheduling_service import SchedulingService
+from app.services.fixture_scheduler import ScheduleConstraints
 from app.services.advancement_service import AdvancementService
 from app.services.auth_service import get_current_user
+from app.services.cache_service import cached_json_response, invalidate_competition
+from app.services.tiebreaker_service import TiebreakerService
+from app.services.standings_history_service import StandingsHistoryService
+from app.services.simulation_service import SimulationService
+from app.services.job_service import JobService, IdempotencyKeyReused
 from app.extensions.db import db
 from functools import wraps
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 competition_bp = Blueprint('competitions', __name__, url_prefix='/api/competitions')
 
@@ -30,6 +36,29 @@ def require_admin(f):
     return decorated_function
 
 
+def _parse_start_date(value):
+    """ISO start date from a request body as naive UTC, or None"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed.tzinfo else parsed
+
+
+def _queue_job(job_type, payload, data):
+    """Queue a background job for a long-running operation and answer 202 with it"""
+    try:
+        job = JobService.enqueue(
+            job_type,
+            payload,
+            idempotency_key=request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+        )
+    except IdempotencyKeyReused as e:
+        return jsonify({'error': str(e)}), 409
+    response = jsonify({'job': job.to_dict(), 'status_url': f'/api/jobs/{job.id}'})
+    response.headers['Location'] = f'/api/jobs/{job.id}'
+    return response, 202
+
+
 # ============================================================
 # COMPETITION CRUD ROUTES
 # ============================================================
@@ -86,6 +115,7 @@ def create_competition():
             max_teams=data.get('max_teams'),
             min_teams=data.get('min_teams', 2),
             created_by=admin_id,
+            tiebreaker_order=data.get('tiebreaker_order'),
         )
         
         print(f"DEBUG: Competition created with id={competition.id}, created_by={competition.created_by}")
@@ -135,6 +165,42 @@ def get_competitions():
         return jsonify({'error': str(e)}), 500
 
 
+@competition_bp.route('/standings', methods=['GET'])
+@require_auth
+def get_season_standings():
+    """Standings of every competition in a season, streamed as one JSON document"""
+    try:
+        season_id = request.args.get('season_id')
+        stage_level = request.args.get('stage_level')
+        
+        # If season_id not provided, use current year
+        if not season_id:
+            season_id = str(datetime.utcnow().year)
+        
+        # Handle season_id - convert string/year to UUID if needed
+        if isinstance(season_id, str) and '-' not in season_id:
+            season_uuid = uuid.uuid5(uuid.NAMESPACE_DNS, f"season-{season_id}")
+        else:
+            season_uuid = uuid.UUID(season_id)
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    dumps = current_app.json.dumps
+    
+    def generate():
+        yield '{"season_id": %s, "stage_level": %s, "competitions": [' % (
+            dumps(str(season_uuid)), dumps(stage_level)
+        )
+        for i, (competition, standings) in enumerate(
+            CompetitionService.iter_season_standings(season_uuid, stage_level=stage_level)
+        ):
+            yield (',' if i else '') + dumps({**competition, 'standings': standings})
+        yield ']}'
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
 @competition_bp.route('/<competition_id>', methods=['GET'])
 @require_auth
 def get_competition(competition_id):
@@ -171,13 +237,20 @@ def update_competition(competition_id):
         
         # Allow updating certain fields
         updateable_fields = ['name', 'status', 'max_teams', 'min_teams', 
-                           'points_win', 'points_draw', 'points_loss']
+                           'points_win', 'points_draw', 'points_loss', 'tiebreaker_order']
+        
+        if 'tiebreaker_order' in data:
+            try:
+                data['tiebreaker_order'] = TiebreakerService.validate_order(data['tiebreaker_order'])
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
         
         for field in updateable_fields:
             if field in data:
                 setattr(competition, field, data[field])
         
         db.session.commit()
+        invalidate_competition(competition.id)
         
         return jsonify(competition.to_dict()), 200
     
@@ -212,6 +285,7 @@ def delete_competition(competition_id):
         
         db.session.delete(competition)
         db.session.commit()
+        invalidate_competition(competition_id)
         
         return jsonify({'message': f'Competition "{competition.name}" deleted successfully'}), 200
     
@@ -234,20 +308,11 @@ def add_teams_auto(competition_id):
         if 'team_ids' not in data or not isinstance(data['team_ids'], list):
             return jsonify({'error': 'team_ids array required'}), 400
         
-        team_ids = [uuid.UUID(tid) if isinstance(tid, str) else tid for tid in data['team_ids']]
-        
-        # Verify teams exist
-        for tid in team_ids:
-            team = Team.query.get(tid)
-            if not team:
-                return jsonify({'error': f'Team {tid} not found'}), 404
+        # Unknown or already enrolled teams are reported per id rather than failing the batch
+        report = CompetitionService.add_teams_auto(uuid.UUID(competition_id), data['team_ids'])
+        invalidate_competition(competition_id)
         
-        added = CompetitionService.add_teams_auto(uuid.UUID(competition_id), team_ids)
-        
-        return jsonify({
-            'added_count': len(added),
-            'teams': [{'id': str(t.id), 'team_id': str(t.team_id)} for t in added]
-        }), 201
+        return jsonify(report), 201
     
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
@@ -265,20 +330,10 @@ def add_teams_manual(competition_id):
         if 'team_ids' not in data or not isinstance(data['team_ids'], list):
             return jsonify({'error': 'team_ids array required'}), 400
         
-        team_ids = [uuid.UUID(tid) if isinstance(tid, str) else tid for tid in data['team_ids']]
+        report = CompetitionService.add_teams_manual(uuid.UUID(competition_id), data['team_ids'])
+        invalidate_competition(competition_id)
         
-        # Verify teams exist
-        for tid in team_ids:
-            team = Team.query.get(tid)
-            if not team:
-                return jsonify({'error': f'Team {tid} not found'}), 404
-        
-        added = CompetitionService.add_teams_manual(uuid.UUID(competition_id), team_ids)
-        
-        return jsonify({
-            'added_count': len(added),
-            'teams': [{'id': str(t.id), 'team_id': str(t.team_id), 'manually_added': True} for t in added]
-        }), 201
+        return jsonify(report), 201
     
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
@@ -384,29 +439,47 @@ def generate_fixtures(competition_id):
         data = request.get_json() or {}
         start_date = data.get('start_date')
         days_between = data.get('days_between_matches', 7)
-        
-        matches = []
-        
-        if competition.format_type == 'round_robin':
-            matches = SchedulingService.generate_round_robin_fixtures(
-                uuid.UUID(competition_id),
-                days_between_matches=days_between
-            )
-        
-        elif competition.format_type == 'knockout':
-            matches = SchedulingService.generate_knockout_brackets(
+        num_groups = data.get('num_groups', 4)
+        # Group draws: 'random' or 'geographic' (least travel, pots kept apart)
+        draw_strategy = data.get('draw_strategy', 'random')
+        pots = data.get('pots')
+        
+        if data.get('preview'):
+            # Nothing is written; commit a preview by sending back its seed and teams_fingerprint
+            return jsonify(SchedulingService.preview_fixtures(
                 uuid.UUID(competition_id),
-                days_between_rounds=days_between
-            )
-        
-        elif competition.format_type == 'group_knockout':
-            num_groups = data.get('num_groups', 4)
-            matches = SchedulingService.generate_group_knockout_fixtures(
-                uuid.UUID(competition_id),
-                groups_config=num_groups,
-                days_between_matches=days_between
-            )
+                start_date=_parse_start_date(start_date),
+                days_between_matches=days_between,
+                num_groups=num_groups,
+                seed=data.get('seed'),
+                draw_strategy=draw_strategy,
+                pots=pots
+            )), 200
+        
+        if data.get('async'):
+            return _queue_job('generate_fixtures', {
+                'competition_id': competition_id,
+                'start_date': start_date,
+                'days_between_matches': days_between,
+                'num_groups': num_groups,
+                'seed': data.get('seed'),
+                'teams_fingerprint': data.get('teams_fingerprint'),
+                'draw_strategy': draw_strategy,
+                'pots': pots,
+            }, data)
+        
+        matches = SchedulingService.generate_fixtures(
+            uuid.UUID(competition_id),
+            start_date=_parse_start_date(start_date),
+            days_between_matches=days_between,
+            num_groups=num_groups,
+            seed=data.get('seed'),
+            teams_fingerprint=data.get('teams_fingerprint'),
+            draw_strategy=draw_strategy,
+            pots=pots
+        )
         
+        invalidate_competition(competition_id)
         return jsonify({
             'generated_matches': len(matches),
             'format_type': competition.format_type,
@@ -422,6 +495,35 @@ def generate_fixtures(competition_id):
         return jsonify({'error': str(e)}), 500
 
 
+@competition_bp.route('/<competition_id>/schedule', methods=['POST'])
+@require_admin
+def schedule_fixtures(competition_id):
+    """
+    Generate fixtures on a calendar that respects venue capacity, blackout
+    dates, rest days and the teams' other matches.
+
+    Dry run by default; pass "commit": true to insert the fixtures.
+    """
+    try:
+        data = request.get_json() or {}
+        constraints = ScheduleConstraints.from_dict(data)
+        commit = bool(data.get('commit', False))
+
+        summary = SchedulingService.schedule_with_constraints(
+            uuid.UUID(competition_id), constraints, commit=commit
+        )
+
+        if commit:
+            invalidate_competition(competition_id)
+
+        return jsonify({'dry_run': not commit, **summary}), 201 if commit else 200
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @competition_bp.route('/<competition_id>/generate-knockout-fixtures', methods=['POST'])
 @require_admin
 def generate_knockout_fixtures(competition_id):
@@ -432,6 +534,15 @@ def generate_knockout_fixtures(competition_id):
         if not competition:
             return jsonify({'error': 'Competition not found'}), 404
         
+        data = request.get_json() or {}
+        start_date = data.get('start_date')
+        
+        if data.get('async'):
+            return _queue_job('generate_knockout_fixtures', {
+                'competition_id': competition_id,
+                'start_date': start_date,
+            }, data)
+        
         # Get qualified teams from standings (top teams)
         standings = CompetitionService.get_competition_standings(uuid.UUID(competition_id))
         qualified_teams = [s['team_id'] for s in standings[:16]]  # Top 16 or adjust
@@ -439,15 +550,13 @@ def generate_knockout_fixtures(competition_id):
         if len(qualified_teams) < 2:
             return jsonify({'error': 'Not enough qualified teams for knockout'}), 400
         
-        data = request.get_json() or {}
-        start_date = data.get('start_date')
-        
         matches = SchedulingService.generate_knockout_from_teams(
             uuid.UUID(competition_id),
             qualified_teams,
-            start_date=start_date
+            start_date=_parse_start_date(start_date)
         )
         
+        invalidate_competition(competition_id)
         return jsonify({
             'generated_matches': len(matches),
             'qualified_teams': len(qualified_teams),
@@ -475,14 +584,68 @@ def generate_knockout_fixtures(competition_id):
 def get_standings(competition_id):
     """Get current standings for competition"""
     try:
-        standings = CompetitionService.get_competition_standings(uuid.UUID(competition_id))
+        competition_uuid = uuid.UUID(competition_id)
+        return cached_json_response(
+            'competition_standings', competition_uuid,
+            lambda: CompetitionService.get_competition_standings(competition_uuid)
+        )
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@competition_bp.route('/<competition_id>/standings/history', methods=['GET'])
+@require_auth
+def get_standings_history(competition_id):
+    """Get standings after each matchday (optional from/to dates and team_id)"""
+    try:
+        competition_uuid = uuid.UUID(competition_id)
+        date_from = request.args.get('from')
+        date_to = request.args.get('to')
+        team_id = request.args.get('team_id')
         
-        return jsonify(standings), 200
+        try:
+            date_from = datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else None
+            date_to = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else None
+            team_uuid = uuid.UUID(team_id) if team_id else None
+        except ValueError:
+            return jsonify({'error': 'Invalid from/to date (YYYY-MM-DD) or team_id'}), 400
+        
+        return cached_json_response(
+            f'standings_history:{date_from}:{date_to}:{team_uuid}', competition_uuid,
+            lambda: StandingsHistoryService.get_history(
+                competition_uuid, date_from=date_from, date_to=date_to, team_id=team_uuid
+            )
+        )
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@competition_bp.route('/<competition_id>/simulate', methods=['GET'])
+@require_admin
+def simulate_season(competition_id):
+    """Finishing position and promotion/relegation probabilities from simulated remaining fixtures"""
+    try:
+        iterations = request.args.get('iterations', 10000, type=int)
+        seed = request.args.get('seed', 0, type=int)
+        
+        rules = None
+        if 'promote' in request.args or 'relegate' in request.args:
+            rules = {
+                'promote': request.args.get('promote', 0, type=int),
+                'relegate': request.args.get('relegate', 0, type=int),
+            }
+        
+        result = SimulationService.simulate(uuid.UUID(competition_id), iterations=iterations, rules=rules, seed=seed)
+        return jsonify(result), 200
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 # ============================================================
 # ADVANCEMENT/QUALIFICATION ROUTES
 # ============================================================
@@ -550,6 +713,10 @@ def advance_teams_manual(from_id, to_id):
 def apply_advancement_rules(competition_id):
     """Apply all advancement rules for a competition"""
     try:
+        data = request.get_json(silent=True) or {}
+        if data.get('async'):
+            return _queue_job('apply_rules', {'competition_id': competition_id}, data)
+        
         results = AdvancementService.apply_advancement_rules(uuid.UUID(competition_id))
         
         return jsonify({
@@ -618,6 +785,23 @@ def get_competition_groups(competition_id):
         return jsonify({'error': str(e)}), 500
 
 
+@competition_bp.route('/<competition_id>/groups/standings', methods=['GET'])
+@require_auth
+def get_all_group_standings(competition_id):
+    """Get the standings of every group in a competition"""
+    try:
+        competition_uuid = uuid.UUID(competition_id)
+        return cached_json_response(
+            'group_standings', competition_uuid,
+            lambda: CompetitionService.get_all_group_standings(competition_uuid)
+        )
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @competition_bp.route('/<competition_id>/groups/<group_id>/teams', methods=['POST'])
 @require_admin
 def assign_teams_to_group(competition_id, group_id):
@@ -766,8 +950,14 @@ def get_advancement_summary(from_id):
 def get_knockout_bracket(competition_id):
     """Get the complete knockout bracket structure for visualization"""
     try:
-        bracket = SchedulingService.get_knockout_bracket(uuid.UUID(competition_id))
-        return jsonify(bracket), 200
+        competition_uuid = uuid.UUID(competition_id)
+        return cached_json_response(
+            'knockout_bracket',
+            competition_uuid,
+            lambda: SchedulingService.get_knockout_bracket(competition_uuid)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -788,6 +978,7 @@ def generate_next_knockout_round(competition_id, round_order):
         if matches is None:
             return jsonify({'message': 'Tournament is complete'}), 200
         
+        invalidate_competition(competition_id)
         return jsonify({
             'generated_matches': len(matches),
             'matches': [m.to_dict() for m in matches]
@@ -799,7 +990,7 @@ def generate_next_knockout_round(competition_id, round_order):
 @competition_bp.route('/<competition_id>/knockout-rounds/<round_id>/match-dates', methods=['PATCH'])
 @require_admin
 def update_knockout_round_dates(competition_id, round_id):
-    """Update match dates for all matches in a knockout round"""
+    """Update match dates for the unplayed matches in a knockout round"""
     try:
         data = request.get_json()
         
@@ -810,10 +1001,8 @@ def update_knockout_round_dates(competition_id, round_id):
             return jsonify({'error': 'start_date is required'}), 400
         
         # Parse the date
-        from datetime import datetime
         start_datetime = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
         
-        # Get all matches in this round
         ko_round = KnockoutRound.query.get(uuid.UUID(round_id))
         if not ko_round:
             return jsonify({'error': 'Round not found'}), 404
@@ -821,25 +1010,55 @@ def update_knockout_round_dates(competition_id, round_id):
         if str(ko_round.competition_id) != competition_id:
             return jsonify({'error': 'Round does not belong to this competition'}), 400
         
-        matches = Match.query.filter_by(knockout_round_id=uuid.UUID(round_id)).order_by(
-            Match.match_date
-        ).all()
+        summary = SchedulingService.reschedule_matches(
+            ko_round.competition_id,
+            start_datetime,
+            days_between,
+            knockout_round_id=ko_round.id,
+            return_rows=bool(data.get('return_matches', False))
+        )
         
-        if not matches:
-            return jsonify({'error': 'No matches found in this round'}), 404
+        if not summary['updated_count']:
+            return jsonify({'error': 'No unplayed matches found in this round'}), 404
         
-        # Update match dates
-        current_date = start_datetime
-        for match in matches:
-            match.match_date = current_date
-            current_date += timedelta(days=days_between)
+        invalidate_competition(competition_id)
+        return jsonify(summary), 200
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@competition_bp.route('/<competition_id>/reschedule', methods=['POST'])
+@require_admin
+def reschedule_matches(competition_id):
+    """
+    Re-date a competition's unplayed matches from start_date, keeping their
+    order. Optionally scoped to one group (group_id) or knockout round (round_id).
+    """
+    try:
+        data = request.get_json() or {}
         
-        db.session.commit()
+        if not data.get('start_date'):
+            return jsonify({'error': 'start_date is required'}), 400
         
-        return jsonify({
-            'updated_count': len(matches),
-            'matches': [m.to_dict() for m in matches]
-        }), 200
+        start_datetime = datetime.fromisoformat(data['start_date'].replace('Z', '+00:00'))
+        
+        summary = SchedulingService.reschedule_matches(
+            uuid.UUID(competition_id),
+            start_datetime,
+            data.get('days_between_matches', 7),
+            group_id=uuid.UUID(data['group_id']) if data.get('group_id') else None,
+            knockout_round_id=uuid.UUID(data['round_id']) if data.get('round_id') else None,
+            return_rows=bool(data.get('return_matches', False))
+        )
+        
+        invalidate_competition(competition_id)
+        return jsonify(summary), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -0,0 +1,27 @@
+from flask import Blueprint, jsonify
+from app.services.auth_service import get_current_user
+from app.services.job_service import JobService
+from app.models.admin import Admin
+
+bp = Blueprint("jobs", __name__, url_prefix="/api/jobs")
+
+
+@bp.get("/<uuid:job_id>")
+def get_job(job_id):
+    """Status, progress and result of a background job"""
+    try:
+        user = get_current_user()
+    except Exception as e:
+        return jsonify({"error": f"Authentication failed: {str(e)}"}), 401
+    if not isinstance(user, Admin):
+        return jsonify({"error": "Only admins can view jobs"}), 403
+
+    job = JobService.get_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+
+    response = jsonify(job.to_dict())
+    if job.status in ('queued', 'running'):
+        # Hint for pollers
+        response.headers['Retry-After'] = '2'
+    return response, 200
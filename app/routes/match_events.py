@@ -4,14 +4,45 @@ from app.services.auth_service import get_current_coach, get_current_user
 from app.models.match_event import MatchEvent
 from app.models.match import Match
 from app.models.enums import MatchStatus
-from app.models.player_stats import PlayerStats
 from app.models.admin import Admin
+from app.services.cache_service import invalidate_competition
+from app.services.live_updates_service import LiveUpdatesService
+from app.services.outbox_service import OutboxService
+from app.services.match_service import update_match_result
+
+SCORING_EVENTS = ("goal", "penalty_goal", "own_goal")
 
 bp = Blueprint("match_events", __name__, url_prefix="/api/match-events")
 
 # Also register routes under /api/matches/{match_id}/events for convenience
 matches_bp = Blueprint("match_events_matches", __name__, url_prefix="/api/matches/<uuid:match_id>/events")
 
+
+def _apply_event_to_match(match, team_id, event_type):
+    """
+    Count a new event towards the match score. Once a match is finished its
+    score is the result, so a correction goes through update_match_result
+    (standings, history and MatchResultChanged for the outbox); an event
+    that leaves the score alone still moves the stats ledger.
+    """
+    is_home = str(team_id) == str(match.home_team_id)
+    is_away = str(team_id) == str(match.away_team_id)
+    home_score, away_score = match.home_score or 0, match.away_score or 0
+    if event_type in ("goal", "penalty_goal"):
+        home_score += 1 if is_home else 0
+        away_score += 1 if is_away else 0
+    elif event_type == "own_goal":
+        # Own goal means the opposing team gets the point
+        home_score += 1 if is_away else 0
+        away_score += 1 if is_home else 0
+
+    if match.status != MatchStatus.finished:
+        match.home_score, match.away_score = home_score, away_score
+    elif (home_score, away_score) != (match.home_score, match.away_score):
+        update_match_result(match, home_score=home_score, away_score=away_score)
+    else:
+        OutboxService.record('MatchResultChanged', match.id, competition_id=match.competition_id)
+
 @bp.get("/<uuid:match_id>")
 def get_match_events(match_id):
     # Public endpoint: allow unauthenticated users to view match info.
@@ -55,7 +86,7 @@ def create_match_event():
 
     # For coaches, verify they own one of the teams
     if not isinstance(user, Admin):
-        if str(match.home_team.coach_id) != str(user.id) and str(match.away_team.coach_id) != str(user.id):
+        if not match.is_coached_by(user.id):
             return jsonify({"error": "You don't have permission to add events to this match"}), 403
 
     if match.status.value != 'live' and match.status.value != 'finished':
@@ -70,55 +101,23 @@ def create_match_event():
         additional_info=data.get("additional_info", {})
     )
 
-    # Update match score based on event type
-    if data["event_type"] == "goal":
-        if str(data["team_id"]) == str(match.home_team_id):
-            match.home_score += 1
-        elif str(data["team_id"]) == str(match.away_team_id):
-            match.away_score += 1
-        db.session.add(match)
-    elif data["event_type"] == "penalty_goal":
-        if str(data["team_id"]) == str(match.home_team_id):
-            match.home_score += 1
-        elif str(data["team_id"]) == str(match.away_team_id):
-            match.away_score += 1
-        db.session.add(match)
-    elif data["event_type"] == "own_goal":
-        # Own goal means the opposing team gets the point
-        if str(data["team_id"]) == str(match.home_team_id):
-            match.away_score += 1
-        elif str(data["team_id"]) == str(match.away_team_id):
-            match.home_score += 1
-        db.session.add(match)
-
-    # Update match current_minute if this event is at a later minute
-    if minute > match.current_minute:
-        match.current_minute = minute
-        db.session.add(match)
-
     db.session.add(event)
+    _apply_event_to_match(match, data["team_id"], data["event_type"])
 
-    # Update PlayerStats immediately for this event (so public stats reflect changes)
-    if data.get("player_id"):
-        try:
-            pid = data.get("player_id")
-            ps = PlayerStats.query.filter_by(player_id=pid).first()
-            if not ps:
-                ps = PlayerStats(player_id=pid)
-                db.session.add(ps)
-
-            et = data.get("event_type")
-            if et in ("goal", "penalty_goal"):
-                ps.goals = (ps.goals or 0) + 1
-            elif et == "yellow_card":
-                ps.yellow_cards = (ps.yellow_cards or 0) + 1
-            elif et == "red_card":
-                ps.red_cards = (ps.red_cards or 0) + 1
-        except Exception as _:
-            # don't block event creation on stats update
-            pass
+    # Notifications and other follow-ups run from the outbox, committed with the goal
+    live_goal = data["event_type"] in SCORING_EVENTS and match.status == MatchStatus.live
+    if live_goal:
+        OutboxService.record(
+            'GoalScored', match.id,
+            competition_id=match.competition_id, team_id=data["team_id"], minute=minute
+        )
 
     db.session.commit()
+    invalidate_competition(match.competition_id)
+
+    # Refresh the tournament's live table projection when a live score moved
+    if live_goal and match.tournament_id:
+        LiveUpdatesService.on_goal_scored(match.tournament_id)
 
     return jsonify(event.to_dict()), 201
 
@@ -151,7 +150,7 @@ def create_match_event_for_match(match_id):
 
     # For coaches, verify they own one of the teams
     if not isinstance(user, Admin):
-        if str(match.home_team.coach_id) != str(user.id) and str(match.away_team.coach_id) != str(user.id):
+        if not match.is_coached_by(user.id):
             return jsonify({"error": "You don't have permission to add events to this match"}), 403
 
     if match.status.value != 'live' and match.status.value != 'finished':
@@ -166,54 +165,22 @@ def create_match_event_for_match(match_id):
         additional_info=data.get("additional_info", {})
     )
     db.session.add(event)
+    _apply_event_to_match(match, data["team_id"], data["event_type"])
 
-    # Update match scores for goals
-    if data["event_type"] == "goal":
-        if str(data["team_id"]) == str(match.home_team_id):
-            match.home_score += 1
-        elif str(data["team_id"]) == str(match.away_team_id):
-            match.away_score += 1
-        db.session.add(match)
-    elif data["event_type"] == "penalty_goal":
-        if str(data["team_id"]) == str(match.home_team_id):
-            match.home_score += 1
-        elif str(data["team_id"]) == str(match.away_team_id):
-            match.away_score += 1
-        db.session.add(match)
-    elif data["event_type"] == "own_goal":
-        # Own goal means the opposing team gets the point
-        if str(data["team_id"]) == str(match.home_team_id):
-            match.away_score += 1
-        elif str(data["team_id"]) == str(match.away_team_id):
-            match.home_score += 1
-        db.session.add(match)
-
-    # Update match current_minute if this event is at a later minute
-    if minute > match.current_minute:
-        match.current_minute = minute
-        db.session.add(match)
-
-    # Update PlayerStats immediately for this event (so public stats reflect changes)
-    if data.get("player_id"):
-        try:
-            pid = data.get("player_id")
-            ps = PlayerStats.query.filter_by(player_id=pid).first()
-            if not ps:
-                ps = PlayerStats(player_id=pid)
-                db.session.add(ps)
-
-            et = data.get("event_type")
-            if et in ("goal", "penalty_goal"):
-                ps.goals = (ps.goals or 0) + 1
-            elif et == "yellow_card":
-                ps.yellow_cards = (ps.yellow_cards or 0) + 1
-            elif et == "red_card":
-                ps.red_cards = (ps.red_cards or 0) + 1
-        except Exception as _:
-            # don't block event creation on stats update
-            pass
+    # Notifications and other follow-ups run from the outbox, committed with the goal
+    live_goal = data["event_type"] in SCORING_EVENTS and match.status == MatchStatus.live
+    if live_goal:
+        OutboxService.record(
+            'GoalScored', match.id,
+            competition_id=match.competition_id, team_id=data["team_id"], minute=minute
+        )
 
     db.session.commit()
+    invalidate_competition(match.competition_id)
+
+    # Refresh the tournament's live table projection when a live score moved
+    if live_goal and match.tournament_id:
+        LiveUpdatesService.on_goal_scored(match.tournament_id)
 
     return jsonify(event.to_dict()), 201
 
@@ -224,7 +191,7 @@ def delete_match_event(event_id):
 
     # Verify the match exists and coach owns one of the teams
     match = event.match
-    if str(match.home_team.coach_id) != str(coach.id) and str(match.away_team.coach_id) != str(coach.id):
+    if not match.is_coached_by(coach.id):
         return jsonify({"error": "You don't have permission to delete events from this match"}), 403
 
     if match.status.value != 'live':
@@ -245,22 +212,13 @@ def delete_match_event(event_id):
             match.home_score = max(0, match.home_score - 1)
         db.session.add(match)
 
-    # Adjust PlayerStats to remove the effect of this event if applicable
-    if event.player_id:
-        try:
-            ps = PlayerStats.query.filter_by(player_id=event.player_id).first()
-            if ps:
-                ev = event.event_type.value if hasattr(event.event_type, 'value') else str(event.event_type)
-                if ev in ("goal", "penalty_goal") and ps.goals:
-                    ps.goals = max(0, ps.goals - 1)
-                elif ev == "yellow_card" and ps.yellow_cards:
-                    ps.yellow_cards = max(0, ps.yellow_cards - 1)
-                elif ev == "red_card" and ps.red_cards:
-                    ps.red_cards = max(0, ps.red_cards - 1)
-        except Exception:
-            pass
+    scoring_event = event.event_type.value in SCORING_EVENTS
 
     db.session.delete(event)
     db.session.commit()
+    invalidate_competition(match.competition_id)
+
+    if scoring_event and match.tournament_id:
+        LiveUpdatesService.on_goal_scored(match.tournament_id)
 
     return jsonify({"message": "Event deleted successfully"})
\ No newline at end of file
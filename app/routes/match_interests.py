@@ -8,6 +8,7 @@ from urllib.parse import quote_plus
 from app.models.match_interest import MatchInterest
 from app.models.match import Match
 from app.models.enums import MatchInterestStatus
+from app.services.team_calendar import check_fixtures, describe_conflicts
 
 bp = Blueprint("match_interests", __name__, url_prefix="/api/match-interests")
 
@@ -138,6 +139,16 @@ def respond_to_interest(interest_id):
         app_logger.warning('Unauthorized respond attempt: coach=%s interest=%s target_coach=%s', coach.id, interest.id, target_coach_id)
         return jsonify({"error": "You don't have permission to respond to this interest"}), 403
 
+    # Accepting must not double-book either team
+    if data["status"] == "accepted":
+        conflicts = check_fixtures([{
+            "home_team_id": interest.requesting_team_id,
+            "away_team_id": interest.target_team_id,
+            "match_date": interest.proposed_date,
+        }])
+        if conflicts:
+            return jsonify({"error": describe_conflicts(conflicts), "conflicts": conflicts}), 409
+
     interest.status = data["status"]
     interest.responded_at = db.func.now()
 
@@ -1,7 +1,19 @@
+import io
+
 from flask import Blueprint, request, jsonify, abort
 from sqlalchemy.orm import joinedload
 from app.services.auth_service import get_current_coach, get_current_user
-from app.services.match_service import schedule_match, start_match, finish_match, create_tournament_matches
+from app.services.match_service import (
+    schedule_match, start_match, finish_match, create_tournament_matches, update_match_result
+)
+from app.services.result_import_service import (
+    ResultImportService, read_rows, detect_format, IMPORT_FORMATS, CHUNK_SIZE as IMPORT_CHUNK_SIZE
+)
+from app.services.match_clock import pause_clock, resume_clock
+from app.services.competition_standings_service import CompetitionStandingsService
+from app.services.standings_history_service import StandingsHistoryService
+from app.services.match_stats_service import MatchStatsService
+from app.services.cache_service import invalidate_competition
 from app.models.match import Match
 from app.models.tournament import Tournament
 from app.models.enums import MatchStatus
@@ -16,6 +28,7 @@ match_bp = Blueprint(
     url_prefix="/api/tournaments/<uuid:tournament_id>/matches"
 )
 
+
 @bp.put("/<uuid:match_id>", strict_slashes=False)
 def update_match_details(match_id):
     """Update match details (scores, status, venue)"""
@@ -23,50 +36,91 @@ def update_match_details(match_id):
         # Allow both coaches and admins to update matches
         user = get_current_user()
         
-        print(f"DEBUG: update_match_details - User type: {type(user).__name__}, User ID: {user.id if hasattr(user, 'id') else 'N/A'}")
-        
         if isinstance(user, Admin):
             # Admin can update any match
-            print(f"DEBUG: Admin user allowed to update match")
             pass
         else:
             # Coach can only update matches they own
-            print(f"DEBUG: Coach user - checking ownership")
             match = Match.query.get_or_404(match_id)
-            if str(match.home_team.coach_id) != str(user.id) and str(match.away_team.coach_id) != str(user.id):
-                print(f"DEBUG: Coach {user.id} not authorized for match {match_id}")
+            if not match.is_coached_by(user.id):
                 return jsonify({"error": "You don't have permission to update this match"}), 403
     except Exception as e:
-        print(f"DEBUG: Auth error in update_match_details: {str(e)}")
-        import traceback
-        traceback.print_exc()
         return jsonify({"error": f"Authentication failed: {str(e)}"}), 401
 
     try:
         match = Match.query.get_or_404(match_id)
         data = request.json or {}
 
-        print(f"DEBUG: Updating match {match_id} with data: {data}")
-
         # Update allowed fields
-        if 'home_score' in data:
-            match.home_score = data['home_score']
-        if 'away_score' in data:
-            match.away_score = data['away_score']
-        if 'status' in data:
-            match.status = MatchStatus(data['status'])
+        update_match_result(
+            match,
+            home_score=data.get('home_score'),
+            away_score=data.get('away_score'),
+            status=data.get('status'),
+        )
         if 'venue' in data:
             match.venue = data['venue']
 
         db.session.commit()
-        print(f"DEBUG: Match {match_id} updated successfully")
+        invalidate_competition(match.competition_id)
         return jsonify(match.to_dict()), 200
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.post("/import-results", strict_slashes=False)
+def import_results():
+    """
+    Bulk results for many matches: a CSV or JSON Lines upload (multipart
+    'file', or the raw request body), streamed and applied in chunks.
+    Query: format (csv|jsonl, default from the file name or content type),
+    tournament_id (create missing fixtures there), dry_run, chunk_size.
+    """
+    try:
+        user = get_current_user()
+    except Exception as e:
+        return jsonify({"error": f"Authentication failed: {str(e)}"}), 401
+    if not isinstance(user, Admin):
+        return jsonify({"error": "Only admins can import results"}), 403
+
+    upload = request.files.get('file')
+    fmt = request.args.get('format') or detect_format(
+        filename=upload.filename if upload else None,
+        content_type=upload.content_type if upload else request.content_type,
+    )
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({"error": f"format must be one of: {', '.join(IMPORT_FORMATS)}"}), 400
+
+    try:
+        chunk_size = int(request.args.get('chunk_size', IMPORT_CHUNK_SIZE))
+        if chunk_size < 1:
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": "chunk_size must be a positive integer"}), 400
+
+    stream = io.TextIOWrapper(upload.stream if upload else request.stream, encoding='utf-8-sig', newline='')
+    try:
+        report = ResultImportService.import_results(
+            read_rows(stream, fmt),
+            county_id=user.county_id if user.role == 'county_admin' else None,
+            tournament_id=request.args.get('tournament_id'),
+            chunk_size=chunk_size,
+            dry_run=request.args.get('dry_run', '').lower() in ('1', 'true', 'yes'),
+        )
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         db.session.rollback()
-        print(f"DEBUG: Error updating match: {str(e)}")
-        import traceback
-        traceback.print_exc()
         return jsonify({"error": str(e)}), 500
+    finally:
+        stream.detach()
+
+    return jsonify(report), 200
 
 
 @bp.delete("/<uuid:match_id>", strict_slashes=False)
@@ -80,19 +134,26 @@ def delete_match(match_id):
         else:
             # Coach can only delete matches they own
             match = Match.query.get_or_404(match_id)
-            if str(match.home_team.coach_id) != str(user.id) and str(match.away_team.coach_id) != str(user.id):
+            if not match.is_coached_by(user.id):
                 return jsonify({"error": "You don't have permission to delete this match"}), 403
     except Exception as e:
         return jsonify({"error": str(e)}), 401
 
     match = Match.query.get_or_404(match_id)
     
+    # Remove its result from the standings read model and season stats
+    CompetitionStandingsService.apply_match(match, sign=-1)
+    MatchStatsService.sync_match(match, retract=True)
+    
     # Delete associated events first
     from app.models.match_event import MatchEvent
     MatchEvent.query.filter_by(match_id=match_id).delete()
     
     db.session.delete(match)
+    if CompetitionStandingsService.result_of(match):
+        StandingsHistoryService.record_match(match)
     db.session.commit()
+    invalidate_competition(match.competition_id)
     return jsonify({"message": "Match deleted successfully"}), 200
 
 
@@ -103,7 +164,10 @@ def start(match_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 401
     match = Match.query.get_or_404(match_id)
-    return jsonify(start_match(match).to_dict())
+    try:
+        return jsonify(start_match(match).to_dict())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
 
 @bp.patch("/<uuid:match_id>/pause", strict_slashes=False)
@@ -116,8 +180,9 @@ def pause(match_id):
     if match.status != MatchStatus.live:
         return jsonify({"error": "Match is not live"}), 400
     match.status = MatchStatus.paused
-    # Optionally, record the paused time, but for now, just change status
+    pause_clock(match)
     db.session.commit()
+    invalidate_competition(match.competition_id)
     return jsonify(match.to_dict())
 
 
@@ -130,32 +195,30 @@ def resume(match_id):
     match = Match.query.get_or_404(match_id)
     if match.status != MatchStatus.paused:
         return jsonify({"error": "Match is not paused"}), 400
+    try:
+        # {"period": "2H"} kicks off the second half (or extra time) after the break
+        resume_clock(match, period=(request.get_json(silent=True) or {}).get('period'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     match.status = MatchStatus.live
     db.session.commit()
+    invalidate_competition(match.competition_id)
     return jsonify(match.to_dict())
 
 
 @bp.patch("/<uuid:match_id>/finish", strict_slashes=False)
 def finish(match_id):
-    print(f"Finish match route called for match_id: {match_id}")
     try:
         get_current_coach()
     except Exception as e:
         return jsonify({"error": str(e)}), 401
     match = Match.query.get_or_404(match_id)
-    print(f"Found match {match_id} with status: {match.status}")
     try:
-        result = finish_match(match)
-        print(f"Finish match completed for {match_id}, returning status: {result.status}")
-        print(f"Match {match_id} final status value: {result.status.value if result.status else None}")
-        # Debug: log started_at to ensure backend cleared it
-        try:
-            print(f"Match {match_id} started_at after finish: {result.started_at}")
-        except Exception as _:
-            print(f"Match {match_id} started_at not available in result object")
-        return jsonify(result.to_dict())
+        return jsonify(finish_match(match).to_dict())
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        print(f"Error in finish route for match {match_id}: {e}")
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
@@ -261,7 +324,11 @@ def my_matches():
 def create_matches(tournament_id):
     coach = get_current_coach()
     data = request.json
-    matches = create_tournament_matches(tournament_id, data["matches"])
+    try:
+        matches = create_tournament_matches(tournament_id, data["matches"])
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
     return jsonify(matches), 201
 
 
@@ -274,7 +341,7 @@ def list_tournament_matches(tournament_id):
     qry = Match.query.options(
         joinedload(Match.home_team),
         joinedload(Match.away_team)
-    ).filter(Match.competition_id == tournament_id)
+    ).filter(Match.tournament_id == tournament_id)
 
     if status:
         if status == 'upcoming':
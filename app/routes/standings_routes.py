@@ -1,17 +1,22 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint
 from app.services.standings_service import StandingsService
 from app.services.live_updates_service import LiveUpdatesService
+from app.services.cache_service import cached_json_response
 
 standings_bp = Blueprint("standings", __name__, url_prefix="/api/tournaments")
 
 
 @standings_bp.get("/<uuid:tournament_id>/standings")
 def get_standings(tournament_id):
-    table = StandingsService.get_standings(tournament_id)
-    return jsonify(table), 200
+    return cached_json_response(
+        "tournament_standings", tournament_id,
+        lambda: StandingsService.get_standings(tournament_id)
+    )
 
 
 @standings_bp.get("/<uuid:tournament_id>/standings/live")
 def live_standings(tournament_id):
-    table = LiveUpdatesService.live_table(tournament_id)
-    return jsonify(table), 200
+    return cached_json_response(
+        "live_standings", tournament_id,
+        lambda: LiveUpdatesService.live_table(tournament_id)
+    )
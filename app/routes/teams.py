@@ -4,6 +4,7 @@ from app.services.auth_service import get_current_coach, get_current_coach_or_no
 from app.models.team import Team
 from app.models.admin import Admin
 from app.models.coach import Coach
+from app.services.team_calendar import TeamCalendar, check_fixtures
 
 bp = Blueprint("teams", __name__, url_prefix="/api/teams")
 
@@ -244,3 +245,70 @@ def get_team_players(team_id):
 
     players = team.players
     return jsonify([player.to_dict() for player in players])
+
+
+@bp.get("/<uuid:team_id>/calendar-conflicts", strict_slashes=False)
+def get_calendar_conflicts(team_id):
+    """
+    Double bookings in a team's calendar. With ?date=... checks whether the
+    team is free that day; otherwise lists the days (optionally within
+    ?from=...&to=...) on which the team already has more than one match.
+    """
+    try:
+        get_current_user()
+    except Exception as e:
+        return jsonify({"error": str(e)}), 401
+
+    if not Team.query.get(team_id):
+        return jsonify({"error": "Team not found"}), 404
+
+    try:
+        if request.args.get("date"):
+            match_date = request.args["date"]
+            calendar = TeamCalendar.load([team_id], start=match_date, end=match_date)
+            clashes = calendar.conflicts(team_id, match_date)
+            return jsonify({
+                "team_id": str(team_id),
+                "date": match_date,
+                "available": not clashes,
+                "matches": [{"match_id": match_id, "match_date": d.isoformat()} for d, match_id in clashes],
+            }), 200
+
+        calendar = TeamCalendar.load([team_id], start=request.args.get("from"), end=request.args.get("to"))
+        days = calendar.team_conflicts(team_id)
+        return jsonify({
+            "team_id": str(team_id),
+            "conflicts": [
+                {
+                    "date": day.isoformat(),
+                    "matches": [{"match_id": match_id, "match_date": d.isoformat()} for d, match_id in entries],
+                }
+                for day, entries in days
+            ],
+        }), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@bp.post("/calendar-conflicts", strict_slashes=False)
+def validate_fixture_list():
+    """
+    Batch check for a fixture list: {"fixtures": [{"home_team_id", "away_team_id",
+    "match_date", "id"?}, ...]}. Reports clashes with existing matches and
+    within the list itself.
+    """
+    try:
+        get_current_user()
+    except Exception as e:
+        return jsonify({"error": str(e)}), 401
+
+    fixtures = (request.get_json() or {}).get("fixtures")
+    if not isinstance(fixtures, list):
+        return jsonify({"error": "fixtures must be a list"}), 400
+
+    try:
+        conflicts = check_fixtures(fixtures)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid fixture: {e}"}), 400
+
+    return jsonify({"valid": not conflicts, "conflicts": conflicts}), 200
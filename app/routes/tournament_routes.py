@@ -65,7 +65,7 @@ def my_team_matches_in_tournament(tournament_id):
         joinedload(Match.home_team),
         joinedload(Match.away_team)
     ).filter(
-        Match.competition_id == tournament_id,
+        Match.tournament_id == tournament_id,
         (Match.home_team_id.in_([team.id for team in coach.teams]) | 
          Match.away_team_id.in_([team.id for team in coach.teams]))
     ).order_by(Match.match_date).all()
@@ -44,8 +44,8 @@ class AdvancementService:
         advanced_teams = CompetitionService.add_teams_auto(to_competition_id, team_ids)
         
         return {
-            'advanced_count': len(advanced_teams),
-            'teams': [{'team_id': str(t.team_id)} for t in advanced_teams],
+            'advanced_count': advanced_teams['added_count'],
+            'teams': [{'team_id': t['team_id']} for t in advanced_teams['teams']],
         }
 
     @staticmethod
@@ -60,9 +60,6 @@ class AdvancementService:
         if from_comp.format_type != 'group_knockout':
             raise ValueError("Source competition must be group_knockout format")
         
-        # Get standings
-        standings = CompetitionService.get_competition_standings(from_competition_id)
-        
         # Get eligible teams (group winners) using the service
         eligible = CompetitionService.get_eligible_teams_for_advancement(
             from_competition_id, to_competition_id
@@ -74,8 +71,8 @@ class AdvancementService:
         advanced_teams = CompetitionService.add_teams_auto(to_competition_id, team_ids)
         
         return {
-            'advanced_count': len(advanced_teams),
-            'teams': [{'team_id': str(t.team_id)} for t in advanced_teams],
+            'advanced_count': advanced_teams['added_count'],
+            'teams': [{'team_id': t['team_id']} for t in advanced_teams['teams']],
         }
 
     @staticmethod
@@ -192,8 +189,8 @@ class AdvancementService:
         advanced_teams = CompetitionService.add_teams_manual(to_competition_id, team_ids)
         
         return {
-            'advanced_count': len(advanced_teams),
-            'teams': [{'team_id': str(t.team_id)} for t in advanced_teams],
+            'advanced_count': advanced_teams['added_count'],
+            'teams': [{'team_id': t['team_id']} for t in advanced_teams['teams']],
             'note': 'Teams added via manual override',
         }
 
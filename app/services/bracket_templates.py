@@ -0,0 +1,84 @@
+"""
+Precomputed single-elimination bracket templates.
+
+A template depends only on the number of teams, so it is built once per N
+and memoized. Brackets are padded to the next power of two; the missing
+seeds are byes, and standard seeding places them against the top seeds.
+Seeds are laid out so that 1 and 2 can only meet in the final, 1-4 only in
+the semi-finals, and so on (1v16, 8v9, 5v12, 4v13, ...).
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+
+MAX_BRACKET_TEAMS = 512
+
+BracketTemplate = namedtuple('BracketTemplate', [
+    'num_teams',      # real teams
+    'size',           # bracket size, the next power of two
+    'round_names',    # first round to final
+    'first_round',    # per slot: (seed, seed or None for a bye), seeds 1-based
+    'matches_per_round',
+])
+
+
+@lru_cache(maxsize=None)
+def seeding_order(size):
+    """Seed at each bracket line for a power-of-two bracket, top to bottom"""
+    if size < 2 or size & (size - 1):
+        raise ValueError(f"Bracket size must be a power of two, got {size}")
+
+    order = [1]
+    while len(order) < size:
+        total = len(order) * 2 + 1
+        order = [seed for s in order for seed in (s, total - s)]
+    return tuple(order)
+
+
+def round_name(teams_in_round):
+    """Display name for a round contested by `teams_in_round` teams"""
+    if teams_in_round == 2:
+        return "Final"
+    if teams_in_round == 4:
+        return "Semi-Finals"
+    if teams_in_round == 8:
+        return "Quarter-Finals"
+    return f"Round of {teams_in_round}"
+
+
+@lru_cache(maxsize=None)
+def bracket_template(num_teams):
+    """Template for `num_teams` teams (2 to MAX_BRACKET_TEAMS)"""
+    if not 2 <= num_teams <= MAX_BRACKET_TEAMS:
+        raise ValueError(f"Knockout brackets support 2 to {MAX_BRACKET_TEAMS} teams, got {num_teams}")
+
+    size = 1
+    while size < num_teams:
+        size *= 2
+
+    order = seeding_order(size)
+    first_round = tuple(
+        (order[i], order[i + 1] if order[i + 1] <= num_teams else None)
+        for i in range(0, size, 2)
+    )
+
+    round_names = []
+    matches_per_round = []
+    teams = size
+    while teams >= 2:
+        round_names.append(round_name(teams))
+        matches_per_round.append(teams // 2)
+        teams //= 2
+
+    return BracketTemplate(
+        num_teams=num_teams,
+        size=size,
+        round_names=tuple(round_names),
+        first_round=first_round,
+        matches_per_round=tuple(matches_per_round),
+    )
+
+
+def next_slot(slot):
+    """Slot in the next round that the winner of `slot` moves to, and whether they play at home"""
+    return slot // 2, slot % 2 == 0
@@ -0,0 +1,135 @@
+"""
+Versioned in-process caches for read-heavy competition endpoints.
+
+Entries are stored with the competition version they were built at and are
+only served while that version is current. The version token is mostly what
+the database says: latest Match/KnockoutRound/Team updated_at, match, round
+and team counts, and the competition's or tournament's updated_at. Any write
+that moves one of those is seen by every process. On top of that,
+invalidate_competition() bumps a counter, but the counter is per process: it
+only covers this process's own writes that the database fields miss. Writes
+made by other processes (other web workers, run-jobs, run-outbox) are only
+seen once they change one of the database fields.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import request, current_app, Response
+from sqlalchemy import func, select, or_, union
+
+from app.extensions.db import db
+from app.models import Match, Competition, CompetitionTeam, KnockoutRound, Team
+from app.models.tournament import Tournament
+from app.models.tournament_team import TournamentTeam
+
+
+class VersionedCache:
+    """Thread-safe LRU cache whose entries are tied to a version token"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        """Return the cached value if it was built at `version`, else None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, competition_id):
+        """Drop every entry whose key belongs to a competition"""
+        competition_id = str(competition_id)
+        with self._lock:
+            for key in [k for k in self._entries if k[1] == competition_id]:
+                del self._entries[key]
+
+
+standings_cache = VersionedCache(max_entries=512)
+
+_write_counters = {}
+_counter_lock = threading.Lock()
+
+
+def invalidate_competition(competition_id):
+    """
+    Called by writers after committing a change that affects a competition.
+    Bumps its write counter and evicts its cached tables.
+    """
+    if not competition_id:
+        return
+    competition_id = str(competition_id)
+    with _counter_lock:
+        _write_counters[competition_id] = _write_counters.get(competition_id, 0) + 1
+    standings_cache.invalidate(competition_id)
+
+
+def competition_version(competition_id):
+    """
+    Version token for everything derived from a competition's matches,
+    rounds and teams, or a tournament's (tournament ids are used the same way)
+    """
+    def scalar(column, *criteria):
+        return select(column).where(*criteria).scalar_subquery()
+
+    team_ids = union(
+        select(CompetitionTeam.team_id).where(CompetitionTeam.competition_id == competition_id),
+        select(TournamentTeam.team_id).where(TournamentTeam.tournament_id == competition_id),
+    )
+
+    row = db.session.execute(
+        select(
+            func.max(Match.updated_at),
+            func.count(Match.id),
+            scalar(func.count(CompetitionTeam.id), CompetitionTeam.competition_id == competition_id),
+            scalar(func.count(TournamentTeam.id), TournamentTeam.tournament_id == competition_id),
+            # Team names show in every table
+            scalar(func.max(Team.updated_at), Team.id.in_(team_ids)),
+            scalar(Competition.updated_at, Competition.id == competition_id),
+            scalar(Tournament.updated_at, Tournament.id == competition_id),
+            scalar(func.max(KnockoutRound.updated_at), KnockoutRound.competition_id == competition_id),
+            scalar(func.count(KnockoutRound.id), KnockoutRound.competition_id == competition_id),
+        ).where(or_(Match.competition_id == competition_id, Match.tournament_id == competition_id))
+    ).one()
+
+    counter = _write_counters.get(str(competition_id), 0)
+    return '|'.join(
+        '-' if value is None else value.isoformat() if hasattr(value, 'isoformat') else str(value)
+        for value in (*row, counter)
+    )
+
+
+def cached_json_response(scope, competition_id, build):
+    """
+    Serve `build()` as JSON through the standings cache with ETag support.
+    Returns 304 when the client's If-None-Match matches the current version.
+    """
+    key = (scope, str(competition_id))
+    version = competition_version(competition_id)
+    etag = hashlib.sha1(f"{scope}:{competition_id}:{version}".encode()).hexdigest()
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    body = standings_cache.get(key, version)
+    if body is None:
+        body = current_app.json.dumps(build())
+        standings_cache.set(key, version, body)
+
+    response = Response(body, status=200, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
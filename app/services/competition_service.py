@@ -1,9 +1,12 @@
-from app.extensions.db import db
+from app.extensions.db import db, dialect_insert
 from app.models import (
     Competition, CompetitionTeam, CompetitionGroup, KnockoutRound, 
     CompetitionAdvancementRule, Match, Team
 )
+from app.models.competition_standing import CompetitionStanding
+from app.services.tiebreaker_service import TiebreakerService
 from sqlalchemy import func
+from itertools import groupby
 import uuid
 
 
@@ -13,7 +16,8 @@ class CompetitionService:
     @staticmethod
     def create_competition(season_id, name, stage_level, format_type='knockout', 
                          legs=1, points_win=3, points_draw=1, points_loss=0,
-                         region_id=None, county_id=None, max_teams=None, min_teams=2, created_by=None):
+                         region_id=None, county_id=None, max_teams=None, min_teams=2, created_by=None,
+                         tiebreaker_order=None):
         """Create a new competition with specified configuration"""
         competition = Competition(
             season_id=season_id,
@@ -29,6 +33,7 @@ class CompetitionService:
             max_teams=max_teams,
             min_teams=min_teams,
             created_by=created_by,
+            tiebreaker_order=TiebreakerService.validate_order(tiebreaker_order),
             status='draft'
         )
         db.session.add(competition)
@@ -37,71 +42,107 @@ class CompetitionService:
 
     @staticmethod
     def add_teams_auto(competition_id, team_ids):
-        """Auto-qualify teams to a competition"""
-        competition = Competition.query.get(competition_id)
-        if not competition:
-            raise ValueError(f"Competition {competition_id} not found")
-        
-        # Check max_teams constraint
-        existing_count = CompetitionTeam.query.filter_by(competition_id=competition_id).count()
-        if competition.max_teams and (existing_count + len(team_ids)) > competition.max_teams:
-            raise ValueError(f"Adding {len(team_ids)} teams would exceed max_teams limit of {competition.max_teams}")
-        
-        added_teams = []
-        for i, team_id in enumerate(team_ids, start=existing_count + 1):
-            # Skip if team already in competition
-            existing = CompetitionTeam.query.filter_by(
-                competition_id=competition_id,
-                team_id=team_id
-            ).first()
-            if existing:
-                continue
-            
-            comp_team = CompetitionTeam(
-                competition_id=competition_id,
-                team_id=team_id,
-                manually_added=False,
-                seeded_position=i
-            )
-            db.session.add(comp_team)
-            added_teams.append(comp_team)
-        
-        db.session.commit()
-        return added_teams
+        """Auto-qualify teams to a competition; see enroll_teams"""
+        return CompetitionService.enroll_teams(competition_id, team_ids, manually_added=False)
 
     @staticmethod
     def add_teams_manual(competition_id, team_ids):
-        """Manually add teams to a competition (override)"""
+        """Manually add teams to a competition (override); see enroll_teams"""
+        return CompetitionService.enroll_teams(competition_id, team_ids, manually_added=True)
+
+    @staticmethod
+    def enroll_teams(competition_id, team_ids, manually_added=False):
+        """
+        Enroll many teams at once with a fixed number of queries, whatever the
+        number of teams: one IN query validates the ids, one finds existing
+        memberships, and one INSERT ... ON CONFLICT DO NOTHING adds the rest.
+        New teams are seeded after the existing ones, in the order given.
+        
+        Returns {'added_count', 'teams', 'results'}: the added memberships and
+        one result per requested id, with status added, already_enrolled,
+        duplicate, not_found or invalid.
+        """
         competition = Competition.query.get(competition_id)
         if not competition:
             raise ValueError(f"Competition {competition_id} not found")
         
-        # Check max_teams constraint
-        existing_count = CompetitionTeam.query.filter_by(competition_id=competition_id).count()
-        if competition.max_teams and (existing_count + len(team_ids)) > competition.max_teams:
-            raise ValueError(f"Adding {len(team_ids)} teams would exceed max_teams limit of {competition.max_teams}")
-        
-        added_teams = []
-        for i, team_id in enumerate(team_ids, start=existing_count + 1):
-            # Skip if team already in competition
-            existing = CompetitionTeam.query.filter_by(
-                competition_id=competition_id,
-                team_id=team_id
-            ).first()
-            if existing:
+        results = []
+        candidates = {}  # team_id -> its result, first occurrence only
+        for raw_id in team_ids:
+            try:
+                team_id = raw_id if isinstance(raw_id, uuid.UUID) else uuid.UUID(str(raw_id))
+            except ValueError:
+                results.append({'team_id': str(raw_id), 'status': 'invalid'})
                 continue
-            
-            comp_team = CompetitionTeam(
-                competition_id=competition_id,
-                team_id=team_id,
-                manually_added=True,
-                seeded_position=i
-            )
-            db.session.add(comp_team)
-            added_teams.append(comp_team)
+            result = {'team_id': str(team_id), 'status': 'duplicate' if team_id in candidates else None}
+            candidates.setdefault(team_id, result)
+            results.append(result)
+        
+        known = {
+            team_id for (team_id,) in
+            db.session.query(Team.id).filter(Team.id.in_(list(candidates))).all()
+        } if candidates else set()
+        
+        enrolled = {
+            team_id: position for team_id, position in
+            db.session.query(CompetitionTeam.team_id, CompetitionTeam.seeded_position).filter(
+                CompetitionTeam.competition_id == competition_id,
+                CompetitionTeam.team_id.in_(list(known))
+            ).all()
+        } if known else {}
+        
+        new_ids = []
+        for team_id, result in candidates.items():
+            if team_id not in known:
+                result['status'] = 'not_found'
+            elif team_id in enrolled:
+                result.update(status='already_enrolled', seeded_position=enrolled[team_id])
+            else:
+                new_ids.append(team_id)
+        
+        existing_count, last_position = db.session.query(
+            func.count(CompetitionTeam.id), func.max(CompetitionTeam.seeded_position)
+        ).filter(CompetitionTeam.competition_id == competition_id).one()
+        
+        if competition.max_teams and existing_count + len(new_ids) > competition.max_teams:
+            raise ValueError(f"Adding {len(new_ids)} teams would exceed max_teams limit of {competition.max_teams}")
+        
+        inserted = {}
+        if new_ids:
+            first_position = max(existing_count, last_position or 0) + 1
+            statement = dialect_insert(CompetitionTeam).values([
+                {
+                    'id': uuid.uuid4(),
+                    'competition_id': competition_id,
+                    'team_id': team_id,
+                    'manually_added': manually_added,
+                    'seeded_position': position,
+                }
+                for position, team_id in enumerate(new_ids, start=first_position)
+            ]).on_conflict_do_nothing(
+                index_elements=['competition_id', 'team_id']
+            ).returning(CompetitionTeam.id, CompetitionTeam.team_id, CompetitionTeam.seeded_position)
+            inserted = {row.team_id: row for row in db.session.execute(statement)}
+        
+        for team_id in new_ids:
+            row = inserted.get(team_id)
+            if row is None:
+                # Enrolled concurrently between our check and the insert
+                candidates[team_id]['status'] = 'already_enrolled'
+            else:
+                candidates[team_id].update(
+                    status='added', competition_team_id=str(row.id), seeded_position=row.seeded_position
+                )
         
         db.session.commit()
-        return added_teams
+        return {
+            'added_count': len(inserted),
+            'teams': [
+                {'id': str(row.id), 'team_id': str(row.team_id), 'manually_added': manually_added}
+                for row in inserted.values()
+            ],
+            'results': results,
+        }
 
     @staticmethod
     def get_competition_standings(competition_id):
@@ -110,84 +151,160 @@ class CompetitionService:
         if not competition:
             raise ValueError(f"Competition {competition_id} not found")
         
-        # Get all teams in competition
-        comp_teams = CompetitionTeam.query.filter_by(competition_id=competition_id).all()
-        
-        standings = []
-        for comp_team in comp_teams:
-            team = Team.query.get(comp_team.team_id)
-            
-            # Get all matches for this team in this competition
-            matches = Match.query.filter(
-                Match.competition_id == competition_id,
-                db.or_(
-                    Match.home_team_id == comp_team.team_id,
-                    Match.away_team_id == comp_team.team_id
-                )
-            ).all()
-            
-            # Calculate stats
-            points = 0
-            played = 0
-            wins = 0
-            draws = 0
-            losses = 0
-            goals_for = 0
-            goals_against = 0
-            
-            for match in matches:
-                # Only count completed matches
-                if match.status.value not in ['finished']:
-                    continue
-                
-                played += 1
-                
-                if match.home_team_id == comp_team.team_id:
-                    goals_for += match.home_score
-                    goals_against += match.away_score
-                    
-                    if match.home_score > match.away_score:
-                        wins += 1
-                        points += competition.points_win
-                    elif match.home_score == match.away_score:
-                        draws += 1
-                        points += competition.points_draw
-                    else:
-                        losses += 1
-                        points += competition.points_loss
-                else:
-                    goals_for += match.away_score
-                    goals_against += match.home_score
-                    
-                    if match.away_score > match.home_score:
-                        wins += 1
-                        points += competition.points_win
-                    elif match.away_score == match.home_score:
-                        draws += 1
-                        points += competition.points_draw
-                    else:
-                        losses += 1
-                        points += competition.points_loss
-            
-            standing = {
-                'team_id': str(comp_team.team_id),
-                'team_name': team.name if team else 'Unknown',
-                'played': played,
-                'wins': wins,
-                'draws': draws,
-                'losses': losses,
-                'points': points,
-                'goals_for': goals_for,
-                'goals_against': goals_against,
-                'goal_difference': goals_for - goals_against,
-                'seeded_position': comp_team.seeded_position,
-            }
-            standings.append(standing)
-        
-        # Sort by: points DESC, goal_difference DESC, goals_for DESC
-        standings.sort(key=lambda x: (-x['points'], -x['goal_difference'], -x['goals_for']))
+        rows = CompetitionService._standings_query([competition_id]).all()
+        standings = [CompetitionService._standing_to_dict(row) for row in rows]
+        return CompetitionService._apply_tiebreakers(competition, standings)
+
+    @staticmethod
+    def _apply_tiebreakers(competition, standings, matches=None, fair_play=None):
+        """
+        Rank serialized standings with the competition's tiebreaker order.
+        Match results and cards are only loaded if a tie reaches those criteria.
+        """
+        return TiebreakerService.rank(
+            standings,
+            order=competition.tiebreaker_order,
+            matches=matches or (lambda: TiebreakerService.finished_results(competition.id)),
+            fair_play=fair_play or (lambda: TiebreakerService.fair_play_points(competition.id)),
+            points=(competition.points_win, competition.points_draw, competition.points_loss),
+        )
+
+    @staticmethod
+    def _standings_query(competition_ids, source=None):
+        """
+        Build the standings table for the given competitions in one grouped query.
+        `source` holds results per (competition, group, team); it defaults to the
+        persisted competition_standings read model. Every CompetitionTeam gets a
+        row (teams without results show zeros) and each competition's own
+        points_win/draw/loss are applied in SQL.
+        """
+        if source is None:
+            source = CompetitionStanding.__table__
+        
+        columns, points, goal_difference, goals_for = CompetitionService._result_columns(source)
+        
+        return (
+            db.session.query(
+                CompetitionTeam.competition_id,
+                CompetitionTeam.team_id,
+                Team.name.label('team_name'),
+                CompetitionTeam.seeded_position,
+                CompetitionTeam.group_id,
+                *columns
+            )
+            .join(Competition, Competition.id == CompetitionTeam.competition_id)
+            .outerjoin(Team, Team.id == CompetitionTeam.team_id)
+            .outerjoin(source, db.and_(
+                source.c.competition_id == CompetitionTeam.competition_id,
+                source.c.team_id == CompetitionTeam.team_id
+            ))
+            .filter(CompetitionTeam.competition_id.in_(competition_ids))
+            .group_by(CompetitionTeam.id, Team.name, Competition.id)
+            # Sort by: points DESC, goal_difference DESC, goals_for DESC
+            .order_by(
+                CompetitionTeam.competition_id,
+                points.desc(),
+                goal_difference.desc(),
+                goals_for.desc()
+            )
+        )
+
+    @staticmethod
+    def _group_standings_query(competition_id, group_id=None):
+        """
+        Every group's table in one grouped query. Only results earned in the
+        team's own group (Match.group_id) count; groups without teams yield a
+        single row with a NULL team_id.
+        """
+        source = CompetitionStanding.__table__
+        columns, points, goal_difference, goals_for = CompetitionService._result_columns(source)
+        
+        query = (
+            db.session.query(
+                CompetitionGroup.id.label('group_id'),
+                CompetitionGroup.name.label('group_name'),
+                CompetitionGroup.group_order,
+                CompetitionTeam.team_id,
+                Team.name.label('team_name'),
+                CompetitionTeam.seeded_position,
+                *columns
+            )
+            .join(Competition, Competition.id == CompetitionGroup.competition_id)
+            .outerjoin(CompetitionTeam, db.and_(
+                CompetitionTeam.group_id == CompetitionGroup.id,
+                CompetitionTeam.competition_id == CompetitionGroup.competition_id
+            ))
+            .outerjoin(Team, Team.id == CompetitionTeam.team_id)
+            .outerjoin(source, db.and_(
+                source.c.competition_id == CompetitionGroup.competition_id,
+                source.c.group_id == CompetitionGroup.id,
+                source.c.team_id == CompetitionTeam.team_id
+            ))
+            .filter(CompetitionGroup.competition_id == competition_id)
+        )
         
-        return standings
+        if group_id:
+            query = query.filter(CompetitionGroup.id == group_id)
+        
+        return (
+            query
+            .group_by(CompetitionGroup.id, CompetitionTeam.id, Team.name, Competition.id)
+            .order_by(
+                CompetitionGroup.group_order,
+                CompetitionGroup.name,
+                points.desc(),
+                goal_difference.desc(),
+                goals_for.desc()
+            )
+        )
+
+    @staticmethod
+    def _result_columns(source):
+        """
+        Aggregated result columns over `source` with the competition's points
+        applied. Returns (labeled columns, points, goal_difference, goals_for).
+        """
+        played = func.coalesce(func.sum(source.c.played), 0)
+        wins = func.coalesce(func.sum(source.c.wins), 0)
+        draws = func.coalesce(func.sum(source.c.draws), 0)
+        losses = func.coalesce(func.sum(source.c.losses), 0)
+        goals_for = func.coalesce(func.sum(source.c.goals_for), 0)
+        goals_against = func.coalesce(func.sum(source.c.goals_against), 0)
+        points = (
+            wins * Competition.points_win
+            + draws * Competition.points_draw
+            + losses * Competition.points_loss
+        )
+        goal_difference = goals_for - goals_against
+        
+        columns = [
+            played.label('played'),
+            wins.label('wins'),
+            draws.label('draws'),
+            losses.label('losses'),
+            points.label('points'),
+            goals_for.label('goals_for'),
+            goals_against.label('goals_against'),
+            goal_difference.label('goal_difference'),
+        ]
+        return columns, points, goal_difference, goals_for
+
+    @staticmethod
+    def _standing_to_dict(row):
+        """Serialize an aggregated standings row"""
+        return {
+            'team_id': str(row.team_id),
+            'team_name': row.team_name or 'Unknown',
+            'played': int(row.played),
+            'wins': int(row.wins),
+            'draws': int(row.draws),
+            'losses': int(row.losses),
+            'points': int(row.points),
+            'goals_for': int(row.goals_for),
+            'goals_against': int(row.goals_against),
+            'goal_difference': int(row.goal_difference),
+            'seeded_position': row.seeded_position,
+        }
 
     @staticmethod
     def create_advancement_rule(from_competition_id, to_competition_id=None, 
@@ -219,9 +336,23 @@ class CompetitionService:
         if not rule:
             return []
         
-        standings = CompetitionService.get_competition_standings(from_competition_id)
         eligible_teams = []
         
+        if rule.rule_type == 'group_winners':
+            # Return winners from each group (for group_knockout format)
+            for group in CompetitionService.get_all_group_standings(from_competition_id):
+                if group['standings']:
+                    winner = group['standings'][0]
+                    eligible_teams.append({
+                        'team_id': winner['team_id'],
+                        'team_name': winner['team_name'],
+                        'group': group['group_name'],
+                        'points': winner['points'],
+                    })
+            return eligible_teams
+        
+        standings = CompetitionService.get_competition_standings(from_competition_id)
+        
         if rule.rule_type == 'top_positions':
             # Return top N teams by standings
             count = rule.advancement_positions or len(standings)
@@ -233,25 +364,6 @@ class CompetitionService:
                     'points': standing['points'],
                 })
         
-        elif rule.rule_type == 'group_winners':
-            # Return winners from each group (for group_knockout format)
-            groups = CompetitionGroup.query.filter_by(competition_id=from_competition_id).all()
-            for group in groups:
-                group_standings = [s for s in standings if CompetitionTeam.query.filter_by(
-                    competition_id=from_competition_id,
-                    team_id=s['team_id'],
-                    group_id=group.id
-                ).first()]
-                
-                if group_standings:
-                    winner = group_standings[0]
-                    eligible_teams.append({
-                        'team_id': winner['team_id'],
-                        'team_name': winner['team_name'],
-                        'group': group.name,
-                        'points': winner['points'],
-                    })
-        
         elif rule.rule_type == 'knockout_winner':
             # Only knockout winner
             if standings:
@@ -283,22 +395,74 @@ class CompetitionService:
     @staticmethod
     def get_competitions_by_season(season_id, stage_level=None):
         """Get all competitions for a season, optionally filtered by stage"""
-        query = Competition.query.filter_by(season_id=season_id)
+        return [
+            {
+                **comp.to_dict(number_of_teams=team_count),
+                'team_count': team_count,
+            }
+            for comp, team_count in CompetitionService._season_competitions(season_id, stage_level)
+        ]
+
+    @staticmethod
+    def _season_competitions(season_id, stage_level=None):
+        """(Competition, team_count) pairs for a season in a single query"""
+        team_counts = (
+            db.session.query(
+                CompetitionTeam.competition_id,
+                func.count(CompetitionTeam.id).label('team_count')
+            )
+            .group_by(CompetitionTeam.competition_id)
+            .subquery()
+        )
+        query = (
+            db.session.query(Competition, func.coalesce(team_counts.c.team_count, 0))
+            .outerjoin(team_counts, team_counts.c.competition_id == Competition.id)
+            .filter(Competition.season_id == season_id)
+        )
         
         if stage_level:
-            query = query.filter_by(stage_level=stage_level)
+            query = query.filter(Competition.stage_level == stage_level)
         
-        competitions = query.all()
+        return [(comp, int(team_count)) for comp, team_count in query.all()]
+
+    @staticmethod
+    def iter_season_standings(season_id, stage_level=None):
+        """
+        Yield (competition dict, standings) for every competition of a season.
+        All tables come from one grouped aggregate over the read model, with
+        each competition's points system applied in SQL; head-to-head results
+        and fair play totals are loaded for all competitions at once, and only
+        if a tie needs them.
+        """
+        competitions = CompetitionService._season_competitions(season_id, stage_level)
+        if not competitions:
+            return
+        
+        by_id = {comp.id: (comp, team_count) for comp, team_count in competitions}
+        competition_ids = list(by_id)
+        results = _BatchLoader(lambda: TiebreakerService.finished_results_by_competition(competition_ids))
+        fair_play = _BatchLoader(lambda: TiebreakerService.fair_play_points_by_competition(competition_ids))
+        
+        rows = (
+            CompetitionService._standings_query(competition_ids)
+            .yield_per(1000)
+        )
         
-        result = []
-        for comp in competitions:
-            team_count = CompetitionTeam.query.filter_by(competition_id=comp.id).count()
-            result.append({
-                **comp.to_dict(),
-                'team_count': team_count,
-            })
+        for competition_id, comp_rows in groupby(rows, key=lambda row: row.competition_id):
+            comp, team_count = by_id.pop(competition_id)
+            standings = [CompetitionService._standing_to_dict(row) for row in comp_rows]
+            yield (
+                comp.to_dict(number_of_teams=team_count),
+                CompetitionService._apply_tiebreakers(
+                    comp, standings,
+                    matches=lambda comp_id=comp.id: results.get(comp_id),
+                    fair_play=lambda comp_id=comp.id: fair_play.get(comp_id, {}),
+                ),
+            )
         
-        return result
+        # Competitions without teams
+        for comp, team_count in by_id.values():
+            yield comp.to_dict(number_of_teams=team_count), []
 
     # ==========================================
     # GROUP MANAGEMENT METHODS
@@ -354,27 +518,43 @@ class CompetitionService:
     @staticmethod
     def get_group_standings(competition_id, group_id):
         """Get standings for a specific group"""
+        groups = CompetitionService.get_all_group_standings(competition_id, group_id=group_id)
+        return groups[0]['standings'] if groups else []
+
+    @staticmethod
+    def get_all_group_standings(competition_id, group_id=None):
+        """
+        Tables for every group of a competition from a single query, in group
+        order. Each group is ranked with the competition's tiebreakers.
+        """
         competition = Competition.query.get(competition_id)
         if not competition:
             raise ValueError(f"Competition {competition_id} not found")
         
-        # Get teams in this group
-        comp_teams = CompetitionTeam.query.filter_by(
-            competition_id=competition_id,
-            group_id=group_id
-        ).all()
-        
-        if not comp_teams:
-            return []
-        
-        # Get standings for these teams
-        all_standings = CompetitionService.get_competition_standings(competition_id)
-        
-        # Filter for teams in this group
-        group_team_ids = {str(ct.team_id) for ct in comp_teams}
-        group_standings = [s for s in all_standings if s['team_id'] in group_team_ids]
+        rows = CompetitionService._group_standings_query(competition_id, group_id).all()
+        # Shared by every group, so each is loaded at most once
+        results = _BatchLoader(lambda: {competition.id: TiebreakerService.finished_results(competition.id)})
+        fair_play = _BatchLoader(lambda: {competition.id: TiebreakerService.fair_play_points(competition.id)})
+        
+        groups = []
+        for group_key, group_rows in groupby(rows, key=lambda row: row.group_id):
+            group_rows = list(group_rows)
+            standings = [
+                CompetitionService._standing_to_dict(row)
+                for row in group_rows if row.team_id is not None
+            ]
+            groups.append({
+                'group_id': str(group_key),
+                'group_name': group_rows[0].group_name,
+                'group_order': group_rows[0].group_order,
+                'standings': CompetitionService._apply_tiebreakers(
+                    competition, standings,
+                    matches=lambda: results.get(competition.id),
+                    fair_play=lambda: fair_play.get(competition.id, {}),
+                ),
+            })
         
-        return group_standings
+        return groups
 
     @staticmethod
     def get_competition_groups(competition_id):
@@ -392,3 +572,16 @@ class CompetitionService:
             })
         
         return result
+
+
+class _BatchLoader:
+    """Calls `load` (returning {key: value}) once, on the first get()"""
+
+    def __init__(self, load):
+        self._load = load
+        self._values = None
+
+    def get(self, key, default=()):
+        if self._values is None:
+            self._values = self._load()
+        return self._values.get(key, default)
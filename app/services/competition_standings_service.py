@@ -0,0 +1,306 @@
+"""
+Competition standings read model.
+
+`competition_standings` holds one row per (competition, group, team) with the
+raw results earned there. Writers that change a finished result apply a delta
+inside their own transaction; reads are a single indexed SELECT.
+Run `flask rebuild-standings` to recompute it from `matches` and report drift.
+"""
+import uuid
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, case, select, union_all, insert
+
+from app.extensions.db import db, dialect_insert
+from app.models import Match, CompetitionStanding
+from app.models.enums import MatchStatus
+
+
+RESULT_COLUMNS = ('played', 'wins', 'draws', 'losses', 'goals_for', 'goals_against')
+
+
+class CompetitionStandingsService:
+    """Maintains and rebuilds the persisted competition standings"""
+
+    # ---------------------------------------------------------
+    # Incremental maintenance
+    # ---------------------------------------------------------
+
+    @staticmethod
+    def result_of(match):
+        """
+        The part of a match that contributes to standings, or None if it
+        doesn't count (not finished or not part of a competition).
+        Capture it before editing a match so the old result can be reverted.
+        """
+        if not match.competition_id or match.status != MatchStatus.finished:
+            return None
+        return (
+            match.competition_id,
+            match.group_id,
+            match.home_team_id,
+            match.away_team_id,
+            match.home_score or 0,
+            match.away_score or 0,
+        )
+
+    @staticmethod
+    def apply_match(match, sign=1):
+        """Add (sign=1) or remove (sign=-1) a match's result. Does not commit."""
+        CompetitionStandingsService.apply_result(
+            CompetitionStandingsService.result_of(match), sign
+        )
+
+    @staticmethod
+    def replace_result(previous, current):
+        """Swap an old result for a new one after a match was edited. Does not commit."""
+        if previous == current:
+            return
+        CompetitionStandingsService.apply_result(previous, -1)
+        CompetitionStandingsService.apply_result(current, 1)
+
+    @staticmethod
+    def apply_result(result, sign=1):
+        """Apply a result tuple from result_of() as an in-place delta"""
+        for key, delta in CompetitionStandingsService._result_deltas(result, sign):
+            CompetitionStandingsService._apply_delta(*key, delta)
+
+    @staticmethod
+    def apply_results(changes):
+        """
+        Apply many (previous, current) result pairs at once, summing them
+        first so each standings row gets a single update. Does not commit.
+        """
+        totals = {}
+        for previous, current in changes:
+            if previous == current:
+                continue
+            for result, sign in ((previous, -1), (current, 1)):
+                for key, delta in CompetitionStandingsService._result_deltas(result, sign):
+                    total = totals.setdefault(key, dict.fromkeys(RESULT_COLUMNS, 0))
+                    for col, value in delta.items():
+                        total[col] += value
+
+        for key, delta in totals.items():
+            if any(delta.values()):
+                CompetitionStandingsService._apply_delta(*key, delta)
+
+    @staticmethod
+    def _result_deltas(result, sign=1):
+        """((competition_id, group_id, team_id), delta) for both teams of a result tuple"""
+        if result is None:
+            return []
+
+        competition_id, group_id, home_id, away_id, home_score, away_score = result
+
+        deltas = []
+        for team_id, scored, conceded in (
+            (home_id, home_score, away_score),
+            (away_id, away_score, home_score),
+        ):
+            delta = {
+                'played': 1,
+                'wins': 1 if scored > conceded else 0,
+                'draws': 1 if scored == conceded else 0,
+                'losses': 1 if scored < conceded else 0,
+                'goals_for': scored,
+                'goals_against': conceded,
+            }
+            deltas.append((
+                (competition_id, group_id, team_id),
+                {col: value * sign for col, value in delta.items()}
+            ))
+        return deltas
+
+    @staticmethod
+    def _apply_delta(competition_id, group_id, team_id, delta):
+        """
+        Atomic `col = col + delta`. Adding a result is a single
+        INSERT ... ON CONFLICT DO UPDATE, so concurrent first results for a
+        team can't both create its row.
+        """
+        if delta['played'] > 0:
+            statement = dialect_insert(CompetitionStanding).values(
+                id=uuid.uuid4(),
+                competition_id=competition_id,
+                group_id=group_id,
+                team_id=team_id,
+                **delta
+            )
+            table = CompetitionStanding.__table__
+            db.session.execute(statement.on_conflict_do_update(
+                index_elements=['competition_id', 'group_id', 'team_id'],
+                set_={
+                    **{col: table.c[col] + statement.excluded[col] for col in delta},
+                    'updated_at': func.now(),
+                }
+            ))
+            return
+
+        # Removing a result that was never recorded means the table has drifted;
+        # leave it for rebuild() rather than writing negative rows.
+        CompetitionStanding.query.filter(
+            CompetitionStanding.competition_id == competition_id,
+            CompetitionStanding.team_id == team_id,
+            CompetitionStanding.group_id == group_id if group_id else CompetitionStanding.group_id.is_(None),
+        ).update(
+            {getattr(CompetitionStanding, col): getattr(CompetitionStanding, col) + value
+             for col, value in delta.items()},
+            synchronize_session=False
+        )
+
+    # ---------------------------------------------------------
+    # Computation from matches
+    # ---------------------------------------------------------
+
+    @staticmethod
+    def match_legs(competition_ids=None, scope=None):
+        """
+        Finished matches flattened to one row per team per match.
+        Home and away legs are unioned so a single GROUP BY can build a table.
+        `scope` is a match filter used instead of competition_ids (e.g. a
+        tournament's matches).
+        """
+        finished = Match.status == MatchStatus.finished
+        if scope is not None:
+            finished = db.and_(finished, scope)
+        elif competition_ids is not None:
+            finished = db.and_(finished, Match.competition_id.in_(competition_ids))
+        else:
+            finished = db.and_(finished, Match.competition_id.isnot(None))
+
+        home_legs = select(
+            Match.competition_id.label('competition_id'),
+            Match.group_id.label('group_id'),
+            Match.home_team_id.label('team_id'),
+            func.coalesce(Match.home_score, 0).label('scored'),
+            func.coalesce(Match.away_score, 0).label('conceded'),
+        ).where(finished)
+        away_legs = select(
+            Match.competition_id,
+            Match.group_id,
+            Match.away_team_id,
+            func.coalesce(Match.away_score, 0),
+            func.coalesce(Match.home_score, 0),
+        ).where(finished)
+        return union_all(home_legs, away_legs).subquery('legs')
+
+    @staticmethod
+    def computed_results(competition_ids=None, scope=None):
+        """
+        Results per (competition, group, team) aggregated straight from matches,
+        with the same columns as the competition_standings table.
+        """
+        legs = CompetitionStandingsService.match_legs(competition_ids, scope)
+
+        return select(
+            legs.c.competition_id,
+            legs.c.group_id,
+            legs.c.team_id,
+            func.count().label('played'),
+            func.sum(case((legs.c.scored > legs.c.conceded, 1), else_=0)).label('wins'),
+            func.sum(case((legs.c.scored == legs.c.conceded, 1), else_=0)).label('draws'),
+            func.sum(case((legs.c.scored < legs.c.conceded, 1), else_=0)).label('losses'),
+            func.sum(legs.c.scored).label('goals_for'),
+            func.sum(legs.c.conceded).label('goals_against'),
+        ).group_by(
+            legs.c.competition_id, legs.c.group_id, legs.c.team_id
+        ).subquery('computed_results')
+
+    # ---------------------------------------------------------
+    # Rebuild
+    # ---------------------------------------------------------
+
+    @staticmethod
+    def rebuild(competition_id=None, dry_run=False):
+        """
+        Recompute the read model from matches and report rows that had drifted.
+        Replaces the stored rows for the scope unless dry_run is set. Does not commit.
+        """
+        competition_ids = [competition_id] if competition_id else None
+        computed = CompetitionStandingsService.computed_results(competition_ids)
+
+        expected = {
+            (row.competition_id, row.group_id, row.team_id): tuple(int(getattr(row, c)) for c in RESULT_COLUMNS)
+            for row in db.session.execute(select(computed))
+        }
+
+        stored_query = CompetitionStanding.query
+        if competition_id:
+            stored_query = stored_query.filter(CompetitionStanding.competition_id == competition_id)
+        stored = {
+            (row.competition_id, row.group_id, row.team_id): tuple(getattr(row, c) for c in RESULT_COLUMNS)
+            for row in stored_query.all()
+        }
+
+        drift = []
+        for key in expected.keys() | stored.keys():
+            # Stored zero rows are equivalent to a missing row
+            want = expected.get(key, (0,) * len(RESULT_COLUMNS))
+            have = stored.get(key, (0,) * len(RESULT_COLUMNS))
+            if want != have:
+                comp_id, group_id, team_id = key
+                drift.append({
+                    'competition_id': str(comp_id),
+                    'group_id': str(group_id) if group_id else None,
+                    'team_id': str(team_id),
+                    'expected': dict(zip(RESULT_COLUMNS, want)),
+                    'stored': dict(zip(RESULT_COLUMNS, have)),
+                })
+
+        if not dry_run:
+            stored_query.delete(synchronize_session=False)
+            if expected:
+                db.session.execute(insert(CompetitionStanding), [
+                    {
+                        'competition_id': comp_id,
+                        'group_id': group_id,
+                        'team_id': team_id,
+                        **dict(zip(RESULT_COLUMNS, values)),
+                    }
+                    for (comp_id, group_id, team_id), values in expected.items()
+                ])
+
+        return {
+            'rows': len(expected),
+            'drift': drift,
+        }
+
+
+@click.command('rebuild-standings')
+@click.option('--competition-id', default=None, help='Only rebuild this competition')
+@click.option('--dry-run', is_flag=True, help='Report drift without rewriting the table')
+@with_appcontext
+def rebuild_standings(competition_id, dry_run):
+    """Rebuild competition_standings from matches and report drift"""
+    import uuid
+
+    try:
+        report = CompetitionStandingsService.rebuild(
+            uuid.UUID(competition_id) if competition_id else None,
+            dry_run=dry_run
+        )
+
+        for row in report['drift']:
+            click.echo(
+                f"[!] Drift competition={row['competition_id']} group={row['group_id']} "
+                f"team={row['team_id']}: stored={row['stored']} expected={row['expected']}"
+            )
+
+        if dry_run:
+            db.session.rollback()
+            click.echo(f"[OK] Dry run: {report['rows']} rows computed, {len(report['drift'])} drifted")
+        else:
+            db.session.commit()
+            click.echo(f"[OK] Rebuilt {report['rows']} rows, {len(report['drift'])} had drifted")
+
+    except Exception as e:
+        db.session.rollback()
+        click.echo(f"[ERROR] Failed to rebuild standings: {str(e)}")
+        raise
+
+
+def register_rebuild_standings_command(app):
+    """Register the rebuild-standings command with the Flask app"""
+    app.cli.add_command(rebuild_standings)
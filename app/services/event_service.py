@@ -2,6 +2,7 @@ from app.extensions import db
 from app.models.match_event import MatchEvent
 from app.models.match import MatchStatus
 from app.services.match_service import compute_score
+from app.services.cache_service import invalidate_competition
 
 
 def log_event(match, data):
@@ -25,7 +26,6 @@ def log_event(match, data):
     match.home_score = home
     match.away_score = away
 
-    match.current_minute = data["minute"]
-
     db.session.commit()
+    invalidate_competition(match.competition_id)
     return event
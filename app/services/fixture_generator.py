@@ -0,0 +1,91 @@
+"""
+Round-robin fixture generation shared by the competition and tournament schedulers.
+
+Matchdays follow the Berger/circle method: one team (or the bye) stays fixed
+while the rest rotate, so every team plays once per matchday. Home and away
+alternate with the pairing's position and the fixed team's round, which keeps
+each team's home count within one of its away count with the fewest possible
+consecutive home/away runs. Later legs replay the first with venues swapped.
+"""
+from datetime import timedelta
+
+from sqlalchemy import insert
+
+from app.extensions.db import db
+from app.models.match import Match
+from app.models.enums import MatchStatus
+
+
+def berger_rounds(team_ids):
+    """
+    Single round robin as a list of matchdays, each a list of (home, away).
+    With an odd number of teams one team sits out each matchday.
+    """
+    teams = list(team_ids)
+    if len(teams) < 2:
+        return []
+    if len(teams) % 2:
+        # The bye takes the fixed slot, so it never disturbs home/away alternation
+        teams.insert(0, None)
+
+    n = len(teams)
+    rounds = []
+    for r in range(n - 1):
+        pairs = []
+        for i in range(n // 2):
+            home, away = teams[i], teams[n - 1 - i]
+            if home is None or away is None:
+                continue
+            if (r % 2 == 1) if i == 0 else (i % 2 == 1):
+                home, away = away, home
+            pairs.append((home, away))
+        rounds.append(pairs)
+
+        # Rotate everyone except the fixed first slot
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+
+    return rounds
+
+
+def round_robin_matchdays(team_ids, legs=1):
+    """All matchdays for `legs` legs; even legs mirror the first one's venues"""
+    first_leg = berger_rounds(team_ids)
+    matchdays = []
+    for leg in range(legs):
+        for pairs in first_leg:
+            matchdays.append([(away, home) for home, away in pairs] if leg % 2 else list(pairs))
+    return matchdays
+
+
+def matchday_rows(matchdays, start_date, interval_days=7, **fields):
+    """
+    Match rows for bulk insertion, one date per matchday.
+    `fields` are copied onto every row (competition_id, group_id, venue, ...).
+    """
+    rows = []
+    for index, pairs in enumerate(matchdays):
+        match_date = start_date + timedelta(days=index * interval_days)
+        for home_id, away_id in pairs:
+            rows.append(fixture_row(home_id, away_id, match_date, **fields))
+    return rows
+
+
+def fixture_row(home_id, away_id, match_date, **fields):
+    """A scheduled match as a plain dict for insert_fixtures()"""
+    return {
+        'home_team_id': home_id,
+        'away_team_id': away_id,
+        'match_date': match_date,
+        'status': MatchStatus.scheduled,
+        'home_score': 0,
+        'away_score': 0,
+        'current_minute': 0,
+        **fields,
+    }
+
+
+def insert_fixtures(rows):
+    """Insert fixture rows in one bulk INSERT and return the created matches. Does not commit."""
+    if not rows:
+        return []
+    return db.session.scalars(insert(Match).returning(Match), rows).all()
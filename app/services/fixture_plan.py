@@ -0,0 +1,146 @@
+"""
+Fixture plans: what the generators would create, as plain tuples.
+
+A plan is built entirely in memory from team ids, without touching the
+database, so it can be previewed cheaply and written later in one go.
+Randomness (group draws, knockout draws) comes from a seeded RNG, so the
+same seed and teams always give the same plan: a preview can be committed
+by generating again with its seed.
+
+    groups:   (name, group_order, team_ids)
+    rounds:   (round_name, round_order, status)
+    fixtures: (home_id, away_id, day_offset, group_index, round_index, bracket_slot)
+
+group_index/round_index point into `groups`/`rounds` (None when unused);
+home_id/away_id are None on knockout placeholders.
+"""
+import hashlib
+from collections import namedtuple
+
+from app.services.bracket_templates import bracket_template, next_slot
+from app.services.fixture_generator import round_robin_matchdays
+from app.services.group_draw import group_sizes
+
+
+FixturePlan = namedtuple('FixturePlan', ['groups', 'rounds', 'fixtures'])
+
+
+def teams_fingerprint(team_ids):
+    """Short digest of a team list, to check a preview still matches the competition"""
+    digest = hashlib.sha1(','.join(sorted(str(t) for t in team_ids)).encode())
+    return digest.hexdigest()[:16]
+
+
+def round_robin_plan(team_ids, legs=1, days_between_matches=7):
+    """Every team plays every other team `legs` times, one matchday per interval"""
+    fixtures = [
+        (home_id, away_id, index * days_between_matches, None, None, None)
+        for index, pairs in enumerate(round_robin_matchdays(team_ids, legs=legs))
+        for home_id, away_id in pairs
+    ]
+    return FixturePlan(groups=[], rounds=[], fixtures=fixtures)
+
+
+def group_stage_plan(team_ids, num_groups, legs=1, days_between_matches=7, rng=None, draw=None):
+    """
+    Draw teams into `num_groups` groups and play a round robin in each, with
+    all groups sharing matchday dates. `draw` is a ready-made list of group
+    members (see group_draw); without it teams are shuffled with `rng` if
+    given and dealt in order, the remainder one each to the first groups.
+    """
+    teams = list(team_ids)
+    if rng is not None and draw is None:
+        rng.shuffle(teams)
+
+    teams_per_group = len(teams) // num_groups
+    if teams_per_group < 2:
+        raise ValueError(
+            f"Cannot divide {len(teams)} teams into {num_groups} groups with at least 2 teams each"
+        )
+
+    if draw is None:
+        draw = []
+        start = 0
+        for size in group_sizes(len(teams), num_groups):
+            draw.append(teams[start:start + size])
+            start += size
+
+    groups = []
+    fixtures = []
+    for group_index, members in enumerate(draw):
+        members = tuple(members)
+        groups.append((f"Group {chr(65 + group_index)}", group_index + 1, members))
+        for index, pairs in enumerate(round_robin_matchdays(members, legs=legs)):
+            for home_id, away_id in pairs:
+                fixtures.append((home_id, away_id, index * days_between_matches, group_index, None, None))
+
+    return FixturePlan(groups=groups, rounds=[], fixtures=fixtures)
+
+
+def knockout_plan(seeded_team_ids, days_between_rounds=14):
+    """
+    The whole bracket for teams in seed order (best first): first-round ties,
+    byes already moved into the second round, and placeholders for the rest.
+    """
+    template = bracket_template(len(seeded_team_ids))
+
+    rounds = [
+        (name, index + 1, 'active' if index == 0 else 'pending')
+        for index, name in enumerate(template.round_names)
+    ]
+
+    # [home, away] per tie per round; None where the team is not known yet
+    ties = [[[None, None] for _ in range(count)] for count in template.matches_per_round]
+    for slot, (seed, opponent) in enumerate(template.first_round):
+        if opponent is None:
+            # Bye: the seed goes straight into its second-round tie
+            next_tie, home = next_slot(slot)
+            ties[1][next_tie][0 if home else 1] = seeded_team_ids[seed - 1]
+            ties[0][slot] = None
+        else:
+            ties[0][slot] = [seeded_team_ids[seed - 1], seeded_team_ids[opponent - 1]]
+
+    fixtures = [
+        (tie[0], tie[1], round_index * days_between_rounds, None, round_index, slot)
+        for round_index, round_ties in enumerate(ties)
+        for slot, tie in enumerate(round_ties)
+        if tie is not None
+    ]
+    return FixturePlan(groups=[], rounds=rounds, fixtures=fixtures)
+
+
+def plan_columns(plan, team_names, start_date):
+    """
+    Columnar JSON for a plan. Teams are listed once and fixtures refer to
+    them by index, which keeps previews of thousands of fixtures small.
+    """
+    team_ids = list(team_names)
+    team_index = {team_id: i for i, team_id in enumerate(team_ids)}
+
+    def index_of(team_id):
+        return team_index[team_id] if team_id is not None else None
+
+    fixtures = plan.fixtures
+    return {
+        'start_date': start_date.isoformat(),
+        'teams': {
+            'id': [str(t) for t in team_ids],
+            'name': [team_names[t] for t in team_ids],
+        },
+        'groups': {
+            'name': [g[0] for g in plan.groups],
+            'teams': [[index_of(t) for t in g[2]] for g in plan.groups],
+        },
+        'rounds': {
+            'name': [r[0] for r in plan.rounds],
+            'status': [r[2] for r in plan.rounds],
+        },
+        'fixtures': {
+            'home': [index_of(f[0]) for f in fixtures],
+            'away': [index_of(f[1]) for f in fixtures],
+            'day': [f[2] for f in fixtures],
+            'group': [f[3] for f in fixtures],
+            'round': [f[4] for f in fixtures],
+            'slot': [f[5] for f in fixtures],
+        },
+    }
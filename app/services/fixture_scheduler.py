@@ -0,0 +1,224 @@
+"""
+Constraint-aware fixture calendar.
+
+Takes matchdays from fixture_generator (or any ordered fixture list) and gives
+every fixture a date and venue that respects:
+
+- venue capacity: each venue has a number of match slots per week on given weekdays
+- blackout dates, globally or per venue
+- a minimum number of rest days between a team's matches
+- matches the teams already have in other competitions (no double booking)
+
+Solving is greedy-plus-repair. Matchdays are placed in order, each fixture on
+the earliest feasible slot in its matchday's week; fixtures that don't fit are
+repaired afterwards by searching forward for the earliest feasible slot.
+Team calendars are sorted lists probed with bisect, so each check is
+O(log n) and a national season of thousands of fixtures solves in seconds.
+"""
+import bisect
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from app.services.fixture_generator import fixture_row
+from app.services.team_calendar import TeamCalendar
+
+
+DEFAULT_KICKOFF = time(15, 0)
+
+# Hours between consecutive matches at the same venue on the same day
+SLOT_SPACING_HOURS = 2
+
+# How far past its target week a fixture may be pushed by the repair pass
+MAX_REPAIR_WEEKS = 52
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+class ScheduleConstraints:
+    """Constraints for FixtureScheduler, usually built from a request payload"""
+
+    def __init__(self, start_date, interval_days=7, venues=None, team_venues=None,
+                 blackout_dates=None, min_rest_days=2, match_weekdays=None, kickoff=DEFAULT_KICKOFF):
+        self.start_date = _parse_date(start_date)
+        self.interval_days = max(int(interval_days), 1)
+        self.min_rest_days = max(int(min_rest_days), 0)
+        self.kickoff = kickoff
+        self.blackout_dates = {_parse_date(d) for d in (blackout_dates or [])}
+        self.team_venues = {str(team): venue for team, venue in (team_venues or {}).items()}
+
+        # Without venues, any number of matches can be played on the match weekdays
+        default_weekdays = match_weekdays if match_weekdays else [self.start_date.weekday()]
+        self.venues = {}
+        for venue in venues or [{'name': None, 'weekly_capacity': None, 'weekdays': default_weekdays}]:
+            self.venues[venue.get('name')] = {
+                'weekly_capacity': venue.get('weekly_capacity'),
+                'daily_capacity': venue.get('daily_capacity'),
+                'weekdays': set(venue.get('weekdays') or default_weekdays),
+                'blackout_dates': {_parse_date(d) for d in venue.get('blackout_dates', [])},
+            }
+
+    @staticmethod
+    def from_dict(data):
+        """Build from a JSON body; raises ValueError on malformed input"""
+        if not data.get('start_date'):
+            raise ValueError("start_date is required")
+
+        kickoff = DEFAULT_KICKOFF
+        if data.get('kickoff_time'):
+            kickoff = time.fromisoformat(data['kickoff_time'])
+
+        for venue in data.get('venues') or []:
+            if not venue.get('name'):
+                raise ValueError("Every venue needs a name")
+            if any(not 0 <= int(d) <= 6 for d in venue.get('weekdays') or []):
+                raise ValueError("Venue weekdays must be 0 (Monday) to 6 (Sunday)")
+
+        return ScheduleConstraints(
+            start_date=data['start_date'],
+            interval_days=data.get('days_between_matchdays', 7),
+            venues=data.get('venues'),
+            team_venues=data.get('team_venues'),
+            blackout_dates=data.get('blackout_dates'),
+            min_rest_days=data.get('min_rest_days', 2),
+            match_weekdays=data.get('match_weekdays'),
+            kickoff=kickoff,
+        )
+
+
+class FixtureScheduler:
+    """Assigns dates and venues to matchdays under ScheduleConstraints"""
+
+    def __init__(self, constraints, busy=None):
+        """`busy` maps team_id -> dates the team already plays elsewhere"""
+        self.constraints = constraints
+        self._team_dates = defaultdict(list)
+        self._weekly_usage = defaultdict(int)
+        self._daily_usage = defaultdict(int)
+        self._venue_totals = defaultdict(int)
+
+        for team_id, dates in (busy or {}).items():
+            self._team_dates[str(team_id)] = sorted(dates)
+
+    @staticmethod
+    def busy_dates(team_ids, since):
+        """
+        Dates from `since` on which the teams already play, in any competition,
+        loaded in one query. Used to prevent double booking.
+        """
+        if not team_ids:
+            return {}
+
+        calendar = TeamCalendar.load(team_ids, start=_parse_date(since))
+        return {str(team_id): [d.date() for d in calendar.dates(team_id)] for team_id in team_ids}
+
+    def solve(self, matchdays):
+        """
+        Place every fixture. `matchdays` is a list of matchdays, each a list of
+        (home_team_id, away_team_id) or (home_team_id, away_team_id, extra_fields).
+
+        Returns {'rows': [...], 'unscheduled': [...], 'repaired': n}, where rows
+        are fixture_generator rows ready for insert_fixtures().
+        """
+        rows = []
+        pending = []
+
+        # Greedy pass: each matchday within its own week
+        for index, fixtures in enumerate(matchdays):
+            week_start = self.constraints.start_date + timedelta(days=index * self.constraints.interval_days)
+            week_end = week_start + timedelta(days=self.constraints.interval_days - 1)
+
+            for fixture in fixtures:
+                placed = self._place(fixture, week_start, week_end)
+                if placed:
+                    rows.append(placed)
+                else:
+                    pending.append((index, fixture, week_start))
+
+        # Repair pass: push the leftovers forward to the earliest feasible slot
+        unscheduled = []
+        repaired = 0
+        for index, fixture, week_start in pending:
+            placed = self._place(fixture, week_start, week_start + timedelta(weeks=MAX_REPAIR_WEEKS))
+            if placed:
+                rows.append(placed)
+                repaired += 1
+            else:
+                unscheduled.append({
+                    'matchday': index + 1,
+                    'home_team_id': str(fixture[0]),
+                    'away_team_id': str(fixture[1]),
+                })
+
+        rows.sort(key=lambda row: row['match_date'])
+        return {'rows': rows, 'unscheduled': unscheduled, 'repaired': repaired}
+
+    # ---------------------------------------------------------
+    # Internal helpers
+    # ---------------------------------------------------------
+
+    def _place(self, fixture, first_day, last_day):
+        home_id, away_id = fixture[0], fixture[1]
+        extra = fixture[2] if len(fixture) > 2 else {}
+
+        venues = self._venues_for(home_id)
+        day = first_day
+        while day <= last_day:
+            if day not in self.constraints.blackout_dates and self._rested(home_id, day) and self._rested(away_id, day):
+                for venue in venues:
+                    slot = self._take_slot(venue, day)
+                    if slot is not None:
+                        self._book(home_id, day)
+                        self._book(away_id, day)
+                        kickoff = datetime.combine(day, self.constraints.kickoff) + timedelta(
+                            hours=slot * SLOT_SPACING_HOURS
+                        )
+                        return fixture_row(home_id, away_id, kickoff, venue=venue, **extra)
+            day += timedelta(days=1)
+        return None
+
+    def _venues_for(self, home_id):
+        """The home team's venue if it has one, otherwise every venue, least used first"""
+        home_venue = self.constraints.team_venues.get(str(home_id))
+        if home_venue in self.constraints.venues:
+            return [home_venue]
+        return sorted(self.constraints.venues, key=lambda name: self._venue_totals[name])
+
+    def _take_slot(self, venue_name, day):
+        """Reserve a slot at a venue on a day; returns the slot's index that day or None"""
+        venue = self.constraints.venues[venue_name]
+        if day.weekday() not in venue['weekdays'] or day in venue['blackout_dates']:
+            return None
+
+        week = day.isocalendar()[:2]
+        if venue['weekly_capacity'] is not None and self._weekly_usage[(venue_name, week)] >= venue['weekly_capacity']:
+            return None
+        if venue['daily_capacity'] is not None and self._daily_usage[(venue_name, day)] >= venue['daily_capacity']:
+            return None
+
+        slot = self._daily_usage[(venue_name, day)]
+        self._weekly_usage[(venue_name, week)] += 1
+        self._daily_usage[(venue_name, day)] += 1
+        self._venue_totals[venue_name] += 1
+
+        # Venues without a capacity limit play everything at the same kickoff
+        if venue['weekly_capacity'] is None and venue['daily_capacity'] is None:
+            return 0
+        return slot
+
+    def _rested(self, team_id, day):
+        """True if at least min_rest_days full days separate `day` from the team's other matches"""
+        dates = self._team_dates.get(str(team_id))
+        if not dates:
+            return True
+        gap = self.constraints.min_rest_days
+        i = bisect.bisect_left(dates, day - timedelta(days=gap))
+        return i == len(dates) or dates[i] > day + timedelta(days=gap)
+
+    def _book(self, team_id, day):
+        bisect.insort(self._team_dates[str(team_id)], day)
@@ -0,0 +1,228 @@
+"""
+Geography-aware group draw.
+
+Splits teams into balanced groups so that the total travel between teams
+of the same group is as small as possible, while spreading every pot
+evenly over the groups (so seeded teams are kept apart as in a normal draw).
+
+Distances come from county centroids where both counties have coordinates,
+and otherwise from the county -> region hierarchy: same county, same
+region, or across the country. The draw starts from a geographic clustering
+(teams ordered by region, county and position, then dealt into groups) and
+improves it with steepest-descent swaps between groups. Swap gains for all
+pairs are evaluated at once as NumPy matrices, so a few hundred teams take
+a fraction of a second.
+"""
+import math
+from collections import namedtuple
+
+import numpy as np
+
+
+TeamLocation = namedtuple('TeamLocation', ['county_id', 'region_id', 'latitude', 'longitude'])
+
+UNKNOWN_LOCATION = TeamLocation(None, None, None, None)
+
+# Distances (km) used when coordinates are missing
+SAME_COUNTY_KM = 0.0
+SAME_REGION_KM = 150.0
+OTHER_REGION_KM = 400.0
+
+EARTH_RADIUS_KM = 6371.0
+
+MAX_SWAPS_PER_TEAM = 20
+
+
+def distance_matrix(locations):
+    """Pairwise travel distance between teams, in km"""
+    n = len(locations)
+    county = np.array([str(loc.county_id) if loc.county_id else f'?{i}' for i, loc in enumerate(locations)])
+    region = np.array([str(loc.region_id) if loc.region_id else f'?{i}' for i, loc in enumerate(locations)])
+
+    distances = np.full((n, n), OTHER_REGION_KM)
+    distances[region[:, None] == region[None, :]] = SAME_REGION_KM
+    distances[county[:, None] == county[None, :]] = SAME_COUNTY_KM
+
+    has_coordinates = np.array([loc.latitude is not None and loc.longitude is not None for loc in locations])
+    if has_coordinates.any():
+        lat = np.radians([loc.latitude or 0.0 for loc in locations])
+        lon = np.radians([loc.longitude or 0.0 for loc in locations])
+        # Haversine
+        a = (np.sin((lat[:, None] - lat[None, :]) / 2) ** 2
+             + np.cos(lat[:, None]) * np.cos(lat[None, :]) * np.sin((lon[:, None] - lon[None, :]) / 2) ** 2)
+        great_circle = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+        both = has_coordinates[:, None] & has_coordinates[None, :]
+        distances = np.where(both, great_circle, distances)
+
+    np.fill_diagonal(distances, 0.0)
+    return distances
+
+
+def group_sizes(num_teams, num_groups):
+    """Balanced sizes; teams that don't divide evenly go one each to the first groups"""
+    base, extra = divmod(num_teams, num_groups)
+    return [base + (1 if g < extra else 0) for g in range(num_groups)]
+
+
+def travel_cost(groups, distances):
+    """Total distance over all pairs of teams sharing a group"""
+    return float(sum(distances[np.ix_(members, members)].sum() / 2 for members in groups))
+
+
+def draw_groups(team_ids, locations, num_groups, pots=None):
+    """
+    Draw `team_ids` into `num_groups` balanced groups minimising intra-group
+    travel. `locations` is a TeamLocation per team. `pots` maps team id to a
+    pot; every group gets an even share of each pot, between the floor and
+    the ceiling of pot size / num_groups (teams without a pot are
+    unconstrained).
+
+    Returns (groups, stats): groups as lists of team ids, stats with the
+    travel of the result and of a plain geographic-blind deal.
+    """
+    n = len(team_ids)
+    sizes = group_sizes(n, num_groups)
+    distances = distance_matrix(locations)
+
+    pot_keys = sorted({pots.get(t) for t in team_ids if pots.get(t) is not None}, key=str) if pots else []
+    pot_index = {key: i for i, key in enumerate(pot_keys)}
+    pot = np.array([pot_index.get(pots.get(t), len(pot_keys)) if pots else 0 for t in team_ids])
+    pot_size = np.bincount(pot, minlength=len(pot_keys) + 1)
+    cap = np.array([math.ceil(size / num_groups) for size in pot_size[:len(pot_keys)]] + [n])
+    floor = np.array([size // num_groups for size in pot_size[:len(pot_keys)]] + [0])
+
+    assignment = _initial_assignment(locations, sizes, pot, floor, cap, distances)
+    baseline = travel_cost(_members(np.repeat(np.arange(num_groups), sizes), num_groups), distances)
+    assignment, swaps = _improve(assignment, distances, pot, floor, cap, num_groups)
+
+    members = _members(assignment, num_groups)
+    groups = [[team_ids[i] for i in group] for group in members]
+    return groups, {
+        'travel_km': round(travel_cost(members, distances), 1),
+        'unoptimized_travel_km': round(baseline, 1),
+        'swaps': swaps,
+    }
+
+
+def _members(assignment, num_groups):
+    return [np.flatnonzero(assignment == g) for g in range(num_groups)]
+
+
+def _initial_assignment(locations, sizes, pot, floor, cap, distances):
+    """
+    Deal teams in geographic order into groups. Each team goes to the open
+    group it is closest to (by average distance to the teams already there),
+    preferring the group currently being filled so neighbours stay together.
+    A group is open to a team only if it stays below the pot's cap and both
+    the group's free places and the pot's undealt teams still cover every
+    pot floor not yet reached.
+    """
+    order = sorted(
+        range(len(locations)),
+        key=lambda i: (
+            str(locations[i].region_id), str(locations[i].county_id),
+            locations[i].latitude or 0.0, locations[i].longitude or 0.0,
+        )
+    )
+
+    num_groups = len(sizes)
+    assignment = np.full(len(locations), -1)
+    filled = np.zeros(num_groups, dtype=int)
+    pot_counts = np.zeros((num_groups, len(cap)), dtype=int)
+    undealt = np.bincount(pot, minlength=len(cap))
+    current = 0
+
+    def fits(g, p):
+        if filled[g] >= sizes[g] or pot_counts[g, p] >= cap[p]:
+            return False
+        if pot_counts[g, p] < floor[p]:
+            # Counts towards a floor, so it can only help
+            return True
+        # A surplus team takes a place another pot may need in this group,
+        # and a team of its pot that another group may need
+        group_shortfall = np.maximum(floor - pot_counts[g], 0).sum()
+        pot_shortfall = np.maximum(floor[p] - pot_counts[:, p], 0).sum()
+        return sizes[g] - filled[g] - 1 >= group_shortfall and undealt[p] - 1 >= pot_shortfall
+
+    for i in order:
+        open_groups = [g for g in range(num_groups) if fits(g, pot[i])]
+        if not open_groups:
+            # Pot caps boxed the greedy deal in; fall back to one that always fits
+            return _dealt_assignment(order, sizes, pot)
+        if current in open_groups:
+            g = current
+        else:
+            g = min(
+                open_groups,
+                key=lambda c: distances[i, assignment == c].mean() if filled[c] else 0.0
+            )
+
+        assignment[i] = g
+        filled[g] += 1
+        pot_counts[g, pot[i]] += 1
+        undealt[pot[i]] -= 1
+        while current < num_groups and filled[current] >= sizes[current]:
+            current += 1
+
+    return assignment
+
+
+def _dealt_assignment(order, sizes, pot):
+    """
+    Deal pot by pot around the groups, continuing where the last pot stopped.
+    Every group gets the floor or ceiling of its share of each pot and sizes
+    match group_sizes().
+    """
+    assignment = np.full(len(order), -1)
+    position = 0
+    for i in sorted(order, key=lambda i: pot[i]):  # stable, so geographic order holds within a pot
+        assignment[i] = position % len(sizes)
+        position += 1
+    return assignment
+
+
+def _improve(assignment, distances, pot, floor, cap, num_groups):
+    """Steepest-descent swaps between groups; sizes never change and pot floors and caps hold"""
+    n = len(assignment)
+    one_hot = np.zeros((n, num_groups))
+    one_hot[np.arange(n), assignment] = 1.0
+    # to_group[t, g] = total distance from team t to the teams in group g
+    to_group = distances @ one_hot
+
+    pot_counts = np.zeros((num_groups, len(cap)), dtype=int)
+    np.add.at(pot_counts, (assignment, pot), 1)
+    same_pot = pot[:, None] == pot[None, :]
+
+    swaps = 0
+    for _ in range(MAX_SWAPS_PER_TEAM * n):
+        own = to_group[np.arange(n), assignment]
+        other = to_group[:, assignment]  # other[a, b] = distance from a to b's group
+        # Change in total travel if a and b swap groups
+        gain = other.T - own[:, None] + other - own[None, :] - 2 * distances
+
+        allowed = assignment[:, None] != assignment[None, :]
+        # Across pots, each group gains one pot (below its cap) and loses the
+        # other (above its floor)
+        above_floor = pot_counts[assignment, pot] > floor[pot]
+        allowed &= same_pot | (
+            (pot_counts[assignment[:, None], pot[None, :]] < cap[pot][None, :])
+            & (pot_counts[assignment[None, :], pot[:, None]] < cap[pot][:, None])
+            & above_floor[:, None] & above_floor[None, :]
+        )
+        gain = np.where(allowed, gain, np.inf)
+
+        a, b = np.unravel_index(np.argmin(gain), gain.shape)
+        if gain[a, b] >= -1e-9:
+            break
+
+        group_a, group_b = assignment[a], assignment[b]
+        to_group[:, group_a] += distances[:, b] - distances[:, a]
+        to_group[:, group_b] += distances[:, a] - distances[:, b]
+        pot_counts[group_a, pot[a]] -= 1
+        pot_counts[group_a, pot[b]] += 1
+        pot_counts[group_b, pot[b]] -= 1
+        pot_counts[group_b, pot[a]] += 1
+        assignment[a], assignment[b] = group_b, group_a
+        swaps += 1
+
+    return assignment, swaps
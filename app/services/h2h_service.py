@@ -1,6 +1,7 @@
 from collections import defaultdict
 from app.extensions.db import db
 from app.models.match import Match
+from app.models.enums import MatchStatus
 
 class HeadToHeadService:
     """
@@ -12,6 +13,34 @@ class HeadToHeadService:
         """
         Returns H2H stats between given teams.
         """
+        matches = (
+            db.session.query(
+                Match.home_team_id,
+                Match.away_team_id,
+                Match.home_score,
+                Match.away_score,
+            )
+            .filter(
+                Match.tournament_id == tournament_id,
+                Match.home_team_id.in_(team_ids),
+                Match.away_team_id.in_(team_ids),
+                Match.status == MatchStatus.finished
+            )
+            .all()
+        )
+
+        return HeadToHeadService.mini_league(matches, team_ids)
+
+    @staticmethod
+    def mini_league(matches, team_ids, points=(3, 1, 0)):
+        """
+        H2H table among `team_ids` from results already in memory.
+        `matches` are (home_team_id, away_team_id, home_score, away_score)
+        tuples; results involving other teams are ignored.
+        """
+        points_win, points_draw, points_loss = points
+        members = set(team_ids)
+
         stats = defaultdict(lambda: {
             "points": 0,
             "goals_for": 0,
@@ -19,16 +48,10 @@ class HeadToHeadService:
             "goal_diff": 0
         })
 
-        matches = Match.query.filter(
-            Match.competition == str(tournament_id),
-            Match.home_team_id.in_(team_ids),
-            Match.away_team_id.in_(team_ids),
-            Match.status == "finished"
-        ).all()
-
-        for match in matches:
-            h, a = match.home_team_id, match.away_team_id
-            hs, as_ = match.home_score, match.away_score
+        for h, a, hs, as_ in matches:
+            if h not in members or a not in members:
+                continue
+            hs, as_ = hs or 0, as_ or 0
 
             stats[h]["goals_for"] += hs
             stats[h]["goals_against"] += as_
@@ -36,12 +59,14 @@ class HeadToHeadService:
             stats[a]["goals_against"] += hs
 
             if hs > as_:
-                stats[h]["points"] += 3
+                stats[h]["points"] += points_win
+                stats[a]["points"] += points_loss
             elif hs < as_:
-                stats[a]["points"] += 3
+                stats[a]["points"] += points_win
+                stats[h]["points"] += points_loss
             else:
-                stats[h]["points"] += 1
-                stats[a]["points"] += 1
+                stats[h]["points"] += points_draw
+                stats[a]["points"] += points_draw
 
         for t in stats:
             stats[t]["goal_diff"] = (
@@ -2,6 +2,7 @@ import uuid
 from app.extensions.db import db
 from app.models.tournament_invite import TournamentInvite
 from app.models.tournament_team import TournamentTeam
+from app.services.cache_service import invalidate_competition
 
 class InviteService:
 
@@ -37,6 +38,7 @@ class InviteService:
                 db.session.add(tt)
 
         db.session.commit()
+        invalidate_competition(invite.tournament_id)
         return invite
 
     @staticmethod
@@ -0,0 +1,308 @@
+"""
+Database-backed background jobs.
+
+The jobs table is the queue. `flask run-jobs` workers claim the oldest
+runnable job with SELECT ... FOR UPDATE SKIP LOCKED, so any number of
+workers can share it without running a job twice, and nothing but the
+database is needed. Failed jobs are retried with exponential backoff up to
+max_attempts, and a job whose worker died is picked up again once its lock
+times out, so handlers must be safe to run more than once.
+"""
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select, update, or_, and_
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions.db import db
+from app.models import Job, Match, KnockoutRound
+
+
+POLL_INTERVAL_SECONDS = 2
+
+# A running job whose worker hasn't finished it in this time is assumed dead
+LOCK_TIMEOUT = timedelta(minutes=30)
+
+# Delay before the first retry; doubles with every attempt
+RETRY_BACKOFF_SECONDS = 30
+
+JOB_HANDLERS = {}
+
+
+def job_handler(job_type):
+    """Register `func(payload, progress)` as the handler for a job type"""
+    def register(func):
+        JOB_HANDLERS[job_type] = func
+        return func
+    return register
+
+
+class IdempotencyKeyReused(ValueError):
+    """An idempotency key came back with a different job type or payload"""
+
+
+class JobService:
+    """Submit, claim and run background jobs"""
+
+    @staticmethod
+    def enqueue(job_type, payload=None, idempotency_key=None, max_attempts=3):
+        """
+        Queue a job. Submitting an idempotency_key that was used before returns
+        the existing job, whatever its state, instead of queueing a new one;
+        reusing it for a different job type or payload raises
+        IdempotencyKeyReused.
+        """
+        if job_type not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job type: {job_type}")
+        payload = payload or {}
+
+        if idempotency_key:
+            existing = Job.query.filter_by(idempotency_key=idempotency_key).first()
+            if existing:
+                return JobService._same_request(existing, job_type, payload)
+
+        job = Job(
+            job_type=job_type,
+            payload=payload,
+            idempotency_key=idempotency_key,
+            status='queued',
+            progress=0,
+            attempts=0,
+            max_attempts=max_attempts,
+            run_after=datetime.utcnow(),
+        )
+        db.session.add(job)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another request submitted the same key first
+            db.session.rollback()
+            existing = Job.query.filter_by(idempotency_key=idempotency_key).one()
+            return JobService._same_request(existing, job_type, payload)
+        return job
+
+    @staticmethod
+    def _same_request(job, job_type, payload):
+        """The job submitted earlier under the same key, if it was this request"""
+        if job.job_type != job_type or job.payload != payload:
+            raise IdempotencyKeyReused(
+                f"Idempotency key was already used for a different request (job {job.id}, {job.job_type})"
+            )
+        return job
+
+    @staticmethod
+    def get_job(job_id):
+        return db.session.get(Job, job_id)
+
+    @staticmethod
+    def claim_next(worker_id):
+        """Lock and return the next runnable job, or None if there is none"""
+        now = datetime.utcnow()
+        job = db.session.scalars(
+            select(Job)
+            .where(or_(
+                and_(Job.status == 'queued', Job.run_after <= now),
+                and_(Job.status == 'running', Job.locked_at < now - LOCK_TIMEOUT),
+            ))
+            .order_by(Job.run_after)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).first()
+
+        if job is None:
+            db.session.rollback()
+            return None
+
+        job.status = 'running'
+        job.attempts += 1
+        job.locked_by = worker_id
+        job.locked_at = now
+        job.started_at = job.started_at or now
+        db.session.commit()
+        return job
+
+    @staticmethod
+    def run(job):
+        """
+        Run a claimed job and record the outcome. ValueError means the job
+        can never succeed (bad input, missing competition) and fails it
+        straight away; anything else is retried while attempts remain.
+        """
+        job_id = job.id
+        handler = JOB_HANDLERS.get(job.job_type)
+
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for job type {job.job_type}")
+            if job.attempts > job.max_attempts:
+                raise ValueError("Job abandoned by its worker too many times")
+
+            result = handler(dict(job.payload or {}), _Progress(job_id))
+
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(Job, job_id)
+            job.error = f"{e.__class__.__name__}: {e}"
+            job.locked_by = None
+            job.locked_at = None
+
+            if isinstance(e, ValueError) or job.attempts >= job.max_attempts:
+                job.status = 'failed'
+                job.finished_at = datetime.utcnow()
+            else:
+                job.status = 'queued'
+                job.run_after = datetime.utcnow() + timedelta(
+                    seconds=RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+                )
+            db.session.commit()
+            return job
+
+        job = db.session.get(Job, job_id)
+        job.status = 'succeeded'
+        job.progress = 100
+        job.result = result
+        job.error = None
+        job.locked_by = None
+        job.locked_at = None
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        return job
+
+
+class _Progress:
+    """
+    Progress callback handed to job handlers. Writes on its own connection,
+    so progress is visible while the handler's transaction is still open.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+
+    def __call__(self, percent, message=None):
+        with db.engine.begin() as connection:
+            connection.execute(
+                update(Job)
+                .where(Job.id == self.job_id)
+                .values(progress=max(0, min(int(percent), 100)), progress_message=message)
+            )
+
+
+# ---------------------------------------------------------
+# Handlers
+# ---------------------------------------------------------
+
+def _parse_datetime(value):
+    """ISO datetime from a payload as naive UTC, or None"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed.tzinfo else parsed
+
+
+@job_handler('generate_fixtures')
+def _generate_fixtures(payload, progress):
+    from app.services.scheduling_service import SchedulingService
+
+    competition_id = uuid.UUID(payload['competition_id'])
+
+    # The marker is committed with the fixtures, so only a retry of the
+    # attempt that wrote them sees it; matches from anywhere else fail the job
+    job = db.session.get(Job, progress.job_id)
+    existing = Match.query.filter_by(competition_id=competition_id).count()
+    if (job.result or {}).get('fixtures_committed'):
+        return {'generated_matches': existing}
+    if existing:
+        raise ValueError(f"Competition already has {existing} matches; fixtures were not generated")
+
+    progress(10, 'Generating fixtures')
+    job.result = {'fixtures_committed': True}
+    matches = SchedulingService.generate_fixtures(
+        competition_id,
+        start_date=_parse_datetime(payload.get('start_date')),
+        days_between_matches=payload.get('days_between_matches', 7),
+        num_groups=payload.get('num_groups', 4),
+        seed=payload.get('seed'),
+        teams_fingerprint=payload.get('teams_fingerprint'),
+        draw_strategy=payload.get('draw_strategy', 'random'),
+        pots=payload.get('pots'),
+    )
+    return {'generated_matches': len(matches)}
+
+
+@job_handler('generate_knockout_fixtures')
+def _generate_knockout_fixtures(payload, progress):
+    from app.services.competition_service import CompetitionService
+    from app.services.scheduling_service import SchedulingService
+
+    competition_id = uuid.UUID(payload['competition_id'])
+
+    existing = KnockoutRound.query.filter_by(competition_id=competition_id).count()
+    if existing:
+        return {'generated_rounds': existing, 'already_generated': True}
+
+    progress(10, 'Computing standings')
+    standings = CompetitionService.get_competition_standings(competition_id)
+    qualified_teams = [s['team_id'] for s in standings[:payload.get('num_qualified', 16)]]
+    if len(qualified_teams) < 2:
+        raise ValueError('Not enough qualified teams for knockout')
+
+    progress(50, 'Generating bracket')
+    matches = SchedulingService.generate_knockout_from_teams(
+        competition_id,
+        qualified_teams,
+        start_date=_parse_datetime(payload.get('start_date'))
+    )
+    return {'generated_matches': len(matches), 'qualified_teams': len(qualified_teams)}
+
+
+@job_handler('apply_rules')
+def _apply_rules(payload, progress):
+    from app.services.advancement_service import AdvancementService
+
+    # Teams already in the target competition are skipped, so reruns are harmless
+    progress(10, 'Applying advancement rules')
+    results = AdvancementService.apply_advancement_rules(uuid.UUID(payload['competition_id']))
+    return {'total_rules': len(results), 'results': results}
+
+
+# ---------------------------------------------------------
+# Worker
+# ---------------------------------------------------------
+
+@click.command('run-jobs')
+@click.option('--once', is_flag=True, help='Exit when the queue is empty instead of polling')
+@click.option('--poll-interval', default=POLL_INTERVAL_SECONDS, type=float, help='Seconds between polls')
+@with_appcontext
+def run_jobs(once, poll_interval):
+    """Process background jobs from the jobs table"""
+    from app.services.cache_service import invalidate_competition
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    click.echo(f"[*] Job worker {worker_id} started")
+
+    while True:
+        job = JobService.claim_next(worker_id)
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        click.echo(f"[*] Running {job.job_type} {job.id} (attempt {job.attempts}/{job.max_attempts})")
+        job = JobService.run(job)
+        invalidate_competition((job.payload or {}).get('competition_id'))
+
+        if job.status == 'succeeded':
+            click.echo(f"[OK] {job.job_type} {job.id} succeeded")
+        else:
+            click.echo(f"[!] {job.job_type} {job.id} {job.status}: {job.error}")
+
+
+def register_job_worker_command(app):
+    """Register the run-jobs command with the Flask app"""
+    app.cli.add_command(run_jobs)
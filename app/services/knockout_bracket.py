@@ -0,0 +1,51 @@
+"""
+Array-backed knockout bracket.
+
+A single-elimination bracket is a complete binary tree stored heap-style in
+a flat list: the final is node 1, and node i is fed by nodes 2i and 2i+1.
+A round `d` rounds before the final occupies nodes [2**d, 2**(d+1)), so a
+match's node is 2**d + its bracket slot, and parent/child lookups are
+index arithmetic instead of searches.
+"""
+
+
+class BracketTree:
+    """Complete binary tree of bracket nodes; each node holds the legs of one tie"""
+
+    def __init__(self, num_rounds):
+        self.num_rounds = max(int(num_rounds), 1)
+        self.nodes = [None] * (2 ** self.num_rounds)
+
+    @staticmethod
+    def rounds_for(first_round_ties, rounds_created=0):
+        """Rounds needed for a bracket whose first round has `first_round_ties` ties"""
+        rounds = 1
+        while 2 ** (rounds - 1) < first_round_ties:
+            rounds += 1
+        return max(rounds, rounds_created)
+
+    def node_index(self, round_order, slot):
+        """Node for a round (1 = first round) and slot, or None if outside the tree"""
+        depth = self.num_rounds - round_order
+        if depth < 0 or slot is None or not 0 <= slot < 2 ** depth:
+            return None
+        return 2 ** depth + slot
+
+    @staticmethod
+    def parent(index):
+        return index // 2 if index > 1 else None
+
+    @staticmethod
+    def children(index):
+        return 2 * index, 2 * index + 1
+
+    def get(self, index):
+        if index is None or not 0 < index < len(self.nodes):
+            return None
+        return self.nodes[index]
+
+    def add(self, index, match):
+        """Attach a match (one leg) to a node"""
+        if self.nodes[index] is None:
+            self.nodes[index] = []
+        self.nodes[index].append(match)
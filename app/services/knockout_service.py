@@ -35,7 +35,7 @@ class KnockoutService:
                 away_team_id=away,
                 match_date=match_date,
                 venue=venue,
-                competition=str(tournament_id),
+                tournament_id=tournament_id,
                 status=MatchStatus.scheduled
             )
             db.session.add(match)
@@ -1,16 +1,51 @@
 from app.services.standings_service import StandingsService
+from app.services.cache_service import VersionedCache
+
 
 class LiveUpdatesService:
+    """
+    Live league tables.
+
+    A projection is the finished table with live/paused scores overlaid.
+    It is refreshed from the event-ingestion path and memoised on the live
+    scores it was built from, so serving it costs O(live matches).
+    """
+
+    _projections = VersionedCache(max_entries=256)
 
     @staticmethod
     def on_goal_scored(tournament_id):
-
-        return StandingsService.compute_standings(tournament_id)
+        return LiveUpdatesService._refresh(tournament_id)
     
     @staticmethod
     def on_match_completed(tournament_id):
-        return StandingsService.compute_standings(tournament_id)
+        return LiveUpdatesService._refresh(tournament_id)
     
     @staticmethod
     def live_table(tournament_id):
-        return StandingsService.compute_standings(tournament_id)
\ No newline at end of file
+        key, version, live_matches = LiveUpdatesService._current(tournament_id)
+
+        table = LiveUpdatesService._projections.get(key, version)
+        if table is None:
+            table = LiveUpdatesService._project(tournament_id, key, version, live_matches)
+        return table
+
+    @staticmethod
+    def _refresh(tournament_id):
+        if not tournament_id:
+            return None
+        key, version, live_matches = LiveUpdatesService._current(tournament_id)
+        return LiveUpdatesService._project(tournament_id, key, version, live_matches)
+
+    @staticmethod
+    def _current(tournament_id):
+        live_matches = StandingsService.get_live_matches(tournament_id)
+        version = (StandingsService.finished_version(tournament_id), tuple(live_matches))
+        return ("live_table", str(tournament_id)), version, live_matches
+
+    @staticmethod
+    def _project(tournament_id, key, version, live_matches):
+        base = StandingsService.get_finished_table(tournament_id, version=version[0])
+        table = StandingsService.project_live(base, live_matches, tournament_id)
+        LiveUpdatesService._projections.set(key, version, table)
+        return table
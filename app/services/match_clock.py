@@ -0,0 +1,69 @@
+"""
+Server-side match clock.
+
+A running match stores when its current period kicked off, when the clock
+was last stopped and how long it has been stopped in this period; the
+minute is computed on read (Match.clock_minute), so neither the clock
+ticking nor events being logged write to the match. Paused time never
+counts towards the minute, and so never towards players' minutes_played.
+
+Periods run 1H -> 2H -> ET. Half time is a pause followed by a resume into
+the next period, which restarts the period clock at its offset (46', 91').
+"""
+from datetime import datetime
+
+from app.models.match import MATCH_PERIODS
+from app.models.enums import MatchStatus
+
+
+PERIOD_ORDER = tuple(MATCH_PERIODS)
+
+
+def kick_off(match, now=None):
+    """Start the clock in the first half"""
+    now = now or datetime.utcnow()
+    match.started_at = now
+    match.period = PERIOD_ORDER[0]
+    match.period_started_at = now
+    match.paused_at = None
+    match.paused_seconds = 0
+
+
+def pause_clock(match, now=None):
+    """Stop the clock; the minute holds until it resumes"""
+    if match.paused_at is None:
+        match.paused_at = now or datetime.utcnow()
+
+
+def resume_clock(match, now=None, period=None):
+    """
+    Restart the clock. With `period` (the next one, e.g. '2H' after half
+    time) a new period kicks off instead of the current one continuing.
+    """
+    now = now or datetime.utcnow()
+
+    if period and period != match.period:
+        if period not in MATCH_PERIODS:
+            raise ValueError(f"Invalid period '{period}', expected one of: {', '.join(PERIOD_ORDER)}")
+        if match.period in PERIOD_ORDER and PERIOD_ORDER.index(period) < PERIOD_ORDER.index(match.period):
+            raise ValueError(f"Cannot go back from {match.period} to {period}")
+        match.period = period
+        match.period_started_at = now
+        match.paused_seconds = 0
+    elif match.paused_at is not None:
+        match.paused_seconds = (match.paused_seconds or 0) + int((now - match.paused_at).total_seconds())
+
+    if match.period_started_at is None:
+        # Clock never started (match went live before the clock existed)
+        kick_off(match, now)
+    match.paused_at = None
+
+
+def stop_clock(match, now=None):
+    """
+    Freeze the clock at full time: the minute reached is kept as the
+    match's final minute. Call before the status leaves live/paused.
+    """
+    if match.status in (MatchStatus.live, MatchStatus.paused) and match.period_started_at:
+        match.current_minute = match.clock_minute(now)
+    match.paused_at = None
@@ -1,81 +1,74 @@
 # app/services/match_service.py
 from app.extensions.db import db
 from app.models.match import Match, MatchStatus
+from app.models.tournament import Tournament
 from app.models.match_event import MatchEvent
 from app.models.enums import EventType
+from app.services.competition_standings_service import CompetitionStandingsService
+from app.services.standings_history_service import StandingsHistoryService
+from app.services.outbox_service import OutboxService
+from app.services.cache_service import invalidate_competition
+from app.services.fixture_generator import round_robin_matchdays, matchday_rows, insert_fixtures
+from app.services.team_calendar import check_fixtures, describe_conflicts
+from app.services.match_clock import kick_off, stop_clock
 from datetime import datetime, timedelta
+import uuid
 
-def apply_match_results(match: Match):
-    """Apply finished match results to team and player stats."""
-    from app.models.team_stats import TeamStats
-    from app.models.player_stats import PlayerStats
-
-    # Update team stats
-    home_team_stats = TeamStats.query.filter_by(team_id=match.home_team_id).first()
-    away_team_stats = TeamStats.query.filter_by(team_id=match.away_team_id).first()
-
-    if not home_team_stats:
-        home_team_stats = TeamStats(team_id=match.home_team_id)
-        db.session.add(home_team_stats)
-
-    if not away_team_stats:
-        away_team_stats = TeamStats(team_id=match.away_team_id)
-        db.session.add(away_team_stats)
-
-    # Update match counts
-    home_team_stats.matches_played += 1
-    away_team_stats.matches_played += 1
-
-    # Update goals
-    home_team_stats.goals_for += match.home_score or 0
-    home_team_stats.goals_against += match.away_score or 0
-    away_team_stats.goals_for += match.away_score or 0
-    away_team_stats.goals_against += match.home_score or 0
-
-    # Update wins/draws/losses
-    if match.home_score > match.away_score:
-        home_team_stats.wins += 1
-        away_team_stats.losses += 1
-    elif match.home_score < match.away_score:
-        away_team_stats.wins += 1
-        home_team_stats.losses += 1
-    else:
-        home_team_stats.draws += 1
-        away_team_stats.draws += 1
+class ResultBatch:
+    """
+    Standings changes of many matches, applied together: one update per
+    standings row and one history refresh per competition, from the
+    earliest day that changed. Pass it as `batch` to apply_match_results or
+    update_match_result, then call apply() before committing.
+    """
 
-    # Update clean sheets
-    if (match.away_score or 0) == 0:
-        home_team_stats.clean_sheets += 1
-    if (match.home_score or 0) == 0:
-        away_team_stats.clean_sheets += 1
+    def __init__(self):
+        self._changes = []
 
-    # Update player stats based on events (if any)
-    for event in match.events:
-        if event.player_id:
-            player_stats = PlayerStats.query.filter_by(player_id=event.player_id).first()
-            if not player_stats:
-                player_stats = PlayerStats(player_id=event.player_id)
-                db.session.add(player_stats)
-
-            ev_type = event.event_type.value if hasattr(event.event_type, 'value') else str(event.event_type)
-
-            if ev_type in ['goal', 'penalty_goal']:
-                player_stats.goals += 1
-            elif ev_type == 'yellow_card':
-                player_stats.yellow_cards += 1
-            elif ev_type == 'red_card':
-                player_stats.red_cards += 1
-
-    # Increment matches played and minutes played for players who participated (had events)
-    player_ids = {e.player_id for e in match.events if e.player_id}
-    for pid in player_ids:
-        ps = PlayerStats.query.filter_by(player_id=pid).first()
-        if ps:
-            ps.matches_played += 1
-            try:
-                ps.minutes_played += int(match.current_minute or 0)
-            except Exception:
-                ps.minutes_played += 0
+    def replace(self, match: Match, previous, current):
+        if previous != current:
+            self._changes.append((previous, current, match.match_date))
+
+    def mark(self):
+        """Position to roll back to if the next match fails"""
+        return len(self._changes)
+
+    def rollback_to(self, mark):
+        del self._changes[mark:]
+
+    def apply(self):
+        """Write the collected changes. Does not commit."""
+        CompetitionStandingsService.apply_results(
+            (previous, current) for previous, current, _ in self._changes
+        )
+
+        history_since = {}
+        for previous, current, match_date in self._changes:
+            competition_id = (current or previous)[0]
+            if match_date:
+                day = match_date.date()
+                history_since[competition_id] = min(day, history_since.get(competition_id, day))
+        for competition_id, since in history_since.items():
+            StandingsHistoryService.rebuild(competition_id, since=since)
+
+        self._changes = []
+
+
+def apply_match_results(match: Match, batch=None):
+    """
+    Apply finished match results. Standings change in this transaction (or
+    through `batch`, a ResultBatch); stats, knockout progression,
+    advancement and notifications follow from the MatchFinished event via
+    the outbox worker. Does not commit.
+    """
+    # Update competition standings read model and history
+    if batch is not None:
+        batch.replace(match, None, CompetitionStandingsService.result_of(match))
+    else:
+        CompetitionStandingsService.apply_match(match)
+        StandingsHistoryService.record_match(match)
+
+    OutboxService.record('MatchFinished', match.id, competition_id=match.competition_id)
 
 
 def schedule_match(data, coach_id):
@@ -84,6 +77,12 @@ def schedule_match(data, coach_id):
     # Determine status (default scheduled)
     status = data.get('status') or 'scheduled'
 
+    # A team can't play twice on one day, in any competition
+    if status == 'scheduled':
+        conflicts = check_fixtures([data])
+        if conflicts:
+            raise ValueError(describe_conflicts(conflicts))
+
     match = Match(
         home_team_id=data["home_team_id"],
         away_team_id=data["away_team_id"],
@@ -102,34 +101,44 @@ def schedule_match(data, coach_id):
         ended_at=data.get("ended_at"),
     )
     db.session.add(match)
-    db.session.commit()
 
-    # If match is already finished, apply stats immediately
+    # If match is already finished, apply its result in the same transaction
     if match.status == MatchStatus.finished:
-        # Ensure we have sensible timing fields
-        if not match.started_at:
-            match.started_at = match.match_date
-        if not match.ended_at:
-            from datetime import datetime
-            match.ended_at = datetime.utcnow()
-        if not match.current_minute:
-            match.current_minute = 90
-
+        fill_finished_timing(match)
+        db.session.flush()
         apply_match_results(match)
-        db.session.commit()
 
+    db.session.commit()
+
+    invalidate_competition(match.competition_id)
     return match
 
 
+def fill_finished_timing(match: Match):
+    """Sensible timing fields for a match recorded as finished after the fact"""
+    if not match.started_at:
+        match.started_at = match.match_date
+    if not match.ended_at:
+        match.ended_at = datetime.utcnow()
+    if not match.current_minute:
+        match.current_minute = 90
+
+
+def _require_both_teams(match: Match, action):
+    """Placeholder ties (a team still to be decided) cannot be played or given a result"""
+    if match.home_team_id is None or match.away_team_id is None:
+        raise ValueError(f"Both teams must be known before the match can {action}")
+
+
 def start_match(match: Match):
     """
-    Set match status to live and reset current_minute.
+    Set match status to live and start the match clock.
     """
-    from datetime import datetime
+    _require_both_teams(match, "start")
     match.status = MatchStatus.live
-    match.current_minute = 1  # Start at minute 1
-    match.started_at = datetime.utcnow()
+    kick_off(match)
     db.session.commit()
+    invalidate_competition(match.competition_id)
     return match
 
 
@@ -137,100 +146,21 @@ def finish_match(match: Match):
     """
     Set match status to finished and update team/player stats.
     """
-    from app.models.team_stats import TeamStats
-    from app.models.player_stats import PlayerStats
-    from app.models.player import Player
-
-    print(f"Finishing match {match.id}, current status: {match.status}")
     if match.status != MatchStatus.live:
         raise ValueError("Match is not live")
-    match.status = MatchStatus.finished
-    from datetime import datetime
 
-    match.started_at = None      # ⛔ stops frontend timers
-    match.ended_at = datetime.utcnow()
+    # The clock stops at the minute reached; clients stop their timers on clock.running
+    now = datetime.utcnow()
+    stop_clock(match, now)
+    match.status = MatchStatus.finished
+    match.ended_at = now
     match.current_minute = match.current_minute or 90
-    print(f"Match {match.id} status set to: {match.status}")
-    
-    try:
-        # Update team stats
-        home_team_stats = TeamStats.query.filter_by(team_id=match.home_team_id).first()
-        away_team_stats = TeamStats.query.filter_by(team_id=match.away_team_id).first()
-
-        if not home_team_stats:
-            home_team_stats = TeamStats(team_id=match.home_team_id)
-            db.session.add(home_team_stats)
-
-        if not away_team_stats:
-            away_team_stats = TeamStats(team_id=match.away_team_id)
-            db.session.add(away_team_stats)
-
-        # Update match counts
-        home_team_stats.matches_played += 1
-        away_team_stats.matches_played += 1
-
-        # Update goals
-        home_team_stats.goals_for += match.home_score
-        home_team_stats.goals_against += match.away_score
-        away_team_stats.goals_for += match.away_score
-        away_team_stats.goals_against += match.home_score
-
-        # Update wins/draws/losses
-        if match.home_score > match.away_score:
-            home_team_stats.wins += 1
-            away_team_stats.losses += 1
-        elif match.home_score < match.away_score:
-            away_team_stats.wins += 1
-            home_team_stats.losses += 1
-        else:
-            home_team_stats.draws += 1
-            away_team_stats.draws += 1
-
-        # Update clean sheets
-        if match.away_score == 0:
-            home_team_stats.clean_sheets += 1
-        if match.home_score == 0:
-            away_team_stats.clean_sheets += 1
-
-        # Update player stats
-        for event in match.events:
-            if event.player_id:
-                player_stats = PlayerStats.query.filter_by(player_id=event.player_id).first()
-                if not player_stats:
-                    player_stats = PlayerStats(player_id=event.player_id)
-                    db.session.add(player_stats)
-
-                ev_type = event.event_type.value if hasattr(event.event_type, 'value') else str(event.event_type)
-
-                if ev_type in ['goal', 'penalty_goal']:
-                    player_stats.goals += 1
-                elif ev_type == 'yellow_card':
-                    player_stats.yellow_cards += 1
-                elif ev_type == 'red_card':
-                    player_stats.red_cards += 1
-
-        # Increment matches_played and minutes_played for players who participated (had events)
-        player_ids = {e.player_id for e in match.events if e.player_id}
-        for pid in player_ids:
-            ps = PlayerStats.query.filter_by(player_id=pid).first()
-            if ps:
-                ps.matches_played += 1
-                try:
-                    ps.minutes_played += int(match.current_minute or 0)
-                except Exception:
-                    ps.minutes_played += 0
-
-                # Count matches played (if not already counted)
-                # This is a simple implementation - in reality you'd track unique matches per player
-
-    except Exception as e:
-        # Log the error but don't fail the match finishing
-        print(f"Error updating stats for match {match.id}: {e}")
-        # Continue with committing the match status change
-
-    print(f"Committing match {match.id} with status: {match.status}")
+
+    # Standings and the MatchFinished event are committed with the status change
+    apply_match_results(match)
+
     db.session.commit()
-    print(f"Match {match.id} finished successfully")
+    invalidate_competition(match.competition_id)
     return match
 
 
@@ -254,57 +184,112 @@ def compute_score(match: Match):
     return home, away
 
 
+def require_tournament(tournament_id):
+    """The UUID of an existing tournament, or ValueError"""
+    try:
+        tournament = db.session.get(Tournament, uuid.UUID(str(tournament_id)))
+    except ValueError:
+        raise ValueError(f"Invalid tournament id '{tournament_id}'")
+    if tournament is None:
+        raise ValueError(f"Tournament {tournament_id} not found")
+    return tournament.id
+
+
+def new_tournament_match(tournament_id, data):
+    """
+    Unsaved Match for one row of a tournament's bulk create; finished matches
+    get their timing filled in. `tournament_id` must exist (see require_tournament).
+    """
+    status = data.get('status') or 'scheduled'
+
+    match = Match(
+        tournament_id=uuid.UUID(str(tournament_id)),
+        home_team_id=data["home_team_id"],
+        away_team_id=data["away_team_id"],
+        match_date=data["match_date"],
+        venue=data.get("venue"),
+        status=MatchStatus(status),
+        home_score=data.get('home_score') or 0,
+        away_score=data.get('away_score') or 0,
+        current_minute=data.get('current_minute') or 0,
+        started_at=data.get('started_at'),
+        ended_at=data.get('ended_at'),
+    )
+    if match.status == MatchStatus.finished:
+        _require_both_teams(match, "be finished")
+        fill_finished_timing(match)
+    return match
+
+
 def create_tournament_matches(tournament_id, matches_data):
     """Bulk create matches for a tournament."""
-    created_matches = []
-
-    for data in matches_data:
-        status = data.get('status') or 'scheduled'
-        home_score = data.get('home_score') or 0
-        away_score = data.get('away_score') or 0
-        current_minute = data.get('current_minute') or 0
-
-        match = Match(
-            competition=str(tournament_id),
-            home_team_id=data["home_team_id"],
-            away_team_id=data["away_team_id"],
-            match_date=data["match_date"],
-            venue=data.get("venue"),
-            status=MatchStatus(status),
-            home_score=home_score,
-            away_score=away_score,
-            current_minute=current_minute,
-            started_at=data.get('started_at'),
-            ended_at=data.get('ended_at'),
-        )
-        db.session.add(match)
-        created_matches.append(match)
-
-    db.session.commit()
+    tournament_id = require_tournament(tournament_id)
+    created_matches = [new_tournament_match(tournament_id, data) for data in matches_data]
+    db.session.add_all(created_matches)
+    db.session.flush()
 
-    # Apply stats for finished matches
+    # Results of finished matches go in the same transaction
+    batch = ResultBatch()
     for match in created_matches:
         if match.status == MatchStatus.finished:
-            if not match.started_at:
-                match.started_at = match.match_date
-            if not match.ended_at:
-                from datetime import datetime
-                match.ended_at = datetime.utcnow()
-            if not match.current_minute:
-                match.current_minute = 90
-            apply_match_results(match)
+            apply_match_results(match, batch=batch)
+    batch.apply()
 
     db.session.commit()
+    invalidate_competition(tournament_id)
 
     return [m.to_dict() for m in created_matches]
 
 
-def generate_round_robin(tournament_id, team_ids, start_date_iso, interval_days=7, venue=None):
+def update_match_result(match: Match, home_score=None, away_score=None, status=None, batch=None):
+    """
+    Change a match's score and/or status (None leaves it as is), keeping the
+    standings in step (directly, or through `batch`, a ResultBatch) and
+    recording MatchFinished or MatchResultChanged for the outbox.
+    Does not commit.
+    """
+    if status is not None:
+        status = MatchStatus(status)
+        if status == MatchStatus.finished:
+            _require_both_teams(match, "be finished")
+
+    previous_result = CompetitionStandingsService.result_of(match)
+    previous_status = match.status
+
+    if home_score is not None:
+        match.home_score = home_score
+    if away_score is not None:
+        match.away_score = away_score
+    if status is not None:
+        if status == MatchStatus.finished and previous_status in (MatchStatus.live, MatchStatus.paused):
+            stop_clock(match)
+        match.status = status
+
+    current_result = CompetitionStandingsService.result_of(match)
+    if batch is not None:
+        batch.replace(match, previous_result, current_result)
+    elif current_result != previous_result:
+        CompetitionStandingsService.replace_result(previous_result, current_result)
+        StandingsHistoryService.record_match(match)
+
+    # Stats and everything downstream follow via the outbox
+    if match.status == MatchStatus.finished and previous_status != MatchStatus.finished:
+        OutboxService.record('MatchFinished', match.id, competition_id=match.competition_id)
+    elif current_result != previous_result or (
+        previous_status == MatchStatus.finished and match.status != MatchStatus.finished
+    ):
+        OutboxService.record('MatchResultChanged', match.id, competition_id=match.competition_id)
+
+    return match
+
+
+def generate_round_robin(tournament_id, team_ids, start_date_iso, interval_days=7, venue=None, legs=1):
     """
-    Simple round-robin generator.
+    Round-robin generator (Berger/circle method, one date per matchday).
     - `team_ids`: list of team UUID strings
     - `start_date_iso`: ISO date string for first round
     - `interval_days`: days between rounds (default 7)
+    - `legs`: 2 adds the return fixtures with home/away swapped
     Returns list of created match dicts.
     """
     # Parse start date
@@ -314,53 +299,17 @@ def generate_round_robin(tournament_id, team_ids, start_date_iso, interval_days=
         # Fallback: treat as UTC naive parse
         start_dt = datetime.strptime(start_date_iso, "%Y-%m-%dT%H:%M:%S")
 
-    teams = list(team_ids)
+    teams = [uuid.UUID(str(team_id)) for team_id in team_ids]
     if len(teams) < 2:
         return []
 
-    # If odd, add a bye (None)
-    bye = None
-    if len(teams) % 2 == 1:
-        teams.append(bye)
-
-    n = len(teams)
-    rounds = n - 1
-    matches_created = []
-
-    # Use standard round-robin algorithm (circle method)
-    roster = teams[:]
-    fixed = roster[0]
-    others = roster[1:]
-
-    for r in range(rounds):
-        round_date = start_dt + timedelta(days=r * interval_days)
-        # Build left and right lists for pairing
-        left = [fixed] + others[:(n//2 - 1)]
-        right = list(reversed(others[(n//2 - 1):]))
-
-        for i in range(n // 2):
-            home = left[i] if i < len(left) else None
-            away = right[i] if i < len(right) else None
-            if home is None or away is None:
-                # bye or unmatched
-                continue
-
-            match = Match(
-                home_team_id=home,
-                away_team_id=away,
-                match_date=round_date,
-                venue=venue,
-                competition=str(tournament_id),
-                status=MatchStatus.scheduled,
-                home_score=0,
-                away_score=0,
-                current_minute=0,
-            )
-            db.session.add(match)
-            matches_created.append(match)
-
-        # rotate the others for next round
-        others = [others[-1]] + others[:-1]
+    matches_created = insert_fixtures(matchday_rows(
+        round_robin_matchdays(teams, legs=legs),
+        start_dt, interval_days,
+        venue=venue,
+        tournament_id=require_tournament(tournament_id),
+    ))
 
     db.session.commit()
+    invalidate_competition(tournament_id)
     return [m.to_dict() for m in matches_created]
\ No newline at end of file
@@ -0,0 +1,304 @@
+"""
+Team and player stats from finished matches.
+
+A finished match is reduced in memory to per-team and per-player
+contributions. Each contribution is recorded in a ledger (one row per match
+and team/player), and the season totals in team_stats/player_stats are
+moved by the difference against what the ledger held for that match before,
+with one INSERT ... ON CONFLICT (key, season) DO UPDATE SET col = col + excluded.col
+per table. Finishing a match twice, editing its score, or un-finishing it
+therefore only ever applies the change, and the totals can always be
+rebuilt from a single SUM over the ledger.
+"""
+import uuid
+from collections import defaultdict
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, update, exists
+
+from app.extensions.db import db, dialect_insert
+from app.models import Match, MatchEvent, PlayerStats, TeamStats, TeamStatsLedger, PlayerStatsLedger
+from app.models.enums import MatchStatus
+
+
+# Season the stats tables default to; all match stats are recorded against it
+STATS_SEASON = "2024"
+
+TEAM_STAT_COLUMNS = (
+    'matches_played', 'wins', 'draws', 'losses', 'goals_for', 'goals_against', 'clean_sheets',
+)
+PLAYER_STAT_COLUMNS = (
+    'matches_played', 'minutes_played', 'goals', 'yellow_cards', 'red_cards',
+)
+
+# Event type -> player stat it counts towards
+EVENT_STATS = {
+    'goal': 'goals',
+    'penalty_goal': 'goals',
+    'yellow_card': 'yellow_cards',
+    'red_card': 'red_cards',
+}
+
+# (stats model, ledger model, key column, ledger-backed columns)
+STAT_TABLES = (
+    (TeamStats, TeamStatsLedger, 'team_id', TEAM_STAT_COLUMNS),
+    (PlayerStats, PlayerStatsLedger, 'player_id', PLAYER_STAT_COLUMNS),
+)
+
+BACKFILL_BATCH_SIZE = 500
+
+
+class MatchStatsService:
+    """Keeps season stats in step with finished matches through a per-match ledger"""
+
+    @staticmethod
+    def sync_match(match, season=STATS_SEASON, retract=False):
+        """
+        Make the stats reflect the match as it is now: its contribution if it
+        is finished, nothing otherwise (or with retract=True, before deleting
+        it). Applies only the difference against the ledger. Does not commit.
+        """
+        if retract or match.status != MatchStatus.finished:
+            contributions = ({}, {})
+        else:
+            events = db.session.query(MatchEvent.player_id, MatchEvent.event_type).filter(
+                MatchEvent.match_id == match.id
+            ).all()
+            contributions = MatchStatsService.match_deltas(match, events)
+
+        for (stats_model, ledger_model, key, columns), new in zip(STAT_TABLES, contributions):
+            previous = db.session.query(ledger_model).filter(ledger_model.match_id == match.id).all()
+
+            # Keyed by (key, season): a contribution recorded under another season moves out of it
+            changes = defaultdict(lambda: dict.fromkeys(columns, 0))
+            for row in previous:
+                change = changes[(getattr(row, key), row.season)]
+                for column in columns:
+                    change[column] -= getattr(row, column) or 0
+            for key_value, delta in new.items():
+                change = changes[(key_value, season)]
+                for column in columns:
+                    change[column] += delta[column]
+
+            MatchStatsService.upsert(stats_model, key, {
+                row_key: change for row_key, change in changes.items() if any(change.values())
+            }, columns)
+
+            if previous:
+                db.session.query(ledger_model).filter(ledger_model.match_id == match.id).delete(
+                    synchronize_session=False
+                )
+            if new:
+                db.session.execute(ledger_model.__table__.insert().values([
+                    {
+                        'id': uuid.uuid4(),
+                        'match_id': match.id,
+                        key: key_value,
+                        'season': season,
+                        **{column: delta[column] for column in columns},
+                    }
+                    for key_value, delta in new.items()
+                ]))
+
+    @staticmethod
+    def match_deltas(match, events):
+        """
+        ({team_id: {column: n}}, {player_id: {column: n}}) for a finished match.
+        `events` are (player_id, event_type) pairs; players with any event
+        count as having played, for the match's minutes.
+        """
+        home_score = match.home_score or 0
+        away_score = match.away_score or 0
+
+        team_deltas = {}
+        for team_id, scored, conceded in (
+            (match.home_team_id, home_score, away_score),
+            (match.away_team_id, away_score, home_score),
+        ):
+            team_deltas[team_id] = {
+                'matches_played': 1,
+                'goals_for': scored,
+                'goals_against': conceded,
+                'wins': int(scored > conceded),
+                'draws': int(scored == conceded),
+                'losses': int(scored < conceded),
+                'clean_sheets': int(conceded == 0),
+            }
+
+        player_deltas = {}
+        for player_id, event_type in events:
+            if not player_id:
+                continue
+            if player_id not in player_deltas:
+                player_deltas[player_id] = dict.fromkeys(PLAYER_STAT_COLUMNS, 0)
+                player_deltas[player_id].update(matches_played=1, minutes_played=int(match.current_minute or 0))
+            ev_type = event_type.value if hasattr(event_type, 'value') else str(event_type)
+            if ev_type in EVENT_STATS:
+                player_deltas[player_id][EVENT_STATS[ev_type]] += 1
+
+        return team_deltas, player_deltas
+
+    @staticmethod
+    def upsert(model, key, changes, columns, accumulate=True):
+        """
+        Write `changes` ({(key_value, season): {column: n}}) to `model` in one
+        statement, adding to the existing values or, with accumulate=False,
+        replacing them.
+        """
+        if not changes:
+            return
+
+        statement = dialect_insert(model).values([
+            {
+                'id': uuid.uuid4(),
+                key: key_value,
+                'season': season,
+                **{column: change[column] for column in columns},
+            }
+            for (key_value, season), change in changes.items()
+        ])
+        table = model.__table__
+        statement = statement.on_conflict_do_update(
+            index_elements=[key, 'season'],
+            set_={
+                **{
+                    column: (func.coalesce(table.c[column], 0) + statement.excluded[column])
+                    if accumulate else statement.excluded[column]
+                    for column in columns
+                },
+                'updated_at': func.now(),
+            }
+        )
+        db.session.execute(statement)
+
+    @staticmethod
+    def rebuild(season=None, dry_run=False):
+        """
+        Recompute the ledger-backed columns of team_stats/player_stats from one
+        SUM per ledger table and report rows that had drifted. Columns the
+        ledger doesn't track (assists, shots) are left alone. Does not commit.
+        """
+        drift = []
+        rows = 0
+        for stats_model, ledger_model, key, columns in STAT_TABLES:
+            ledger_key = getattr(ledger_model, key)
+            query = db.session.query(
+                ledger_key, ledger_model.season,
+                *[func.sum(getattr(ledger_model, column)) for column in columns]
+            ).group_by(ledger_key, ledger_model.season)
+            if season:
+                query = query.filter(ledger_model.season == season)
+            expected = {
+                (row[0], row[1]): dict(zip(columns, (int(v or 0) for v in row[2:])))
+                for row in query.all()
+            }
+
+            stored_query = db.session.query(
+                getattr(stats_model, key), stats_model.season,
+                *[getattr(stats_model, column) for column in columns]
+            )
+            if season:
+                stored_query = stored_query.filter(stats_model.season == season)
+            stored = {
+                (row[0], row[1]): dict(zip(columns, (v or 0 for v in row[2:])))
+                for row in stored_query.all()
+            }
+
+            zero = dict.fromkeys(columns, 0)
+            for row_key in expected.keys() | stored.keys():
+                if expected.get(row_key, zero) != stored.get(row_key, zero):
+                    drift.append({
+                        'table': stats_model.__tablename__,
+                        key: str(row_key[0]),
+                        'season': row_key[1],
+                        'stored': stored.get(row_key, zero),
+                        'expected': expected.get(row_key, zero),
+                    })
+            rows += len(expected)
+
+            if not dry_run:
+                reset = update(stats_model).values(**zero)
+                if season:
+                    reset = reset.where(stats_model.season == season)
+                db.session.execute(reset)
+                MatchStatsService.upsert(stats_model, key, expected, columns, accumulate=False)
+
+        return {'rows': rows, 'drift': drift}
+
+    @staticmethod
+    def backfill_ledger(season=STATS_SEASON, batch_size=BACKFILL_BATCH_SIZE):
+        """
+        Record ledger entries for finished matches that predate the ledger,
+        without touching the stats. Commits per batch; returns the match count.
+        """
+        total = 0
+        while True:
+            matches = Match.query.filter(
+                Match.status == MatchStatus.finished,
+                Match.home_team_id.isnot(None),
+                ~exists().where(TeamStatsLedger.match_id == Match.id)
+            ).limit(batch_size).all()
+            if not matches:
+                return total
+
+            events = defaultdict(list)
+            for match_id, player_id, event_type in db.session.query(
+                MatchEvent.match_id, MatchEvent.player_id, MatchEvent.event_type
+            ).filter(MatchEvent.match_id.in_([m.id for m in matches])).all():
+                events[match_id].append((player_id, event_type))
+
+            rows = ([], [])
+            for match in matches:
+                for bucket, (_, _, key, columns), deltas in zip(
+                    rows, STAT_TABLES, MatchStatsService.match_deltas(match, events[match.id])
+                ):
+                    bucket.extend(
+                        {'id': uuid.uuid4(), 'match_id': match.id, key: key_value, 'season': season, **delta}
+                        for key_value, delta in deltas.items()
+                    )
+            for (_, ledger_model, _, _), bucket in zip(STAT_TABLES, rows):
+                if bucket:
+                    db.session.execute(ledger_model.__table__.insert().values(bucket))
+
+            db.session.commit()
+            total += len(matches)
+
+
+@click.command('rebuild-stats')
+@click.option('--season', default=None, help='Only rebuild this season')
+@click.option('--dry-run', is_flag=True, help='Report drift without rewriting the stats')
+@click.option('--backfill-ledger', is_flag=True, help='First record ledger entries for older finished matches')
+@with_appcontext
+def rebuild_stats(season, dry_run, backfill_ledger):
+    """Rebuild team_stats/player_stats from the match stats ledger and report drift"""
+    try:
+        if backfill_ledger:
+            count = MatchStatsService.backfill_ledger(season or STATS_SEASON)
+            click.echo(f"[OK] Backfilled the ledger for {count} finished matches")
+
+        report = MatchStatsService.rebuild(season, dry_run=dry_run)
+
+        for row in report['drift']:
+            key = 'team_id' if 'team_id' in row else 'player_id'
+            click.echo(
+                f"[!] Drift {row['table']} {key}={row[key]} season={row['season']}: "
+                f"stored={row['stored']} expected={row['expected']}"
+            )
+
+        if dry_run:
+            db.session.rollback()
+            click.echo(f"[OK] Dry run: {report['rows']} rows computed, {len(report['drift'])} drifted")
+        else:
+            db.session.commit()
+            click.echo(f"[OK] Rebuilt {report['rows']} rows, {len(report['drift'])} had drifted")
+
+    except Exception as e:
+        db.session.rollback()
+        click.echo(f"[ERROR] Failed to rebuild stats: {str(e)}")
+        raise
+
+
+def register_rebuild_stats_command(app):
+    """Register the rebuild-stats command with the Flask app"""
+    app.cli.add_command(rebuild_stats)
@@ -0,0 +1,261 @@
+"""
+Transactional outbox for match events.
+
+Request handlers record domain events (MatchFinished, GoalScored,
+MatchResultChanged) with OutboxService.record() before their one commit, so
+an event exists if and only if the change it describes was committed.
+`flask run-outbox` workers claim pending events in batches with
+SELECT ... FOR UPDATE SKIP LOCKED and run the downstream handlers: stats,
+knockout progression, advancement rules and WhatsApp notifications.
+
+Each handler's completion is recorded on the event, so a retry after a
+failure only runs the handlers that haven't succeeded yet; handlers must
+still be safe to run twice, since a worker can die between running a
+handler and recording it.
+"""
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select, or_, and_
+
+from app.extensions.db import db
+from app.models import OutboxEvent, Match, KnockoutRound, CompetitionAdvancementRule, Team, Coach
+from app.models.enums import MatchStatus
+
+
+BATCH_SIZE = 50
+POLL_INTERVAL_SECONDS = 2
+MAX_ATTEMPTS = 5
+
+# Events locked longer than this belong to a dead worker
+LOCK_TIMEOUT = timedelta(minutes=10)
+
+# Delay before the first retry; doubles with every attempt
+RETRY_BACKOFF_SECONDS = 30
+
+OUTBOX_HANDLERS = {}
+
+
+def outbox_handler(event_type, name):
+    """Register `func(event)` to run for every event of `event_type`, in registration order"""
+    def register(func):
+        OUTBOX_HANDLERS.setdefault(event_type, []).append((name, func))
+        return func
+    return register
+
+
+class OutboxService:
+    """Record domain events and process them"""
+
+    @staticmethod
+    def record(event_type, aggregate_id=None, **payload):
+        """Add an event to the current transaction. Does not commit."""
+        event = OutboxEvent(
+            event_type=event_type,
+            aggregate_id=aggregate_id,
+            payload={key: str(value) if value is not None else None for key, value in payload.items()},
+            status='pending',
+            completed_handlers=[],
+            attempts=0,
+            available_at=datetime.utcnow(),
+        )
+        db.session.add(event)
+        return event
+
+    @staticmethod
+    def claim_batch(worker_id, batch_size=BATCH_SIZE):
+        """Lock and return up to `batch_size` pending events, oldest first"""
+        now = datetime.utcnow()
+        events = db.session.scalars(
+            select(OutboxEvent)
+            .where(or_(
+                and_(OutboxEvent.status == 'pending', OutboxEvent.locked_at.is_(None),
+                     OutboxEvent.available_at <= now),
+                and_(OutboxEvent.status == 'pending', OutboxEvent.locked_at < now - LOCK_TIMEOUT),
+            ))
+            .order_by(OutboxEvent.created_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+
+        for event in events:
+            event.attempts += 1
+            event.locked_by = worker_id
+            event.locked_at = now
+        db.session.commit()
+        return events
+
+    @staticmethod
+    def process(event):
+        """
+        Run the event's outstanding handlers, committing after each one.
+        Returns the event, processed, or pending again with a backoff, or
+        failed once MAX_ATTEMPTS is reached.
+        """
+        event_id = event.id
+        done = list(event.completed_handlers or [])
+
+        for name, handler in OUTBOX_HANDLERS.get(event.event_type, []):
+            if name in done:
+                continue
+            try:
+                handler(event)
+                done.append(name)
+                event = db.session.get(OutboxEvent, event_id)
+                event.completed_handlers = list(done)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                event = db.session.get(OutboxEvent, event_id)
+                event.error = f"{name}: {e.__class__.__name__}: {e}"
+                event.locked_by = None
+                event.locked_at = None
+                if event.attempts >= MAX_ATTEMPTS:
+                    event.status = 'failed'
+                else:
+                    event.available_at = datetime.utcnow() + timedelta(
+                        seconds=RETRY_BACKOFF_SECONDS * 2 ** (event.attempts - 1)
+                    )
+                db.session.commit()
+                return event
+
+        event = db.session.get(OutboxEvent, event_id)
+        event.status = 'processed'
+        event.error = None
+        event.locked_by = None
+        event.locked_at = None
+        event.processed_at = datetime.utcnow()
+        db.session.commit()
+        return event
+
+
+# ---------------------------------------------------------
+# Handlers
+# ---------------------------------------------------------
+
+def _match(event):
+    match = db.session.get(Match, event.aggregate_id)
+    if match is None:
+        # Deleted since; its stats and standings were retracted with it
+        return None
+    return match
+
+
+@outbox_handler('MatchFinished', 'stats')
+@outbox_handler('MatchResultChanged', 'stats')
+def _sync_stats(event):
+    from app.services.match_stats_service import MatchStatsService
+
+    match = _match(event)
+    if match is not None:
+        # The ledger makes this idempotent, and it reflects the match as it is now
+        MatchStatsService.sync_match(match)
+
+
+@outbox_handler('MatchFinished', 'knockout_progression')
+def _advance_knockout_round(event):
+    from app.services.scheduling_service import SchedulingService
+
+    match = _match(event)
+    if match is None or not match.knockout_round_id:
+        return
+
+    ko_round = db.session.get(KnockoutRound, match.knockout_round_id)
+    if ko_round is None or ko_round.status == 'completed':
+        return
+
+    unfinished = Match.query.filter(
+        Match.knockout_round_id == ko_round.id,
+        Match.status != MatchStatus.finished
+    ).count()
+    if unfinished == 0:
+        SchedulingService.generate_next_knockout_round(match.competition_id, ko_round.round_order)
+
+
+@outbox_handler('MatchFinished', 'advancement')
+def _apply_advancement_rules(event):
+    from app.services.advancement_service import AdvancementService
+
+    match = _match(event)
+    if match is None or not match.competition_id:
+        return
+
+    has_rules = CompetitionAdvancementRule.query.filter_by(
+        from_competition_id=match.competition_id,
+        auto_apply=True
+    ).count()
+    unfinished = Match.query.filter(
+        Match.competition_id == match.competition_id,
+        Match.status != MatchStatus.finished
+    ).count()
+    if has_rules and unfinished == 0:
+        # Teams already in the target competition are skipped, so reruns are harmless
+        AdvancementService.apply_advancement_rules(match.competition_id)
+
+
+@outbox_handler('MatchFinished', 'notify')
+@outbox_handler('GoalScored', 'notify')
+def _notify_coaches(event):
+    from app.services.whatsapp_service import send_whatsapp_message
+
+    match = _match(event)
+    if match is None or match.home_team_id is None or match.away_team_id is None:
+        return
+
+    home = db.session.get(Team, match.home_team_id)
+    away = db.session.get(Team, match.away_team_id)
+    score = f"{home.name} {match.home_score or 0} - {match.away_score or 0} {away.name}"
+    if event.event_type == 'MatchFinished':
+        text = f"🏁 Full time\n\n{score}"
+    else:
+        text = f"⚽ Goal ({event.payload.get('minute')}')\n\n{score}"
+
+    numbers = {
+        coach.whatsapp_number
+        for coach in Coach.query.filter(Coach.id.in_([home.coach_id, away.coach_id])).all()
+        if coach.whatsapp_number
+    }
+    for number in sorted(numbers):
+        send_whatsapp_message(number, text)
+
+
+# ---------------------------------------------------------
+# Worker
+# ---------------------------------------------------------
+
+@click.command('run-outbox')
+@click.option('--once', is_flag=True, help='Exit when no events are pending instead of polling')
+@click.option('--batch-size', default=BATCH_SIZE, type=int, help='Events claimed per batch')
+@click.option('--poll-interval', default=POLL_INTERVAL_SECONDS, type=float, help='Seconds between polls')
+@with_appcontext
+def run_outbox(once, batch_size, poll_interval):
+    """Process match events from the outbox"""
+    from app.services.cache_service import invalidate_competition
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    click.echo(f"[*] Outbox worker {worker_id} started")
+
+    while True:
+        events = OutboxService.claim_batch(worker_id, batch_size)
+        if not events:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        for event in events:
+            event = OutboxService.process(event)
+            invalidate_competition((event.payload or {}).get('competition_id'))
+            if event.status != 'processed':
+                click.echo(f"[!] {event.event_type} {event.id} {event.status}: {event.error}")
+
+        click.echo(f"[OK] Processed {len(events)} events")
+
+
+def register_outbox_worker_command(app):
+    """Register the run-outbox command with the Flask app"""
+    app.cli.add_command(run_outbox)
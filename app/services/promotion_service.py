@@ -18,4 +18,19 @@ class PromotionService:
         return {
             "promoted": promoted,
             "relegated": relegated
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def promotion_odds(position_probabilities, rules):
+        """
+        Per-team promotion/relegation probabilities from a finishing-position
+        distribution (row = team, column = position), using promote_rules
+        to decide which positions go up or down.
+        """
+        positions = list(range(len(position_probabilities)))
+        outcome = PromotionService.promote_rules(positions, rules)
+
+        return {
+            "promoted": [sum(row[p] for p in outcome["promoted"]) for row in position_probabilities],
+            "relegated": [sum(row[p] for p in outcome["relegated"]) for row in position_probabilities],
+        }
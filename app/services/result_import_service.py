@@ -0,0 +1,433 @@
+"""
+Bulk match-result import.
+
+County admins upload a weekend's results as CSV or JSON Lines instead of
+one PUT /api/matches/<id> per match. Rows are read one at a time from the
+stream and handled in chunks, so memory stays flat however long the file
+is:
+
+  - teams are resolved by id or name against a directory loaded once per
+    import (scoped to the admin's county),
+  - each chunk's matches are fetched in two queries (by id, and by home
+    team, away team and day),
+  - results go through match_service.update_match_result, so standings
+    change in the chunk's transaction and stats and everything downstream
+    follow through the outbox, exactly as for a single PUT; a ResultBatch
+    sums each chunk's standings changes into one update per standings row
+    and one history refresh per competition,
+  - each row runs in a savepoint, so a bad row is reported and skipped
+    without losing the rest of its chunk; each chunk commits once.
+
+Columns: match_id, or home_team + away_team + match_date (ids or names);
+home_score, away_score, status (default finished) and venue. With a
+tournament id, rows that match no existing fixture are created through
+new_tournament_match, as create_tournament_matches does.
+"""
+import csv
+import json
+import uuid
+from datetime import datetime, time, timedelta, timezone
+from itertools import islice
+
+import click
+from flask.cli import with_appcontext
+
+from app.extensions.db import db
+from app.models import Match, Team
+from app.models.enums import MatchStatus
+from app.services.cache_service import invalidate_competition
+from app.services.match_service import (
+    ResultBatch, apply_match_results, fill_finished_timing, new_tournament_match, require_tournament,
+    update_match_result,
+)
+
+
+CHUNK_SIZE = 500
+
+# Errors listed in a report; the counts always cover every row
+MAX_REPORTED_ERRORS = 500
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+IMPORT_STATUSES = (MatchStatus.scheduled, MatchStatus.finished, MatchStatus.cancelled)
+
+# Accepted column names -> field
+COLUMN_ALIASES = {
+    'match_id': 'match_id', 'id': 'match_id',
+    'home_team': 'home_team', 'home_team_id': 'home_team', 'home': 'home_team',
+    'away_team': 'away_team', 'away_team_id': 'away_team', 'away': 'away_team',
+    'match_date': 'match_date', 'date': 'match_date',
+    'home_score': 'home_score',
+    'away_score': 'away_score',
+    'status': 'status',
+    'venue': 'venue',
+}
+
+
+def read_rows(stream, fmt):
+    """
+    Yield (line_number, row, error) from a text stream, one row at a time:
+    row is a dict of the recognised columns, or None with an error message
+    for a line that can't be parsed.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        try:
+            for row in reader:
+                yield reader.line_num, _normalise(row), None
+        except csv.Error as e:
+            raise ValueError(f"Malformed CSV at line {reader.line_num}: {e}")
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(row, dict):
+                yield line_number, None, "Each line must be a JSON object"
+                continue
+            yield line_number, _normalise(row), None
+    else:
+        raise ValueError(f"Unsupported format '{fmt}', expected one of: {', '.join(IMPORT_FORMATS)}")
+
+
+def detect_format(filename=None, content_type=None):
+    """'csv' or 'jsonl' from a file name or content type; JSON Lines unless it looks like CSV"""
+    if (filename or '').lower().endswith('.csv') or 'csv' in (content_type or '').lower():
+        return 'csv'
+    return 'jsonl'
+
+
+class TeamDirectory:
+    """Team ids and names, loaded in one query per import, for resolving a row's teams"""
+
+    def __init__(self, county_id=None):
+        query = db.session.query(Team.id, Team.name)
+        if county_id:
+            query = query.filter(Team.county_id == county_id)
+
+        self.ids = set()
+        self._by_name = {}
+        for team_id, name in query.all():
+            self.ids.add(team_id)
+            self._by_name.setdefault(_name_key(name), []).append(team_id)
+
+    def resolve(self, value):
+        """Team id for an id or (case-insensitive) name; ValueError if unknown or ambiguous"""
+        if isinstance(value, uuid.UUID):
+            team_id = value
+        else:
+            value = str(value or '').strip()
+            if not value:
+                raise ValueError("Team is required")
+            try:
+                team_id = uuid.UUID(value)
+            except ValueError:
+                matches = self._by_name.get(_name_key(value), [])
+                if len(matches) > 1:
+                    raise ValueError(f"Team name '{value}' is ambiguous; use the team id")
+                if not matches:
+                    raise ValueError(f"Unknown team '{value}'")
+                return matches[0]
+
+        if team_id not in self.ids:
+            raise ValueError(f"Unknown team '{value}'")
+        return team_id
+
+
+class ResultImportService:
+    """Apply match results from a stream of rows in chunked transactions"""
+
+    @staticmethod
+    def import_results(rows, county_id=None, tournament_id=None, chunk_size=CHUNK_SIZE, dry_run=False):
+        """
+        Apply `rows` (as yielded by read_rows) chunk by chunk. county_id limits
+        the import to that county's teams; tournament_id lets rows without an
+        existing fixture create one. With dry_run every chunk is rolled back.
+
+        Returns a report: row counts per outcome and the first
+        MAX_REPORTED_ERRORS errors as {'line', 'error'}.
+        """
+        if tournament_id:
+            tournament_id = require_tournament(tournament_id)
+        directory = TeamDirectory(county_id)
+        report = {
+            'rows': 0, 'updated': 0, 'created': 0, 'unchanged': 0, 'failed': 0,
+            'errors': [], 'dry_run': dry_run,
+        }
+
+        rows = iter(rows)
+        while True:
+            try:
+                chunk = list(islice(rows, chunk_size))
+            except ValueError as e:
+                # The stream itself is unreadable from here on; keep what was applied
+                _add_error(report, None, str(e))
+                break
+            if not chunk:
+                break
+
+            competition_ids = ResultImportService._apply_chunk(chunk, directory, tournament_id, report)
+
+            if dry_run:
+                db.session.rollback()
+            else:
+                db.session.commit()
+                for competition_id in competition_ids:
+                    invalidate_competition(competition_id)
+
+        report['errors_truncated'] = report['failed'] > len(report['errors'])
+        return report
+
+    @staticmethod
+    def _apply_chunk(chunk, directory, tournament_id, report):
+        """Validate and apply one chunk in the current transaction; returns the competitions touched"""
+        parsed = []
+        for line_number, row, error in chunk:
+            report['rows'] += 1
+            if error is None:
+                try:
+                    parsed.append((line_number, _parse_row(row, directory)))
+                    continue
+                except ValueError as e:
+                    error = str(e)
+            _add_error(report, line_number, error)
+
+        by_id, by_fixture = ResultImportService._load_matches([data for _, data in parsed])
+
+        competition_ids = set()
+        batch = ResultBatch()
+        for line_number, data in parsed:
+            mark = batch.mark()
+            try:
+                match = ResultImportService._find_match(data, by_id, by_fixture, directory)
+                if match is None and not tournament_id:
+                    raise ValueError("No matching fixture found")
+
+                with db.session.begin_nested():
+                    if match is None:
+                        match = ResultImportService._create_match(tournament_id, data, batch)
+                        outcome = 'created'
+                    else:
+                        outcome = ResultImportService._update_match(match, data, batch)
+            except Exception as e:
+                batch.rollback_to(mark)
+                _add_error(report, line_number, str(e))
+                continue
+
+            report[outcome] += 1
+            competition_ids.add(match.competition_id or match.tournament_id)
+
+        batch.apply()
+        return competition_ids
+
+    @staticmethod
+    def _load_matches(rows):
+        """The chunk's existing matches in two queries: {id: match}, {(home, away, day): [match, ...]}"""
+        match_ids = {data['match_id'] for data in rows if data['match_id']}
+        fixtures = [data for data in rows if not data['match_id']]
+
+        by_id = {}
+        if match_ids:
+            by_id = {m.id: m for m in Match.query.filter(Match.id.in_(match_ids)).all()}
+
+        by_fixture = {}
+        if fixtures:
+            days = [data['match_date'].date() for data in fixtures]
+            candidates = Match.query.filter(
+                Match.home_team_id.in_({data['home_team_id'] for data in fixtures}),
+                Match.match_date >= datetime.combine(min(days), time.min),
+                Match.match_date < datetime.combine(max(days), time.min) + timedelta(days=1),
+            ).all()
+            for match in candidates:
+                key = (match.home_team_id, match.away_team_id, match.match_date.date())
+                by_fixture.setdefault(key, []).append(match)
+        return by_id, by_fixture
+
+    @staticmethod
+    def _find_match(data, by_id, by_fixture, directory):
+        if data['match_id']:
+            match = by_id.get(data['match_id'])
+            if match is None:
+                raise ValueError(f"Match {data['match_id']} not found")
+            if match.home_team_id not in directory.ids or match.away_team_id not in directory.ids:
+                raise ValueError(f"Match {data['match_id']} is outside your county")
+            return match
+
+        candidates = [
+            m for m in by_fixture.get((data['home_team_id'], data['away_team_id'], data['match_date'].date()), [])
+            if m.status != MatchStatus.cancelled
+        ]
+        if len(candidates) > 1:
+            raise ValueError("More than one fixture between these teams on that day; use match_id")
+        return candidates[0] if candidates else None
+
+    @staticmethod
+    def _update_match(match, data, batch):
+        """Apply a row to an existing match; returns 'updated' or 'unchanged'"""
+        if match.status in (MatchStatus.live, MatchStatus.paused):
+            raise ValueError("Match is in progress; finish it from the match console")
+
+        status = data['status']
+        if (
+            match.status == status
+            and match.home_score == data['home_score']
+            and match.away_score == data['away_score']
+            and (data['venue'] is None or match.venue == data['venue'])
+        ):
+            return 'unchanged'
+
+        update_match_result(
+            match, home_score=data['home_score'], away_score=data['away_score'], status=status.value,
+            batch=batch,
+        )
+        if match.status == MatchStatus.finished:
+            fill_finished_timing(match)
+        if data['venue'] is not None:
+            match.venue = data['venue']
+        return 'updated'
+
+    @staticmethod
+    def _create_match(tournament_id, data, batch):
+        match = new_tournament_match(tournament_id, {
+            'home_team_id': data['home_team_id'],
+            'away_team_id': data['away_team_id'],
+            'match_date': data['match_date'],
+            'venue': data['venue'],
+            'status': data['status'].value,
+            'home_score': data['home_score'],
+            'away_score': data['away_score'],
+        })
+        db.session.add(match)
+        db.session.flush()
+        if match.status == MatchStatus.finished:
+            apply_match_results(match, batch=batch)
+        return match
+
+
+def _parse_row(row, directory):
+    """Validated row: match or fixture identity, scores and status; ValueError describes the first problem"""
+    match_id = None
+    if row.get('match_id'):
+        try:
+            match_id = uuid.UUID(str(row['match_id']))
+        except ValueError:
+            raise ValueError(f"Invalid match_id '{row['match_id']}'")
+
+    home_team_id = away_team_id = match_date = None
+    if not match_id:
+        if not row.get('home_team') or not row.get('away_team') or not row.get('match_date'):
+            raise ValueError("Either match_id or home_team, away_team and match_date is required")
+        home_team_id = directory.resolve(row['home_team'])
+        away_team_id = directory.resolve(row['away_team'])
+        if home_team_id == away_team_id:
+            raise ValueError("Home and away team must differ")
+        match_date = _parse_date(row['match_date'])
+
+    status = row.get('status') or MatchStatus.finished.value
+    try:
+        status = MatchStatus(str(status).strip().lower())
+    except ValueError:
+        status = None
+    if status not in IMPORT_STATUSES:
+        raise ValueError(
+            f"Invalid status '{row.get('status')}', expected one of: "
+            f"{', '.join(s.value for s in IMPORT_STATUSES)}"
+        )
+
+    home_score = _parse_score(row.get('home_score'), 'home_score')
+    away_score = _parse_score(row.get('away_score'), 'away_score')
+    if status == MatchStatus.finished and (home_score is None or away_score is None):
+        raise ValueError("home_score and away_score are required for a finished match")
+
+    return {
+        'match_id': match_id,
+        'home_team_id': home_team_id,
+        'away_team_id': away_team_id,
+        'match_date': match_date,
+        'status': status,
+        'home_score': home_score or 0,
+        'away_score': away_score or 0,
+        'venue': row.get('venue') or None,
+    }
+
+
+def _parse_score(value, column):
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool) or not (isinstance(value, int) and value >= 0 or str(value).strip().isdigit()):
+        raise ValueError(f"{column} must be a whole number, got '{value}'")
+    return int(value)
+
+
+def _parse_date(value):
+    """Naive UTC datetime from an ISO date or datetime"""
+    try:
+        parsed = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"Invalid match_date '{value}', expected an ISO date")
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed.tzinfo else parsed
+
+
+def _normalise(row):
+    normalised = {}
+    for column, value in row.items():
+        field = COLUMN_ALIASES.get(str(column or '').strip().lower())
+        if field:
+            normalised[field] = value.strip() if isinstance(value, str) else value
+    return normalised
+
+
+def _name_key(name):
+    return ' '.join(str(name).split()).casefold()
+
+
+def _add_error(report, line_number, error):
+    report['failed'] += 1
+    if len(report['errors']) < MAX_REPORTED_ERRORS:
+        report['errors'].append({'line': line_number, 'error': error})
+
+
+@click.command('import-results')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(IMPORT_FORMATS), default=None,
+              help='File format (default: from the file extension)')
+@click.option('--county', 'county_id', default=None, help='Only accept teams of this county id')
+@click.option('--tournament', 'tournament_id', default=None, help='Create missing fixtures in this tournament')
+@click.option('--chunk-size', default=CHUNK_SIZE, type=int, help='Rows per transaction')
+@click.option('--dry-run', is_flag=True, help='Validate and report without committing')
+@with_appcontext
+def import_results(path, fmt, county_id, tournament_id, chunk_size, dry_run):
+    """Import match results from a CSV or JSON Lines file"""
+    try:
+        with open(path, newline='', encoding='utf-8-sig') as stream:
+            report = ResultImportService.import_results(
+                read_rows(stream, fmt or detect_format(filename=path)),
+                county_id=uuid.UUID(county_id) if county_id else None,
+                tournament_id=tournament_id,
+                chunk_size=chunk_size,
+                dry_run=dry_run,
+            )
+
+        for error in report['errors']:
+            click.echo(f"[!] Line {error['line']}: {error['error']}")
+        if report['errors_truncated']:
+            click.echo(f"[!] ... {report['failed'] - len(report['errors'])} more errors not shown")
+
+        summary = (
+            f"{report['rows']} rows: {report['updated']} updated, {report['created']} created, "
+            f"{report['unchanged']} unchanged, {report['failed']} failed"
+        )
+        click.echo(f"[OK] Dry run: {summary}" if dry_run else f"[OK] Imported {summary}")
+
+    except Exception as e:
+        db.session.rollback()
+        click.echo(f"[ERROR] Failed to import results: {str(e)}")
+        raise
+
+
+def register_import_results_command(app):
+    """Register the import-results command with the Flask app"""
+    app.cli.add_command(import_results)
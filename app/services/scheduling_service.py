@@ -1,276 +1,451 @@
 from app.extensions.db import db
 from app.models import (
-    Competition, CompetitionTeam, CompetitionGroup, KnockoutRound, Match
+    Competition, CompetitionTeam, CompetitionGroup, KnockoutRound, Match, Team, County
 )
 from app.models.enums import MatchStatus
-from datetime import datetime, timedelta
+from app.services import fixture_plan
+from app.services.group_draw import TeamLocation, UNKNOWN_LOCATION, draw_groups
+from app.services.fixture_generator import round_robin_matchdays, fixture_row, insert_fixtures
+from app.services.bracket_templates import round_name, next_slot
+from app.services.fixture_scheduler import FixtureScheduler
+from app.services.knockout_bracket import BracketTree
+from app.services.team_calendar import check_fixtures, describe_conflicts
+from app.services.cache_service import invalidate_competition
+from sqlalchemy import func, select, update, literal, cast, Integer
+from sqlalchemy.orm import aliased
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
 import random
 import uuid
 
 
+DRAW_STRATEGIES = ('random', 'geographic')
+
+
 class SchedulingService:
     """Service for generating fixtures/schedules for competitions"""
     
     @staticmethod
-    def generate_round_robin_fixtures(competition_id, start_date=None, days_between_matches=7):
-        """Generate round-robin fixtures for all teams"""
-        competition = Competition.query.get(competition_id)
-        if not competition:
-            raise ValueError(f"Competition {competition_id} not found")
-        
-        # Get all teams
-        comp_teams = CompetitionTeam.query.filter_by(competition_id=competition_id).all()
-        team_ids = [ct.team_id for ct in comp_teams]
+    def generate_fixtures(competition_id, start_date=None, days_between_matches=7, num_groups=4,
+                          seed=None, teams_fingerprint=None, draw_strategy='random', pots=None):
+        """
+        Generate fixtures for whatever format the competition uses.
+        Pass a preview's seed and teams_fingerprint to commit exactly that preview.
+        draw_strategy and pots only apply to group draws (see _plan).
+        """
+        competition, team_ids = SchedulingService._competition_teams(competition_id)
         
-        if len(team_ids) < 2:
-            raise ValueError("Need at least 2 teams for round-robin")
+        if teams_fingerprint and teams_fingerprint != fixture_plan.teams_fingerprint(team_ids):
+            raise ValueError("The competition's teams have changed since the preview was made")
         
-        if start_date is None:
-            start_date = datetime.utcnow()
+        if competition.format_type == 'round_robin':
+            return SchedulingService.generate_round_robin_fixtures(
+                competition_id,
+                start_date=start_date,
+                days_between_matches=days_between_matches
+            )
         
-        matches = []
-        match_date = start_date
+        if competition.format_type == 'knockout':
+            return SchedulingService.generate_knockout_brackets(
+                competition_id,
+                start_date=start_date,
+                days_between_rounds=days_between_matches,
+                seed=seed
+            )
         
-        # Generate fixtures for each leg
-        for leg in range(competition.legs):
-            # Generate all pairings
-            pairings = SchedulingService._generate_pairings(team_ids)
-            
-            for home_id, away_id in pairings:
-                match = Match(
-                    home_team_id=home_id,
-                    away_team_id=away_id,
-                    competition_id=competition_id,
-                    match_date=match_date,
-                    status=MatchStatus.scheduled,
-                    country='Kenya'  # Default
-                )
-                db.session.add(match)
-                matches.append(match)
-                
-                # Space out matches
-                match_date += timedelta(days=days_between_matches)
+        if competition.format_type == 'group_knockout':
+            return SchedulingService.generate_group_knockout_fixtures(
+                competition_id,
+                groups_config=num_groups,
+                start_date=start_date,
+                days_between_matches=days_between_matches,
+                seed=seed,
+                draw_strategy=draw_strategy,
+                pots=pots
+            )
         
-        db.session.commit()
-        return matches
+        return []
 
     @staticmethod
-    def generate_knockout_brackets(competition_id, start_date=None, days_between_rounds=14):
-        """Generate knockout bracket structure"""
-        competition = Competition.query.get(competition_id)
-        if not competition:
-            raise ValueError(f"Competition {competition_id} not found")
-        
-        comp_teams = CompetitionTeam.query.filter_by(competition_id=competition_id).all()
-        team_ids = [ct.team_id for ct in comp_teams]
-        
-        if len(team_ids) < 2:
-            raise ValueError("Need at least 2 teams for knockout")
+    def preview_fixtures(competition_id, start_date=None, days_between_matches=7, num_groups=4, seed=None,
+                         draw_strategy='random', pots=None):
+        """
+        What generate_fixtures would create, computed in memory without writing
+        anything, as columnar JSON. Commit it by calling generate_fixtures with
+        the returned seed and teams_fingerprint.
+        """
+        competition, team_ids = SchedulingService._competition_teams(competition_id)
         
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 31)
         if start_date is None:
             start_date = datetime.utcnow()
         
-        # Shuffle for random bracket assignment
-        random.shuffle(team_ids)
-        
-        # Determine bracket structure
-        rounds = SchedulingService._determine_knockout_rounds(len(team_ids))
-        
-        matches = []
-        match_date = start_date
-        
-        # Only generate the first round initially
-        round_name = rounds[0] if rounds else "First Round"
-        
-        # Create the knockout round
-        ko_round = KnockoutRound(
-            competition_id=competition_id,
-            round_name=round_name,
-            round_order=1,
-            matches_per_pairing=competition.legs,
-            status='active'  # Mark as active for current play
+        draw_stats = {}
+        plan = SchedulingService._plan(
+            competition, team_ids, competition.format_type, days_between_matches, num_groups, seed,
+            draw_strategy=draw_strategy, pots=pots, draw_stats=draw_stats
         )
-        db.session.add(ko_round)
-        db.session.flush()  # Get the ID
         
-        # Pair teams in this round
-        pairings = [(team_ids[i], team_ids[i+1]) 
-                   for i in range(0, len(team_ids) - 1, 2)]
-        
-        for home_id, away_id in pairings:
-            match = Match(
-                home_team_id=home_id,
-                away_team_id=away_id,
-                competition_id=competition_id,
-                knockout_round_id=ko_round.id,
-                match_date=match_date,
-                status=MatchStatus.scheduled,
-                country='Kenya'
-            )
-            db.session.add(match)
-            matches.append(match)
-            match_date += timedelta(days=days_between_rounds)
-        
-        # Note: Subsequent rounds will be generated after this round's results are posted
-        # The remaining teams logic is not used here since we only do first round
-        
-        db.session.commit()
-        return matches
+        names = dict(db.session.query(Team.id, Team.name).filter(Team.id.in_(team_ids)).all())
+        preview = fixture_plan.plan_columns(plan, {t: names.get(t) for t in team_ids}, start_date)
+        preview.update({
+            'competition_id': str(competition.id),
+            'format_type': competition.format_type,
+            'seed': seed,
+            'teams_fingerprint': fixture_plan.teams_fingerprint(team_ids),
+            'total_fixtures': len(plan.fixtures),
+        })
+        if draw_stats:
+            preview['draw'] = dict(draw_stats, strategy=draw_strategy)
+        return preview
+
+    @staticmethod
+    def generate_round_robin_fixtures(competition_id, start_date=None, days_between_matches=7):
+        """Generate round-robin fixtures for all teams"""
+        competition, team_ids = SchedulingService._competition_teams(competition_id)
+        plan = SchedulingService._plan(competition, team_ids, 'round_robin', days_between_matches)
+        return SchedulingService._write_plan(competition, plan, start_date)
+
+    @staticmethod
+    def generate_knockout_brackets(competition_id, start_date=None, days_between_rounds=14, seed=None):
+        """Generate the full knockout bracket with a random draw"""
+        competition, team_ids = SchedulingService._competition_teams(competition_id)
+        plan = SchedulingService._plan(competition, team_ids, 'knockout', days_between_rounds, seed=seed)
+        return SchedulingService._write_plan(competition, plan, start_date)
 
     @staticmethod
     def generate_group_knockout_fixtures(competition_id, groups_config=None, 
-                                        start_date=None, days_between_matches=7):
-        """Generate group stage + knockout fixtures"""
+                                        start_date=None, days_between_matches=7, seed=None,
+                                        draw_strategy='random', pots=None):
+        """Generate group stage fixtures; knockout fixtures are generated separately afterwards"""
+        competition, team_ids = SchedulingService._competition_teams(competition_id)
+        plan = SchedulingService._plan(
+            competition, team_ids, 'group_knockout', days_between_matches, groups_config, seed,
+            draw_strategy=draw_strategy, pots=pots
+        )
+        return SchedulingService._write_plan(competition, plan, start_date)
+
+    @staticmethod
+    def _competition_teams(competition_id):
+        """The competition and its team ids in seed order"""
         competition = Competition.query.get(competition_id)
         if not competition:
             raise ValueError(f"Competition {competition_id} not found")
         
-        comp_teams = CompetitionTeam.query.filter_by(competition_id=competition_id).all()
-        team_ids = [ct.team_id for ct in comp_teams]
+        team_ids = [
+            team_id for (team_id,) in db.session.query(CompetitionTeam.team_id)
+            .filter(CompetitionTeam.competition_id == competition_id)
+            .order_by(func.coalesce(CompetitionTeam.seeded_position, 1000000), CompetitionTeam.team_id)
+            .all()
+        ]
+        return competition, team_ids
+
+    @staticmethod
+    def _plan(competition, team_ids, format_type, days_between, num_groups=None, seed=None,
+              draw_strategy='random', pots=None, draw_stats=None):
+        """
+        In-memory FixturePlan for a format; draws are random but reproducible from `seed`.
         
-        if len(team_ids) < 4:
-            raise ValueError("Need at least 4 teams for group knockout")
+        Group draws use `draw_strategy`: 'random', or 'geographic' to minimise
+        travel within groups while keeping each of `pots` (lists of team ids,
+        or 'seeded' for pots of num_groups teams in seed order) spread evenly
+        over the groups. The optimizer's stats are written into `draw_stats`.
+        """
+        if draw_strategy not in DRAW_STRATEGIES:
+            raise ValueError(f"Unknown draw_strategy: {draw_strategy}. Use one of {', '.join(DRAW_STRATEGIES)}")
+        
+        rng = random.Random(seed)
+        
+        if format_type == 'round_robin':
+            if len(team_ids) < 2:
+                raise ValueError("Need at least 2 teams for round-robin")
+            return fixture_plan.round_robin_plan(team_ids, competition.legs, days_between)
+        
+        if format_type == 'knockout':
+            if len(team_ids) < 2:
+                raise ValueError("Need at least 2 teams for knockout")
+            # Shuffle for random bracket assignment
+            drawn = list(team_ids)
+            rng.shuffle(drawn)
+            return fixture_plan.knockout_plan(drawn, days_between)
+        
+        if format_type == 'group_knockout':
+            if len(team_ids) < 4:
+                raise ValueError("Need at least 4 teams for group knockout")
+            # Default: 4 groups if not specified
+            num_groups = num_groups or 4
+            draw = None
+            if draw_strategy == 'geographic' and len(team_ids) >= 2 * num_groups:
+                draw, stats = draw_groups(
+                    team_ids,
+                    SchedulingService._team_locations(team_ids),
+                    num_groups,
+                    SchedulingService._pot_lookup(competition.id, team_ids, num_groups, pots)
+                )
+                if draw_stats is not None:
+                    draw_stats.update(stats)
+            return fixture_plan.group_stage_plan(
+                team_ids, num_groups, competition.legs, days_between, rng, draw=draw
+            )
+        
+        raise ValueError(f"Unsupported format: {format_type}")
+
+    @staticmethod
+    def _team_locations(team_ids):
+        """TeamLocation per team id, from its county and region, in one query"""
+        rows = (
+            db.session.query(Team.id, Team.county_id, County.region_id, County.latitude, County.longitude)
+            .outerjoin(County, County.id == Team.county_id)
+            .filter(Team.id.in_(team_ids))
+            .all()
+        )
+        locations = {row[0]: TeamLocation(*row[1:]) for row in rows}
+        return [locations.get(team_id, UNKNOWN_LOCATION) for team_id in team_ids]
+
+    @staticmethod
+    def _pot_lookup(competition_id, team_ids, num_groups, pots):
+        """{team_id: pot} from a list of pots, or from seeded positions for 'seeded'"""
+        if not pots:
+            return None
         
+        if pots == 'seeded':
+            seeded = [
+                team_id for (team_id,) in db.session.query(CompetitionTeam.team_id)
+                .filter(
+                    CompetitionTeam.competition_id == competition_id,
+                    CompetitionTeam.seeded_position.isnot(None)
+                )
+                .order_by(CompetitionTeam.seeded_position)
+                .all()
+            ]
+            return {team_id: index // num_groups for index, team_id in enumerate(seeded)}
+        
+        if not isinstance(pots, list) or not all(isinstance(pot, list) for pot in pots):
+            raise ValueError("pots must be a list of team id lists, or 'seeded'")
+        
+        members = set(team_ids)
+        lookup = {}
+        for index, pot in enumerate(pots):
+            for team_id in pot:
+                try:
+                    team_id = team_id if isinstance(team_id, uuid.UUID) else uuid.UUID(str(team_id))
+                except ValueError:
+                    raise ValueError(f"Invalid team id in pots: {team_id}")
+                if team_id not in members:
+                    raise ValueError(f"Team {team_id} in pots is not in this competition")
+                if team_id in lookup:
+                    raise ValueError(f"Team {team_id} is in more than one pot")
+                lookup[team_id] = index
+        return lookup
+
+    @staticmethod
+    def _write_plan(competition, plan, start_date=None):
+        """
+        Create a plan's groups and rounds, then bulk-insert all its fixtures in
+        one statement. Refuses plans that would double-book a team.
+        """
         if start_date is None:
             start_date = datetime.utcnow()
         
-        # Default: 4 groups if not specified
-        num_groups = groups_config or 4
-        teams_per_group = len(team_ids) // num_groups
-        
-        if teams_per_group < 2:
-            raise ValueError(f"Cannot divide {len(team_ids)} teams into {num_groups} groups with at least 2 teams each")
-        
-        matches = []
-        match_date = start_date
-        
-        # Shuffle and divide into groups
-        random.shuffle(team_ids)
-        
-        # Create groups and assign teams
-        for group_idx in range(num_groups):
-            group = CompetitionGroup(
-                competition_id=competition_id,
-                name=f"Group {chr(65 + group_idx)}",  # Group A, B, C, D, etc.
-                group_order=group_idx + 1
-            )
-            db.session.add(group)
+        conflicts = check_fixtures(
+            {'home_team_id': home_id, 'away_team_id': away_id, 'match_date': start_date + timedelta(days=day)}
+            for home_id, away_id, day, _, _, _ in plan.fixtures
+        )
+        if conflicts:
+            raise ValueError(describe_conflicts(conflicts))
+        
+        group_ids = []
+        if plan.groups:
+            groups = [
+                CompetitionGroup(competition_id=competition.id, name=name, group_order=order)
+                for name, order, _ in plan.groups
+            ]
+            db.session.add_all(groups)
             db.session.flush()
             
-            # Get teams for this group
-            start_idx = group_idx * teams_per_group
-            end_idx = start_idx + teams_per_group
-            group_team_ids = team_ids[start_idx:end_idx]
-            
-            # Assign teams to group
-            for comp_team in comp_teams:
-                if comp_team.team_id in group_team_ids:
-                    comp_team.group_id = group.id
-            
-            # Generate round-robin within group
-            pairings = SchedulingService._generate_pairings(group_team_ids)
-            
-            for home_id, away_id in pairings:
-                match = Match(
-                    home_team_id=home_id,
-                    away_team_id=away_id,
-                    competition_id=competition_id,
-                    group_id=group.id,
-                    match_date=match_date,
-                    status=MatchStatus.scheduled,
-                    country='Kenya'
+            # Assign teams to their groups
+            for group, (_, _, members) in zip(groups, plan.groups):
+                db.session.execute(
+                    update(CompetitionTeam)
+                    .where(
+                        CompetitionTeam.competition_id == competition.id,
+                        CompetitionTeam.team_id.in_(members)
+                    )
+                    .values(group_id=group.id)
                 )
-                db.session.add(match)
-                matches.append(match)
-                match_date += timedelta(days=days_between_matches)
-        
-        # After group stage, knockout fixtures will be generated separately
-        # ko_round = KnockoutRound(
-        #     competition_id=competition_id,
-        #     round_name="Knockout",
-        #     round_order=num_groups + 1,
-        #     matches_per_pairing=competition.legs,
-        #     status='pending'
-        # )
-        # db.session.add(ko_round)
+            group_ids = [group.id for group in groups]
+        
+        round_ids = []
+        if plan.rounds:
+            rounds = [
+                KnockoutRound(
+                    competition_id=competition.id,
+                    round_name=name,
+                    round_order=order,
+                    matches_per_pairing=competition.legs,
+                    status=status
+                )
+                for name, order, status in plan.rounds
+            ]
+            db.session.add_all(rounds)
+            db.session.flush()
+            round_ids = [ko_round.id for ko_round in rounds]
+        
+        matches = insert_fixtures([
+            fixture_row(
+                home_id, away_id, start_date + timedelta(days=day),
+                competition_id=competition.id,
+                group_id=group_ids[group] if group is not None else None,
+                knockout_round_id=round_ids[round_index] if round_index is not None else None,
+                bracket_slot=slot,
+                country='Kenya'  # Default
+            )
+            for home_id, away_id, day, group, round_index, slot in plan.fixtures
+        ])
         
         db.session.commit()
         return matches
 
     @staticmethod
-    def _generate_pairings(team_ids):
-        """Generate all unique pairings for round-robin"""
-        pairings = []
-        n = len(team_ids)
-        
-        for i in range(n):
-            for j in range(i + 1, n):
-                pairings.append((team_ids[i], team_ids[j]))
-        
-        return pairings
+    def schedule_with_constraints(competition_id, constraints, commit=False):
+        """
+        Generate round-robin fixtures and place them on a calendar that respects
+        `constraints` (a fixture_scheduler.ScheduleConstraints).
 
-    @staticmethod
-    def _determine_knockout_rounds(num_teams):
-        """Determine knockout round names based on number of teams"""
-        rounds = []
-        
-        # Find the power of 2 that's >= num_teams
-        power_of_2 = 1
-        while power_of_2 < num_teams:
-            power_of_2 *= 2
-        
-        # If not a power of 2, we need preliminary rounds to get to power of 2
-        if power_of_2 > num_teams:
-            # Add preliminary rounds
-            if num_teams > 128:
-                rounds.append("Qualifying Round 1")
-                rounds.append("Qualifying Round 2")
-            elif num_teams > 64:
-                rounds.append("Preliminary Round")
-            elif num_teams > 32:
-                rounds.append("Round of 64")
-            elif num_teams > 16:
-                rounds.append("Round of 32")
-        
-        # Now add the standard tournament rounds from power_of_2 down to 2
-        current_round = power_of_2
-        while current_round >= 2:
-            if current_round == 256:
-                rounds.append("Round of 256")
-            elif current_round == 128:
-                rounds.append("Round of 128")
-            elif current_round == 64:
-                rounds.append("Round of 64")
-            elif current_round == 32:
-                rounds.append("Round of 32")
-            elif current_round == 16:
-                rounds.append("Round of 16")
-            elif current_round == 8:
-                rounds.append("Quarter-Finals")
-            elif current_round == 4:
-                rounds.append("Semi-Finals")
-            elif current_round == 2:
-                rounds.append("Final")
-            
-            current_round //= 2
-        
-        return rounds
+        Teams already assigned to groups play within their group, with the
+        groups sharing matchdays. In dry-run mode nothing is written and the
+        proposed calendar is returned; with commit=True the fixtures are
+        bulk-inserted, and only if every fixture could be placed.
+        """
+        competition = Competition.query.get(competition_id)
+        if not competition:
+            raise ValueError(f"Competition {competition_id} not found")
+
+        comp_teams = CompetitionTeam.query.filter_by(competition_id=competition_id).all()
+        if len(comp_teams) < 2:
+            raise ValueError("Need at least 2 teams to schedule fixtures")
+
+        groups = {}
+        for ct in comp_teams:
+            groups.setdefault(ct.group_id, []).append(ct.team_id)
+
+        # Merge each group's matchdays index-wise so groups play on the same weeks
+        matchdays = []
+        for group_id, group_team_ids in groups.items():
+            extra = {'competition_id': competition_id, 'group_id': group_id, 'country': 'Kenya'}
+            for index, pairs in enumerate(round_robin_matchdays(group_team_ids, legs=competition.legs)):
+                if index == len(matchdays):
+                    matchdays.append([])
+                matchdays[index].extend((home_id, away_id, extra) for home_id, away_id in pairs)
+
+        team_ids = [ct.team_id for ct in comp_teams]
+        busy = FixtureScheduler.busy_dates(
+            team_ids, constraints.start_date - timedelta(days=constraints.min_rest_days)
+        )
+        result = FixtureScheduler(constraints, busy).solve(matchdays)
+
+        summary = {
+            'fixtures': len(result['rows']) + len(result['unscheduled']),
+            'scheduled': len(result['rows']),
+            'repaired': result['repaired'],
+            'unscheduled': result['unscheduled'],
+            'first_match': result['rows'][0]['match_date'].isoformat() if result['rows'] else None,
+            'last_match': result['rows'][-1]['match_date'].isoformat() if result['rows'] else None,
+        }
+
+        if not commit:
+            summary['fixtures_preview'] = [
+                {
+                    'home_team_id': str(row['home_team_id']),
+                    'away_team_id': str(row['away_team_id']),
+                    'group_id': str(row['group_id']) if row['group_id'] else None,
+                    'match_date': row['match_date'].isoformat(),
+                    'venue': row['venue'],
+                }
+                for row in result['rows']
+            ]
+            return summary
+
+        if result['unscheduled']:
+            raise ValueError(
+                f"{len(result['unscheduled'])} fixtures could not be placed under the given constraints"
+            )
+
+        insert_fixtures(result['rows'])
+        db.session.commit()
+        return summary
 
     @staticmethod
-    def reschedule_matches(competition_id, start_date, days_between_matches=7):
-        """Reschedule all unplayed matches in a competition"""
-        matches = Match.query.filter_by(competition_id=competition_id).filter(
-            Match.status != 'completed'
-        ).order_by(Match.match_date).all()
-        
-        match_date = start_date
-        
-        for match in matches:
-            match.match_date = match_date
-            match_date += timedelta(days=days_between_matches)
-        
+    def reschedule_matches(competition_id, start_date, days_between_matches=7,
+                           group_id=None, knockout_round_id=None, return_rows=False):
+        """
+        Reschedule the scheduled (not yet played) matches of a competition,
+        optionally only those of one group or knockout round, keeping their
+        current order and spacing match days `days_between_matches` apart;
+        matches that shared a day still share one.
+
+        Runs as a single UPDATE: new dates come from DENSE_RANK() over the
+        current match day, so no match is loaded into Python. The new dates
+        are checked against the teams' calendars before committing; a clash
+        rolls back and raises ValueError. Returns a summary, with the changed
+        (id, match_date) rows if `return_rows` is set.
+        """
+        if start_date.tzinfo is not None:
+            # match_date is stored as naive UTC
+            start_date = start_date.astimezone(timezone.utc).replace(tzinfo=None)
+
+        conditions = [
+            Match.competition_id == competition_id,
+            Match.status == MatchStatus.scheduled,
+        ]
+        if group_id is not None:
+            conditions.append(Match.group_id == group_id)
+        if knockout_round_id is not None:
+            conditions.append(Match.knockout_round_id == knockout_round_id)
+
+        numbered = (
+            select(
+                Match.id.label('id'),
+                (func.dense_rank().over(order_by=func.date(Match.match_date)) - 1).label('position')
+            )
+            .where(*conditions)
+            .subquery()
+        )
+
+        statement = (
+            update(Match)
+            .where(Match.id == numbered.c.id)
+            .values(match_date=_add_days(start_date, numbered.c.position * days_between_matches))
+            .returning(Match.id, Match.match_date, Match.home_team_id, Match.away_team_id)
+            .execution_options(synchronize_session=False)
+        )
+        rows = db.session.execute(statement).all()
+
+        conflicts = check_fixtures(
+            [
+                {'id': match_id, 'home_team_id': home_id, 'away_team_id': away_id, 'match_date': match_date}
+                for match_id, match_date, home_id, away_id in rows
+            ],
+            exclude_match_ids=[row[0] for row in rows],
+        )
+        if conflicts:
+            db.session.rollback()
+            raise ValueError(describe_conflicts(conflicts))
         db.session.commit()
-        return matches
+
+        dates = sorted(row[1] for row in rows)
+        summary = {
+            'updated_count': len(rows),
+            'first_match_date': dates[0].isoformat() if rows else None,
+            'last_match_date': dates[-1].isoformat() if rows else None,
+        }
+        if return_rows:
+            summary['matches'] = [
+                {'id': str(match_id), 'match_date': match_date.isoformat()}
+                for match_id, match_date, _, _ in sorted(rows, key=lambda row: row[1])
+            ]
+        return summary
 
     @staticmethod
     def generate_knockout_from_teams(competition_id, team_ids, start_date=None, days_between_rounds=14):
@@ -282,113 +457,28 @@ class SchedulingService:
         if len(team_ids) < 2:
             raise ValueError("Need at least 2 teams for knockout")
         
-        if start_date is None:
-            start_date = datetime.utcnow()
-        
-        # Sort teams by seeded position or name for seeding
-        comp_teams = CompetitionTeam.query.filter(
-            CompetitionTeam.competition_id == competition_id,
-            CompetitionTeam.team_id.in_(team_ids)
-        ).all()
-        
-        # Sort by seeded_position, then by team name
-        comp_teams.sort(key=lambda ct: (ct.seeded_position or 999, ct.team.name if ct.team else ''))
-        sorted_team_ids = [ct.team_id for ct in comp_teams]
-        
-        # Determine bracket structure
-        num_teams = len(sorted_team_ids)
-        rounds = SchedulingService._determine_knockout_rounds(num_teams)
-        
-        matches = []
-        match_date = start_date
-        
-        # Assign teams to bracket positions
-        bracket_positions = SchedulingService._assign_bracket_positions(sorted_team_ids)
-        
-        round_order = 1
-        
-        for round_name in rounds:
-            # Create the knockout round
-            ko_round = KnockoutRound(
-                competition_id=competition_id,
-                round_name=round_name,
-                round_order=round_order,
-                matches_per_pairing=competition.legs,
-                status='pending'
+        # Seed by seeded_position, then by team name
+        sorted_team_ids = [
+            team_id for (team_id,) in db.session.query(CompetitionTeam.team_id)
+            .join(Team, Team.id == CompetitionTeam.team_id)
+            .filter(
+                CompetitionTeam.competition_id == competition_id,
+                CompetitionTeam.team_id.in_(team_ids)
             )
-            db.session.add(ko_round)
-            db.session.flush()
-            
-            # Get teams for this round
-            round_teams = bracket_positions.get(round_name, [])
-            
-            # Pair teams
-            round_matches = []
-            for i in range(0, len(round_teams) - 1, 2):
-                home_id = round_teams[i]
-                away_id = round_teams[i+1]
-                match = Match(
-                    home_team_id=home_id,
-                    away_team_id=away_id,
-                    competition_id=competition_id,
-                    knockout_round_id=ko_round.id,
-                    match_date=match_date,
-                    status=MatchStatus.scheduled,
-                    country='Kenya'
-                )
-                db.session.add(match)
-                matches.append(match)
-                round_matches.append(match)
-                match_date += timedelta(days=days_between_rounds)
-            
-            # For next round, winners will be assigned later
-            # For now, prepare positions for next round
-            if round_matches:
-                next_round_name = rounds[rounds.index(round_name) + 1] if rounds.index(round_name) + 1 < len(rounds) else None
-                if next_round_name:
-                    # Placeholder for winners
-                    bracket_positions[next_round_name] = [None] * (len(round_matches) // 2 * 2)
-            
-            round_order += 1
+            .order_by(func.coalesce(CompetitionTeam.seeded_position, 999), Team.name)
+            .all()
+        ]
         
-        db.session.commit()
-        return matches
-
-    @staticmethod
-    def _assign_bracket_positions(team_ids):
-        """Assign teams to bracket positions for UEFA-style seeding"""
-        positions = {}
-        num_teams = len(team_ids)
-        
-        # Determine the starting round based on number of teams
-        if num_teams == 16:
-            # Round of 16: seed 1 vs 16, 2 vs 15, etc.
-            round_teams = []
-            for i in range(8):
-                round_teams.extend([team_ids[i], team_ids[15-i]])
-            positions['Round of 16'] = round_teams
-        elif num_teams == 8:
-            # Quarter-Finals
-            round_teams = []
-            for i in range(4):
-                round_teams.extend([team_ids[i], team_ids[7-i]])
-            positions['Quarter-Finals'] = round_teams
-        elif num_teams == 4:
-            # Semi-Finals
-            positions['Semi-Finals'] = [team_ids[0], team_ids[3], team_ids[1], team_ids[2]]
-        elif num_teams == 2:
-            # Final
-            positions['Final'] = team_ids
-        else:
-            # For other numbers, pair sequentially
-            positions['First Round'] = team_ids
+        if len(sorted_team_ids) < 2:
+            raise ValueError("Need at least 2 teams from this competition for knockout")
         
-        return positions
+        plan = fixture_plan.knockout_plan(sorted_team_ids, days_between_rounds)
+        return SchedulingService._write_plan(competition, plan, start_date)
 
     @staticmethod
     def generate_next_knockout_round(competition_id, current_round_order):
         """
-        Auto-generate the next knockout round based on winners of current round.
+        Advance the winners of a round into the next round's ties.
         This is called after all matches in a round are completed.
         """
         competition = Competition.query.get(competition_id)
@@ -412,125 +502,204 @@ class SchedulingService:
         if incomplete_matches > 0:
             raise ValueError("Cannot generate next round - all matches in current round must be completed")
         
-        # Get all matches and determine winners
-        matches = Match.query.filter_by(knockout_round_id=current_round.id).all()
+        # Get all matches in bracket order and determine winners
+        matches = Match.query.filter_by(knockout_round_id=current_round.id).order_by(
+            Match.bracket_slot, Match.match_date
+        ).all()
         winners = []
         
-        for match in matches:
+        for index, match in enumerate(matches):
+            slot = match.bracket_slot if match.bracket_slot is not None else index
             if match.home_score > match.away_score:
-                winners.append(match.home_team_id)
+                winners.append((slot, match.home_team_id))
             elif match.away_score > match.home_score:
-                winners.append(match.away_team_id)
+                winners.append((slot, match.away_team_id))
             else:
                 # Handle draws - could use extra time, penalties, etc.
                 # For now, use home team as winner (admin can override)
-                winners.append(match.home_team_id)
-        
-        # If only one winner, tournament is complete
-        if len(winners) <= 1:
-            return None
+                winners.append((slot, match.home_team_id))
         
-        # Create next round
-        next_round_order = current_round_order + 1
+        next_round = KnockoutRound.query.filter_by(
+            competition_id=competition_id,
+            round_order=current_round_order + 1
+        ).first()
         
-        # Determine next round name
-        if len(winners) == 2:
-            next_round_name = "Final"
-        elif len(winners) == 4:
-            next_round_name = "Semi-Finals"
-        elif len(winners) == 8:
-            next_round_name = "Quarter-Finals"
+        if next_round is None:
+            # If only one winner, tournament is complete
+            if len(winners) <= 1:
+                return None
+            
+            # Brackets created before templates only have the rounds played so far
+            next_round = KnockoutRound(
+                competition_id=competition_id,
+                round_name=round_name(2 * len({next_slot(slot)[0] for slot, _ in winners})),
+                round_order=current_round_order + 1,
+                matches_per_pairing=competition.legs,
+                status='pending'
+            )
+            db.session.add(next_round)
+            db.session.flush()
+            ties = {}
         else:
-            next_round_name = f"Round of {len(winners)}"
-        
-        next_round = KnockoutRound(
-            competition_id=competition_id,
-            round_name=next_round_name,
-            round_order=next_round_order,
-            matches_per_pairing=competition.legs,
-            status='pending'
-        )
-        db.session.add(next_round)
-        db.session.flush()
+            ties = {m.bracket_slot: m for m in Match.query.filter_by(knockout_round_id=next_round.id)}
         
-        # Generate matches for next round
-        matches_list = []
         match_date = datetime.utcnow() + timedelta(days=14)  # Default 2 weeks after current round
         
-        for i in range(0, len(winners) - 1, 2):
-            match = Match(
-                home_team_id=winners[i],
-                away_team_id=winners[i+1],
-                competition_id=competition_id,
-                knockout_round_id=next_round.id,
-                match_date=match_date,
-                status=MatchStatus.scheduled,
-                country='Kenya'
-            )
-            db.session.add(match)
-            matches_list.append(match)
-            match_date += timedelta(days=7)
+        for slot, winner_id in winners:
+            tie_slot, home = next_slot(slot)
+            match = ties.get(tie_slot)
+            if match is None:
+                match = Match(
+                    competition_id=competition_id,
+                    knockout_round_id=next_round.id,
+                    bracket_slot=tie_slot,
+                    match_date=match_date,
+                    status=MatchStatus.scheduled,
+                    country='Kenya'
+                )
+                db.session.add(match)
+                ties[tie_slot] = match
+            
+            if home:
+                match.home_team_id = winner_id
+            else:
+                match.away_team_id = winner_id
+        
+        current_round.status = 'completed'
+        next_round.status = 'active'
         
         db.session.commit()
-        return matches_list
+        invalidate_competition(competition_id)
+        return [ties[slot] for slot in sorted(ties)]
 
     @staticmethod
     def get_knockout_bracket(competition_id):
         """
         Get the complete knockout bracket structure with all rounds and matches.
         Used for visualization.
+
+        Rounds, matches and both teams come from one query. Ties are placed in
+        a BracketTree, which links every match to the tie its winner feeds
+        into and the ties that fed it.
         """
-        competition = Competition.query.get(competition_id)
-        if not competition:
+        home_team = aliased(Team)
+        away_team = aliased(Team)
+
+        rows = (
+            db.session.query(
+                Competition.name,
+                KnockoutRound.id,
+                KnockoutRound.round_order,
+                KnockoutRound.round_name,
+                KnockoutRound.status,
+                Match.id,
+                Match.home_team_id,
+                Match.away_team_id,
+                home_team.name,
+                away_team.name,
+                Match.home_score,
+                Match.away_score,
+                Match.status,
+                Match.match_date,
+                Match.bracket_slot,
+            )
+            .select_from(Competition)
+            .outerjoin(KnockoutRound, KnockoutRound.competition_id == Competition.id)
+            .outerjoin(Match, Match.knockout_round_id == KnockoutRound.id)
+            .outerjoin(home_team, home_team.id == Match.home_team_id)
+            .outerjoin(away_team, away_team.id == Match.away_team_id)
+            .filter(Competition.id == competition_id)
+            .order_by(
+                KnockoutRound.round_order,
+                Match.bracket_slot.is_(None),
+                Match.bracket_slot,
+                Match.match_date,
+                Match.id
+            )
+            .all()
+        )
+
+        if not rows:
             raise ValueError(f"Competition {competition_id} not found")
-        
-        # Get all knockout rounds
-        rounds = KnockoutRound.query.filter_by(competition_id=competition_id).order_by(
-            KnockoutRound.round_order
-        ).all()
-        
-        if not rounds:
+        if rows[0][1] is None:
             return {}
-        
+
         bracket = {
             'competition_id': str(competition_id),
-            'competition_name': competition.name,
+            'competition_name': rows[0][0],
             'rounds': []
         }
-        
-        for round_obj in rounds:
-            matches = Match.query.filter_by(knockout_round_id=round_obj.id).order_by(
-                Match.match_date
-            ).all()
-            
+
+        placements = []
+        for round_key, round_rows in groupby(rows, key=lambda row: row[1]):
+            round_rows = list(round_rows)
+            _, round_id, round_order, round_name, round_status = round_rows[0][:5]
+
             round_data = {
-                'round_id': str(round_obj.id),
-                'round_order': round_obj.round_order,
-                'round_name': round_obj.round_name,
-                'status': round_obj.status,
+                'round_id': str(round_id),
+                'round_order': round_order,
+                'round_name': round_name,
+                'status': round_status,
                 'matches': []
             }
-            
-            for match in matches:
-                from app.models.team import Team
-                home_team = Team.query.get(match.home_team_id)
-                away_team = Team.query.get(match.away_team_id)
-                
+
+            for index, (*_, match_id, home_id, away_id, home_name, away_name,
+                        home_score, away_score, status, match_date, slot) in enumerate(round_rows):
+                if match_id is None:
+                    continue
+
+                winner_id = None
+                if status == MatchStatus.finished and home_score is not None and away_score is not None:
+                    if home_score > away_score:
+                        winner_id = str(home_id)
+                    elif away_score > home_score:
+                        winner_id = str(away_id)
+
                 match_data = {
-                    'match_id': str(match.id),
-                    'home_team_id': str(match.home_team_id),
-                    'home_team_name': home_team.name if home_team else 'TBD',
-                    'away_team_id': str(match.away_team_id),
-                    'away_team_name': away_team.name if away_team else 'TBD',
-                    'home_score': match.home_score,
-                    'away_score': match.away_score,
-                    'status': match.status.value if match.status else 'scheduled',
-                    'match_date': match.match_date.isoformat() if match.match_date else None,
-                    'winner_id': str(match.home_team_id) if match.home_score and match.away_score and match.home_score > match.away_score 
-                                  else (str(match.away_team_id) if match.away_score and match.home_score and match.away_score > match.home_score else None)
+                    'match_id': str(match_id),
+                    'home_team_id': str(home_id) if home_id else None,
+                    'home_team_name': home_name or 'TBD',
+                    'away_team_id': str(away_id) if away_id else None,
+                    'away_team_name': away_name or 'TBD',
+                    'home_score': home_score,
+                    'away_score': away_score,
+                    'status': status.value if status else 'scheduled',
+                    'match_date': match_date.isoformat() if match_date else None,
+                    'winner_id': winner_id,
+                    # Matches created before bracket slots were recorded keep their date order
+                    'bracket_slot': slot if slot is not None else index,
                 }
                 round_data['matches'].append(match_data)
-            
+                placements.append((round_order, match_data))
+
             bracket['rounds'].append(round_data)
-        
+
+        first_round = bracket['rounds'][0]
+        tree = BracketTree(BracketTree.rounds_for(
+            len({m['bracket_slot'] for m in first_round['matches']}),
+            max(r['round_order'] for r in bracket['rounds'])
+        ))
+        for round_order, match_data in placements:
+            node = tree.node_index(round_order, match_data['bracket_slot'])
+            match_data['node'] = node
+            if node is not None:
+                tree.add(node, match_data)
+
+        for round_order, match_data in placements:
+            node = match_data.pop('node')
+            parent = tree.get(BracketTree.parent(node)) if node is not None else None
+            match_data['next_match_id'] = parent[0]['match_id'] if parent else None
+            match_data['feeder_match_ids'] = [
+                feeder[0]['match_id']
+                for feeder in map(tree.get, BracketTree.children(node) if node is not None else ())
+                if feeder
+            ]
+
         return bracket
+
+
+def _add_days(start, days):
+    """SQL expression for the datetime `start` plus an integer expression of days"""
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return func.datetime(literal(start.isoformat(sep=' ')), func.printf('+%d days', days))
+    return literal(start) + func.make_interval(0, 0, 0, cast(days, Integer))
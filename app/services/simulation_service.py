@@ -0,0 +1,274 @@
+"""
+Monte Carlo simulation of a competition's remaining fixtures.
+
+Each remaining match is sampled as two independent Poisson scores whose means
+come from the teams' attack/defence rates so far. Iterations are sampled in
+chunks as (iterations x fixtures) arrays and folded into the table with
+fixture/team incidence matrices, so a chunk is a handful of NumPy calls.
+Chunks are spread over a process pool and every chunk has its own seed, so
+results only depend on `seed`, not on the number of workers.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from app.extensions.db import db
+from app.models import Competition, CompetitionAdvancementRule, Match
+from app.models.enums import MatchStatus
+from app.services.cache_service import VersionedCache, competition_version
+from app.services.competition_service import CompetitionService
+from app.services.promotion_service import PromotionService
+
+
+REMAINING_STATUSES = (MatchStatus.scheduled, MatchStatus.live, MatchStatus.paused)
+
+DEFAULT_ITERATIONS = 10000
+MAX_ITERATIONS = 100000
+CHUNK_SIZE = 2500
+
+# Home advantage applied to the home side's scoring rate
+HOME_ADVANTAGE = 1.1
+
+# Matches worth of league-average form mixed into every team's rates,
+# so teams with few games don't get extreme strengths
+PRIOR_MATCHES = 3
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """Process pool shared by all simulations in this process"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, 8))
+        return _pool
+
+
+def _simulate_chunk(seed, iterations, base, home_idx, away_idx, home_rate, away_rate, points):
+    """
+    Simulate `iterations` seasons and return an (N x N) count matrix of
+    team index x finishing position. Module level so it can run in a worker.
+    """
+    rng = np.random.default_rng(seed)
+    base_points, base_gd, base_gf = base
+    n_teams = base_points.shape[0]
+    n_fixtures = home_idx.shape[0]
+    points_win, points_draw, points_loss = points
+
+    home_goals = rng.poisson(home_rate, size=(iterations, n_fixtures))
+    away_goals = rng.poisson(away_rate, size=(iterations, n_fixtures))
+
+    # Fixture -> team incidence matrices
+    home_matrix = np.zeros((n_fixtures, n_teams), dtype=np.int32)
+    away_matrix = np.zeros((n_fixtures, n_teams), dtype=np.int32)
+    home_matrix[np.arange(n_fixtures), home_idx] = 1
+    away_matrix[np.arange(n_fixtures), away_idx] = 1
+
+    home_points = np.where(
+        home_goals > away_goals, points_win,
+        np.where(home_goals == away_goals, points_draw, points_loss)
+    )
+    away_points = np.where(
+        away_goals > home_goals, points_win,
+        np.where(home_goals == away_goals, points_draw, points_loss)
+    )
+
+    total_points = base_points + home_points @ home_matrix + away_points @ away_matrix
+    goal_diff = (home_goals - away_goals) @ (home_matrix - away_matrix)
+    total_gd = base_gd + goal_diff
+    total_gf = base_gf + home_goals @ home_matrix + away_goals @ away_matrix
+
+    # Rank on points, goal difference, goals for; remaining ties are random.
+    # lexsort sorts ascending on the last key first, so negate for "higher is better".
+    noise = rng.random((iterations, n_teams))
+    order = np.lexsort((noise, -total_gf, -total_gd, -total_points), axis=-1)
+
+    positions = np.empty_like(order)
+    np.put_along_axis(positions, order, np.arange(n_teams)[None, :].repeat(iterations, axis=0), axis=-1)
+
+    counts = np.bincount(
+        (np.arange(n_teams)[None, :] * n_teams + positions).ravel(),
+        minlength=n_teams * n_teams
+    )
+    return counts.reshape(n_teams, n_teams)
+
+
+class SimulationService:
+    """Season outcome probabilities from simulated remaining fixtures"""
+
+    _results = VersionedCache(max_entries=64)
+
+    @staticmethod
+    def simulate(competition_id, iterations=DEFAULT_ITERATIONS, rules=None, seed=0, parallel=True):
+        """
+        Simulate the rest of a competition's season.
+
+        `rules` follows PromotionService.promote_rules ({"promote": n, "relegate": m});
+        when omitted, promotion uses the competition's top_positions advancement rule.
+        Results are cached per competition version, iteration count, rules and seed.
+        """
+        competition = db.session.get(Competition, competition_id)
+        if not competition:
+            raise ValueError(f"Competition {competition_id} not found")
+
+        iterations = int(iterations)
+        if iterations < 1 or iterations > MAX_ITERATIONS:
+            raise ValueError(f"iterations must be between 1 and {MAX_ITERATIONS}")
+
+        if rules is None:
+            rules = SimulationService.default_rules(competition_id)
+
+        key = ("simulation", str(competition_id), iterations,
+               rules.get("promote", 0), rules.get("relegate", 0), seed)
+        version = competition_version(competition_id)
+
+        result = SimulationService._results.get(key, version)
+        if result is None:
+            result = SimulationService._run(competition, iterations, rules, seed, parallel)
+            SimulationService._results.set(key, version, result)
+
+        return result
+
+    @staticmethod
+    def default_rules(competition_id):
+        """Promotion places from the competition's top_positions rule, if any"""
+        rule = CompetitionAdvancementRule.query.filter_by(
+            from_competition_id=competition_id,
+            rule_type='top_positions'
+        ).first()
+        return {"promote": (rule.advancement_positions or 0) if rule else 0, "relegate": 0}
+
+    @staticmethod
+    def _run(competition, iterations, rules, seed, parallel):
+        standings = CompetitionService.get_competition_standings(competition.id)
+        team_index = {row["team_id"]: i for i, row in enumerate(standings)}
+        n_teams = len(standings)
+
+        fixtures = [
+            (team_index[str(home_id)], team_index[str(away_id)])
+            for home_id, away_id in (
+                db.session.query(Match.home_team_id, Match.away_team_id)
+                .filter(
+                    Match.competition_id == competition.id,
+                    Match.status.in_(REMAINING_STATUSES)
+                )
+                .all()
+            )
+            if str(home_id) in team_index and str(away_id) in team_index
+        ]
+
+        points = (competition.points_win or 0, competition.points_draw or 0, competition.points_loss or 0)
+        base = (
+            np.array([row["points"] for row in standings], dtype=np.int64),
+            np.array([row["goal_difference"] for row in standings], dtype=np.int64),
+            np.array([row["goals_for"] for row in standings], dtype=np.int64),
+        )
+
+        if n_teams == 0:
+            counts = np.zeros((0, 0), dtype=np.int64)
+        elif not fixtures:
+            # Nothing left to play: the current table is final
+            counts = np.zeros((n_teams, n_teams), dtype=np.int64)
+            counts[np.arange(n_teams), np.arange(n_teams)] = iterations
+        else:
+            home_idx = np.array([h for h, _ in fixtures], dtype=np.int64)
+            away_idx = np.array([a for _, a in fixtures], dtype=np.int64)
+            home_rate, away_rate = SimulationService._scoring_rates(standings, home_idx, away_idx)
+            counts = SimulationService._run_chunks(
+                iterations, seed, parallel, base, home_idx, away_idx, home_rate, away_rate, points
+            )
+
+        probabilities = counts / float(iterations) if n_teams else counts
+        odds = PromotionService.promotion_odds(probabilities, rules)
+
+        expected_points = base[0].astype(float)
+        if fixtures:
+            expected_points = SimulationService._expected_points(
+                base[0], home_idx, away_idx, home_rate, away_rate, points
+            )
+
+        teams = []
+        for i, row in enumerate(standings):
+            teams.append({
+                "team_id": row["team_id"],
+                "team_name": row["team_name"],
+                "current_position": i + 1,
+                "points": row["points"],
+                "expected_points": round(float(expected_points[i]), 2),
+                "position_probabilities": [round(float(p), 4) for p in probabilities[i]],
+                "promotion_probability": round(float(odds["promoted"][i]), 4),
+                "relegation_probability": round(float(odds["relegated"][i]), 4),
+            })
+
+        return {
+            "competition_id": str(competition.id),
+            "iterations": iterations,
+            "remaining_fixtures": len(fixtures),
+            "rules": {"promote": rules.get("promote", 0), "relegate": rules.get("relegate", 0)},
+            "teams": teams,
+        }
+
+    @staticmethod
+    def _scoring_rates(standings, home_idx, away_idx):
+        """Poisson means per fixture from shrunk attack/defence rates"""
+        played = np.array([row["played"] for row in standings], dtype=float)
+        scored = np.array([row["goals_for"] for row in standings], dtype=float)
+        conceded = np.array([row["goals_against"] for row in standings], dtype=float)
+
+        total_played = played.sum()
+        average = scored.sum() / total_played if total_played else 1.3
+        average = max(average, 0.1)
+
+        attack = (scored + PRIOR_MATCHES * average) / (played + PRIOR_MATCHES) / average
+        defence = (conceded + PRIOR_MATCHES * average) / (played + PRIOR_MATCHES) / average
+
+        home_rate = average * attack[home_idx] * defence[away_idx] * HOME_ADVANTAGE
+        away_rate = average * attack[away_idx] * defence[home_idx]
+        return home_rate, away_rate
+
+    @staticmethod
+    def _expected_points(base_points, home_idx, away_idx, home_rate, away_rate, points):
+        """Current points plus the expected points of every remaining fixture"""
+        # Win/draw/loss probabilities from the Poisson score grid, truncated at 10 goals
+        goals = np.arange(11)
+        log_fact = np.cumsum(np.log(np.maximum(goals, 1)))
+        home_pmf = np.exp(goals[None, :] * np.log(home_rate[:, None]) - home_rate[:, None] - log_fact)
+        away_pmf = np.exp(goals[None, :] * np.log(away_rate[:, None]) - away_rate[:, None] - log_fact)
+        grid = home_pmf[:, :, None] * away_pmf[:, None, :]
+
+        home_win = np.tril(np.ones((11, 11)), -1)
+        p_home = (grid * home_win).sum(axis=(1, 2))
+        p_away = (grid * home_win.T).sum(axis=(1, 2))
+        p_draw = (grid * np.eye(11)).sum(axis=(1, 2))
+
+        points_win, points_draw, points_loss = points
+        expected = base_points.astype(float).copy()
+        np.add.at(expected, home_idx, p_home * points_win + p_draw * points_draw + p_away * points_loss)
+        np.add.at(expected, away_idx, p_away * points_win + p_draw * points_draw + p_home * points_loss)
+        return expected
+
+    @staticmethod
+    def _run_chunks(iterations, seed, parallel, base, home_idx, away_idx, home_rate, away_rate, points):
+        """Split iterations into independently seeded chunks and sum their counts"""
+        sizes = [CHUNK_SIZE] * (iterations // CHUNK_SIZE)
+        if iterations % CHUNK_SIZE:
+            sizes.append(iterations % CHUNK_SIZE)
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+        args = [
+            (chunk_seed, size, base, home_idx, away_idx, home_rate, away_rate, points)
+            for chunk_seed, size in zip(seeds, sizes)
+        ]
+
+        if len(args) == 1 or not parallel:
+            results = [_simulate_chunk(*a) for a in args]
+        else:
+            pool = _get_pool()
+            futures = [pool.submit(_simulate_chunk, *a) for a in args]
+            results = [f.result() for f in futures]
+
+        return sum(results)
@@ -0,0 +1,352 @@
+"""
+Standings history: the table after every matchday of a competition.
+
+A matchday is a calendar day with finished matches. Snapshots are derived
+data. When a result changes, the table is restored from the last snapshot
+before that day and only the matches from that day onwards are replayed;
+`flask backfill-standings-history` replays everything in one ordered pass.
+"""
+from datetime import datetime, time
+from itertools import groupby
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import insert, func
+
+from app.extensions.db import db
+from app.models import Match, Team, Competition, CompetitionTeam, CompetitionStandingSnapshot
+from app.models.enums import MatchStatus
+from app.services.tiebreaker_service import TiebreakerService
+
+
+class StandingsHistoryService:
+    """Writes and serves per-matchday standings snapshots"""
+
+    @staticmethod
+    def record_match(match):
+        """
+        Refresh history after a match's result was added, changed or removed.
+        Only snapshots from the match's day onwards are rewritten. Does not commit.
+        """
+        if not match.competition_id or not match.match_date:
+            return
+        StandingsHistoryService.rebuild(match.competition_id, since=match.match_date.date())
+
+    @staticmethod
+    def _rebuild_since(competition_id, since):
+        """
+        Rewrite one competition's snapshots from `since` on, starting from the
+        last snapshot before it and replaying only the matches from `since`.
+        Returns the rows written, or None when there is no usable starting
+        snapshot and everything has to be replayed.
+        """
+        snapshot = CompetitionStandingSnapshot
+        baseline_day = db.session.query(func.max(snapshot.as_of)).filter(
+            snapshot.competition_id == competition_id,
+            snapshot.as_of < since,
+        ).scalar()
+        since_start = datetime.combine(since, time.min)
+        finished = db.session.query(Match).filter(
+            Match.competition_id == competition_id,
+            Match.status == MatchStatus.finished,
+        )
+
+        start = {}
+        first_matchday = 1
+        if baseline_day is None:
+            # No snapshot before `since` is only right if nothing was finished before it either
+            if finished.filter(Match.match_date < since_start).first() is not None:
+                return None
+        else:
+            baseline = snapshot.query.filter(
+                snapshot.competition_id == competition_id,
+                snapshot.as_of == baseline_day,
+            ).all()
+            # Rows written before wins/draws/losses were kept can't be resumed from
+            if any(row.wins + row.draws + row.losses != row.played for row in baseline):
+                return None
+            first_matchday = baseline[0].matchday + 1
+            for row in baseline:
+                start[row.team_id] = dict(
+                    StandingsHistoryService._empty_row(row.team_id, None),
+                    played=row.played, wins=row.wins, draws=row.draws, losses=row.losses,
+                    goals_for=row.goals_for, goals_against=row.goals_against,
+                )
+
+        competition = db.session.get(Competition, competition_id)
+        team_names = dict(
+            db.session.query(CompetitionTeam.team_id, Team.name)
+            .outerjoin(Team, Team.id == CompetitionTeam.team_id)
+            .filter(CompetitionTeam.competition_id == competition_id)
+            .all()
+        )
+        for team_id, row in start.items():
+            row["team_name"] = team_names.get(team_id) or ""
+
+        results_query = db.session.query(
+            Match.match_date, Match.home_team_id, Match.away_team_id, Match.home_score, Match.away_score,
+        ).filter(Match.competition_id == competition_id, Match.status == MatchStatus.finished)
+        matches = results_query.filter(Match.match_date >= since_start).order_by(Match.match_date, Match.id).all()
+
+        def earlier_results():
+            # Only needed when a tie reaches head-to-head
+            return [
+                (home, away, home_score or 0, away_score or 0)
+                for _, home, away, home_score, away_score in results_query.filter(Match.match_date < since_start)
+            ]
+
+        rows = StandingsHistoryService._replay(
+            competition, team_names, matches,
+            start=start, first_matchday=first_matchday, earlier_results=earlier_results,
+        ) if competition is not None else []
+
+        snapshot.query.filter(
+            snapshot.competition_id == competition_id,
+            snapshot.as_of >= since,
+        ).delete(synchronize_session=False)
+        if rows:
+            db.session.execute(insert(snapshot), rows)
+        return len(rows)
+
+    @staticmethod
+    def rebuild(competition_id=None, since=None):
+        """
+        Replay finished matches in date order and rewrite the snapshots of
+        every matchday on or after `since` (all of them when None).
+        Covers every competition with finished matches unless one is given.
+        For one competition and a `since`, only the matches from `since` are
+        replayed (see _rebuild_since). Returns the number of snapshot rows
+        written. Does not commit.
+        """
+        if competition_id and since:
+            written = StandingsHistoryService._rebuild_since(competition_id, since)
+            if written is not None:
+                return written
+            # No usable starting snapshot: replay the whole competition once
+            since = None
+
+        match_query = (
+            db.session.query(
+                Match.competition_id,
+                Match.match_date,
+                Match.home_team_id,
+                Match.away_team_id,
+                Match.home_score,
+                Match.away_score,
+            )
+            .filter(Match.status == MatchStatus.finished)
+        )
+        team_query = (
+            db.session.query(CompetitionTeam.competition_id, CompetitionTeam.team_id, Team.name)
+            .outerjoin(Team, Team.id == CompetitionTeam.team_id)
+        )
+        delete_query = CompetitionStandingSnapshot.query
+
+        if competition_id:
+            match_query = match_query.filter(Match.competition_id == competition_id)
+            team_query = team_query.filter(CompetitionTeam.competition_id == competition_id)
+            delete_query = delete_query.filter(CompetitionStandingSnapshot.competition_id == competition_id)
+        else:
+            match_query = match_query.filter(Match.competition_id.isnot(None))
+        if since:
+            delete_query = delete_query.filter(CompetitionStandingSnapshot.as_of >= since)
+
+        teams = {}
+        for comp_id, team_id, team_name in team_query.all():
+            teams.setdefault(comp_id, {})[team_id] = team_name
+
+        matches = match_query.order_by(Match.competition_id, Match.match_date, Match.id).all()
+        competitions = {
+            c.id: c for c in Competition.query.filter(
+                Competition.id.in_({m.competition_id for m in matches})
+            ).all()
+        } if matches else {}
+
+        rows = []
+        for comp_id, comp_matches in groupby(matches, key=lambda m: m.competition_id):
+            competition = competitions.get(comp_id)
+            if competition is None:
+                continue
+            rows.extend(StandingsHistoryService._replay(
+                competition, teams.get(comp_id, {}), comp_matches, since
+            ))
+
+        delete_query.delete(synchronize_session=False)
+        if rows:
+            db.session.execute(insert(CompetitionStandingSnapshot), rows)
+
+        return len(rows)
+
+    @staticmethod
+    def _replay(competition, team_names, matches, since=None, start=None, first_matchday=1, earlier_results=None):
+        """
+        Snapshot rows for one competition from its date-ordered finished
+        matches. `start` is the table to continue from ({team_id: row}), with
+        `earlier_results` a callable returning the results it already holds.
+        """
+        points = (
+            competition.points_win or 0,
+            competition.points_draw or 0,
+            competition.points_loss or 0,
+        )
+
+        table = {
+            team_id: StandingsHistoryService._empty_row(team_id, name)
+            for team_id, name in team_names.items()
+        }
+        table.update(start or {})
+        results = []
+        snapshots = []
+
+        earlier = None
+
+        def all_results():
+            nonlocal earlier
+            if earlier is None:
+                earlier = earlier_results() if earlier_results else []
+            return earlier + results
+
+        for matchday, (day, day_matches) in enumerate(
+            groupby(matches, key=lambda m: m.match_date.date()), start=first_matchday
+        ):
+            for match in day_matches:
+                home_score, away_score = match.home_score or 0, match.away_score or 0
+                results.append((match.home_team_id, match.away_team_id, home_score, away_score))
+
+                for team_id, scored, conceded in (
+                    (match.home_team_id, home_score, away_score),
+                    (match.away_team_id, away_score, home_score),
+                ):
+                    row = table.get(team_id)
+                    if row is None:
+                        row = table[team_id] = StandingsHistoryService._empty_row(team_id, None)
+                    row["played"] += 1
+                    row["goals_for"] += scored
+                    row["goals_against"] += conceded
+                    if scored > conceded:
+                        row["wins"] += 1
+                    elif scored == conceded:
+                        row["draws"] += 1
+                    else:
+                        row["losses"] += 1
+
+            if since and day < since:
+                continue
+
+            for row in table.values():
+                row["goal_difference"] = row["goals_for"] - row["goals_against"]
+                row["points"] = row["wins"] * points[0] + row["draws"] * points[1] + row["losses"] * points[2]
+
+            # Fair play is not replayed per day; ties that reach it fall back to name order
+            ranked = TiebreakerService.rank(
+                table.values(),
+                order=competition.tiebreaker_order,
+                matches=all_results,
+                fair_play={},
+                points=points,
+            )
+            for position, row in enumerate(ranked, start=1):
+                snapshots.append({
+                    "competition_id": competition.id,
+                    "team_id": row["team_id"],
+                    "as_of": day,
+                    "matchday": matchday,
+                    "position": position,
+                    "played": row["played"],
+                    "wins": row["wins"],
+                    "draws": row["draws"],
+                    "losses": row["losses"],
+                    "points": row["points"],
+                    "goals_for": row["goals_for"],
+                    "goals_against": row["goals_against"],
+                })
+
+        return snapshots
+
+    @staticmethod
+    def _empty_row(team_id, team_name):
+        return {
+            "team_id": team_id,
+            "team_name": team_name or "",
+            "played": 0,
+            "wins": 0,
+            "draws": 0,
+            "losses": 0,
+            "goals_for": 0,
+            "goals_against": 0,
+            "goal_difference": 0,
+            "points": 0,
+        }
+
+    # ---------------------------------------------------------
+    # Reads
+    # ---------------------------------------------------------
+
+    @staticmethod
+    def get_history(competition_id, date_from=None, date_to=None, team_id=None):
+        """
+        Standings after each matchday, oldest first, read with a single range
+        scan over (competition_id, as_of)
+        """
+        query = (
+            db.session.query(CompetitionStandingSnapshot, Team.name)
+            .outerjoin(Team, Team.id == CompetitionStandingSnapshot.team_id)
+            .filter(CompetitionStandingSnapshot.competition_id == competition_id)
+        )
+        if date_from:
+            query = query.filter(CompetitionStandingSnapshot.as_of >= date_from)
+        if date_to:
+            query = query.filter(CompetitionStandingSnapshot.as_of <= date_to)
+        if team_id:
+            query = query.filter(CompetitionStandingSnapshot.team_id == team_id)
+
+        rows = query.order_by(
+            CompetitionStandingSnapshot.as_of,
+            CompetitionStandingSnapshot.position
+        ).all()
+
+        teams = {}
+        matchdays = []
+        for snapshot, team_name in rows:
+            teams[str(snapshot.team_id)] = team_name or 'Unknown'
+            if not matchdays or matchdays[-1]['as_of'] != snapshot.as_of.isoformat():
+                matchdays.append({
+                    'matchday': snapshot.matchday,
+                    'as_of': snapshot.as_of.isoformat(),
+                    'standings': [],
+                })
+
+            row = snapshot.to_dict()
+            del row['as_of'], row['matchday']
+            matchdays[-1]['standings'].append(row)
+
+        return {
+            'competition_id': str(competition_id),
+            'teams': teams,
+            'matchdays': matchdays,
+        }
+
+
+@click.command('backfill-standings-history')
+@click.option('--competition-id', default=None, help='Only backfill this competition')
+@with_appcontext
+def backfill_standings_history(competition_id):
+    """Rebuild standings history snapshots from finished matches"""
+    import uuid
+
+    try:
+        written = StandingsHistoryService.rebuild(
+            uuid.UUID(competition_id) if competition_id else None
+        )
+        db.session.commit()
+        click.echo(f"[OK] Wrote {written} standings history rows")
+
+    except Exception as e:
+        db.session.rollback()
+        click.echo(f"[ERROR] Failed to backfill standings history: {str(e)}")
+        raise
+
+
+def register_backfill_standings_history_command(app):
+    """Register the backfill-standings-history command with the Flask app"""
+    app.cli.add_command(backfill_standings_history)
@@ -1,19 +1,29 @@
-from collections import defaultdict
-from sqlalchemy import and_
+from collections import defaultdict, namedtuple
+from sqlalchemy import and_, func
 
 from app.extensions.db import db
 from app.models.match import Match
 from app.models.enums import MatchStatus
 from app.models.team import Team
 from app.models.tournament_team import TournamentTeam
+from app.services.cache_service import standings_cache
+from app.services.competition_standings_service import CompetitionStandingsService
+from app.services.tiebreaker_service import TiebreakerService
+
+
+LIVE_STATUSES = (MatchStatus.live, MatchStatus.paused)
+
+# Minimal match shape accepted by StandingsService._apply_matches
+_LiveScore = namedtuple("_LiveScore", ["home_team_id", "away_team_id", "home_score", "away_score"])
 
 
 class StandingsService:
     """
     League Table / Tournament Standings Engine
 
-    This service is stateless.
-    You can rebuild standings anytime from match data.
+    Tournament matches reference their tournament (Match.tournament_id), so
+    finished results are aggregated from them in a single grouped query;
+    the competition_standings read model only covers competitions.
     """
 
     POINTS_WIN = 3
@@ -28,14 +38,119 @@ class StandingsService:
         """
 
         teams = StandingsService._get_tournament_teams(tournament_id)
-        matches = StandingsService._get_finished_matches(tournament_id)
+        results = StandingsService._get_results(tournament_id)
 
         table = StandingsService._initialize_table(teams)
-        StandingsService._apply_matches(table, matches)
-        StandingsService._sort_table(table)
+        StandingsService._apply_results(table, results)
+        StandingsService._sort_table(table, tournament_id)
 
         return list(table.values())
 
+    @staticmethod
+    def compute_standings(tournament_id):
+        """
+        Live table: the cached finished-match table with the current scores
+        of live/paused matches overlaid in memory.
+        Costs one query for the finished version and one for live matches;
+        only rows of teams currently playing are recomputed.
+        """
+        base = StandingsService.get_finished_table(tournament_id)
+        live_matches = StandingsService.get_live_matches(tournament_id)
+
+        return StandingsService.project_live(base, live_matches, tournament_id)
+
+    @staticmethod
+    def get_finished_table(tournament_id, version=None):
+        """
+        Sorted table of finished results, cached until finished results or the
+        registered teams change. Rows are shared with the cache: copy before editing.
+        """
+        key = ("finished_table", str(tournament_id))
+        if version is None:
+            version = StandingsService.finished_version(tournament_id)
+
+        table = standings_cache.get(key, version)
+        if table is None:
+            table = StandingsService.get_standings(tournament_id)
+            standings_cache.set(key, version, table)
+
+        return table
+
+    @staticmethod
+    def finished_version(tournament_id):
+        """Version token that only moves when finished results or teams change"""
+        team_count = (
+            db.session.query(func.count(TournamentTeam.id))
+            .filter(TournamentTeam.tournament_id == tournament_id)
+            .scalar_subquery()
+        )
+        last_update, finished, teams = (
+            db.session.query(
+                func.max(Match.updated_at),
+                func.count(Match.id),
+                team_count,
+            )
+            .filter(Match.tournament_id == tournament_id, Match.status == MatchStatus.finished)
+            .one()
+        )
+        return (last_update, finished, teams)
+
+    @staticmethod
+    def get_live_matches(tournament_id):
+        """
+        Current scores of in-progress matches, as plain tuples
+        (match_id, home_team_id, away_team_id, home_score, away_score)
+        """
+        return [
+            tuple(row) for row in (
+                db.session.query(
+                    Match.id,
+                    Match.home_team_id,
+                    Match.away_team_id,
+                    Match.home_score,
+                    Match.away_score,
+                )
+                .filter(
+                    Match.tournament_id == tournament_id,
+                    Match.status.in_(LIVE_STATUSES)
+                )
+                .order_by(Match.id)
+                .all()
+            )
+        ]
+
+    @staticmethod
+    def project_live(base, live_matches, tournament_id=None):
+        """
+        Overlay live scores on a finished table without touching its rows.
+        Only teams that are playing get recomputed; everything is re-ranked,
+        with live scores counting towards head-to-head as well.
+        """
+        by_team = {row["team_id"]: row for row in base}
+
+        overlay = {}
+        for _, home_id, away_id, _, _ in live_matches:
+            for team_id in (home_id, away_id):
+                if team_id in by_team and team_id not in overlay:
+                    overlay[team_id] = dict(by_team[team_id])
+
+        StandingsService._apply_matches(overlay, [
+            _LiveScore(home_id, away_id, home_score or 0, away_score or 0)
+            for _, home_id, away_id, home_score, away_score in live_matches
+        ])
+
+        table = {}
+        for row in base:
+            projected = overlay.get(row["team_id"]) or dict(row)
+            projected["live"] = row["team_id"] in overlay
+            table[row["team_id"]] = projected
+
+        StandingsService._sort_table(table, tournament_id, extra_matches=[
+            (home_id, away_id, home_score, away_score)
+            for _, home_id, away_id, home_score, away_score in live_matches
+        ])
+        return list(table.values())
+
     # ---------------------------------------------------------
     # Internal helpers
     # ---------------------------------------------------------
@@ -61,13 +176,34 @@ class StandingsService:
             Match.query
             .filter(
                 and_(
-                    Match.competition_id == tournament_id,
+                    Match.tournament_id == tournament_id,
                     Match.status == MatchStatus.finished
                 )
             )
             .all()
         )
 
+    @staticmethod
+    def _get_results(tournament_id):
+        """
+        Fetch each team's accumulated results over the tournament's finished
+        matches in a single grouped query
+        """
+        computed = CompetitionStandingsService.computed_results(scope=Match.tournament_id == tournament_id)
+        return (
+            db.session.query(
+                computed.c.team_id,
+                func.sum(computed.c.played).label("played"),
+                func.sum(computed.c.wins).label("wins"),
+                func.sum(computed.c.draws).label("draws"),
+                func.sum(computed.c.losses).label("losses"),
+                func.sum(computed.c.goals_for).label("goals_for"),
+                func.sum(computed.c.goals_against).label("goals_against"),
+            )
+            .group_by(computed.c.team_id)
+            .all()
+        )
+
     @staticmethod
     def _initialize_table(teams):
         """
@@ -94,6 +230,29 @@ class StandingsService:
 
         return table
 
+    @staticmethod
+    def _apply_results(table, results):
+        """
+        Update standings from accumulated result rows
+        """
+
+        for result in results:
+            row = table.get(result.team_id)
+
+            # Safety check (in case of orphaned data)
+            if not row:
+                continue
+
+            for key in ("played", "wins", "draws", "losses", "goals_for", "goals_against"):
+                row[key] += int(getattr(result, key) or 0)
+
+            row["goal_difference"] = row["goals_for"] - row["goals_against"]
+            row["points"] = (
+                row["wins"] * StandingsService.POINTS_WIN
+                + row["draws"] * StandingsService.POINTS_DRAW
+                + row["losses"] * StandingsService.POINTS_LOSS
+            )
+
     @staticmethod
     def _apply_matches(table, matches):
         """
@@ -153,20 +312,30 @@ class StandingsService:
                 away["points"] += StandingsService.POINTS_DRAW
 
     @staticmethod
-    def _sort_table(table):
+    def _sort_table(table, tournament_id=None, extra_matches=()):
         """
-        Sort standings using official competition rules
+        Sort standings using the tournament's tiebreaker order.
+        Head-to-head and fair play data are only loaded when a tie needs them.
         """
+        if tournament_id is not None:
+            order = TiebreakerService.order_for(tournament_id)
+            matches = lambda: (
+                TiebreakerService.finished_results(tournament_id, by=Match.tournament_id) + list(extra_matches)
+            )
+            fair_play = lambda: TiebreakerService.fair_play_points(tournament_id, by=Match.tournament_id)
+        else:
+            order, matches, fair_play = None, list(extra_matches), None
 
-        sorted_rows = sorted(
+        sorted_rows = TiebreakerService.rank(
             table.values(),
-            key=lambda x: (
-                x["points"],
-                x["goal_difference"],
-                x["goals_for"],
-                x["team_name"].lower(),  # deterministic fallback
+            order=order,
+            matches=matches,
+            fair_play=fair_play,
+            points=(
+                StandingsService.POINTS_WIN,
+                StandingsService.POINTS_DRAW,
+                StandingsService.POINTS_LOSS,
             ),
-            reverse=True
         )
 
         # Reassign rank positions
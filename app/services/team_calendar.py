@@ -0,0 +1,162 @@
+"""
+Per-team calendar of match dates, for catching double bookings.
+
+A team must not play twice on the same day, whichever competitions (or
+friendlies) the matches belong to. TeamCalendar loads the relevant teams'
+matches in one query (served by the per-team match_date indexes) into a
+sorted list per team, after which each check is a binary search: two
+bisects bracketing the day, O(log n) in the team's number of matches.
+
+Fixture lists are validated by checking and adding fixtures one at a time,
+so clashes inside the list itself are caught as well as clashes with
+matches already in the database.
+"""
+import uuid
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+
+from app.extensions.db import db
+from app.models import Match
+from app.models.enums import MatchStatus
+
+
+ONE_DAY = timedelta(days=1)
+
+
+class TeamCalendar:
+    """Sorted (match_date, match_id) entries per team"""
+
+    def __init__(self):
+        self._entries = defaultdict(list)
+
+    @classmethod
+    def load(cls, team_ids, start=None, end=None, exclude_match_ids=None):
+        """
+        Calendar of the teams' non-cancelled matches between `start` and `end`
+        (whole days, both optional), loaded in one query.
+        """
+        calendar = cls()
+        team_ids = {_team_key(t) for t in team_ids if t is not None}
+        if not team_ids:
+            return calendar
+
+        query = db.session.query(Match.id, Match.home_team_id, Match.away_team_id, Match.match_date).filter(
+            db.or_(Match.home_team_id.in_(team_ids), Match.away_team_id.in_(team_ids)),
+            Match.status != MatchStatus.cancelled,
+        )
+        if start is not None:
+            query = query.filter(Match.match_date >= _day_start(start))
+        if end is not None:
+            query = query.filter(Match.match_date < _day_start(end) + ONE_DAY)
+        if exclude_match_ids:
+            query = query.filter(Match.id.notin_(list(exclude_match_ids)))
+
+        for match_id, home_id, away_id, match_date in query.all():
+            for team_id in (home_id, away_id):
+                if team_id in team_ids:
+                    calendar.add(team_id, match_date, match_id)
+        return calendar
+
+    def add(self, team_id, match_date, match_id=None):
+        insort(self._entries[_team_key(team_id)], (_as_datetime(match_date), str(match_id or '')))
+
+    def dates(self, team_id):
+        """The team's match dates, in order"""
+        return [match_date for match_date, _ in self._entries.get(_team_key(team_id), [])]
+
+    def conflicts(self, team_id, match_date, ignore_match_id=None):
+        """The team's other matches on the same day as `match_date`, as (match_date, match_id)"""
+        entries = self._entries.get(_team_key(team_id))
+        if not entries:
+            return []
+
+        day = _day_start(match_date)
+        lo = bisect_left(entries, (day, ''))
+        hi = bisect_left(entries, (day + ONE_DAY, ''))
+        ignore = str(ignore_match_id) if ignore_match_id else None
+        return [entry for entry in entries[lo:hi] if ignore is None or entry[1] != ignore]
+
+    def team_conflicts(self, team_id):
+        """Days on which the team already has more than one match: [(day, [(match_date, match_id), ...])]"""
+        days = []
+        for entry in self._entries.get(_team_key(team_id), []):
+            day = entry[0].date()
+            if days and days[-1][0] == day:
+                days[-1][1].append(entry)
+            else:
+                days.append((day, [entry]))
+        return [(day, entries) for day, entries in days if len(entries) > 1]
+
+    def check_fixtures(self, fixtures):
+        """
+        Check a fixture list against the calendar, adding each fixture as it
+        goes. `fixtures` are dicts with home_team_id, away_team_id, match_date
+        (and optionally id); teams that are None (knockout placeholders) are
+        skipped. Returns one conflict dict per clash.
+        """
+        found = []
+        for index, fixture in enumerate(fixtures):
+            match_date = _as_datetime(fixture['match_date'])
+            match_id = fixture.get('id')
+            for side in ('home_team_id', 'away_team_id'):
+                team_id = fixture.get(side)
+                if team_id is None:
+                    continue
+                for other_date, other_id in self.conflicts(team_id, match_date, ignore_match_id=match_id):
+                    found.append(conflict_dict(team_id, match_date, other_date, other_id, fixture_index=index))
+            for side in ('home_team_id', 'away_team_id'):
+                if fixture.get(side) is not None:
+                    self.add(fixture[side], match_date, match_id)
+        return found
+
+
+def conflict_dict(team_id, match_date, other_date, other_match_id, **extra):
+    """JSON-ready description of one clash; other_match_id is None for a clash within a fixture list"""
+    return {
+        'team_id': str(team_id),
+        'match_date': match_date.isoformat(),
+        'conflicting_match_id': other_match_id or None,
+        'conflicting_match_date': other_date.isoformat(),
+        **extra,
+    }
+
+
+def check_fixtures(fixtures, exclude_match_ids=None):
+    """Validate a whole fixture list against the database and itself; see TeamCalendar.check_fixtures"""
+    fixtures = list(fixtures)
+    if not fixtures:
+        return []
+
+    dates = [_as_datetime(f['match_date']) for f in fixtures]
+    teams = {f.get(side) for f in fixtures for side in ('home_team_id', 'away_team_id')}
+    calendar = TeamCalendar.load(teams, start=min(dates), end=max(dates), exclude_match_ids=exclude_match_ids)
+    return calendar.check_fixtures(fixtures)
+
+
+def describe_conflicts(conflicts, limit=5):
+    """Short human-readable summary for error messages"""
+    shown = '; '.join(
+        f"team {c['team_id']} on {c['match_date'][:10]}" for c in conflicts[:limit]
+    )
+    more = f" and {len(conflicts) - limit} more" if len(conflicts) > limit else ''
+    return f"Calendar conflict: {shown}{more}"
+
+
+def _team_key(team_id):
+    return uuid.UUID(team_id) if isinstance(team_id, str) else team_id
+
+
+def _as_datetime(value):
+    """Naive UTC datetime from a datetime, date or ISO string"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    elif isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime.combine(value, time.min)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _day_start(value):
+    return datetime.combine(_as_datetime(value).date(), time.min)
@@ -0,0 +1,275 @@
+"""
+Tiebreaker engine for league tables.
+
+Rows are ranked by the configured criteria in order. Only teams that are
+still level after one criterion are compared on the next, so head-to-head
+mini-leagues and fair-play totals are computed for tied blocks only, from
+data loaded at most once (and not at all when nothing is tied that far).
+"""
+from collections import defaultdict
+
+from sqlalchemy import func, case
+
+from app.extensions.db import db
+from app.models.match import Match
+from app.models.match_event import MatchEvent
+from app.models.competition import Competition
+from app.models.tournament import Tournament
+from app.models.enums import MatchStatus, EventType
+from app.services.h2h_service import HeadToHeadService
+
+
+DEFAULT_TIEBREAKER_ORDER = ["points", "goal_difference", "goals_for", "head_to_head", "fair_play"]
+
+# Criteria read straight off a table row
+TABLE_CRITERIA = ("points", "goal_difference", "goals_for", "goals_against", "wins", "losses")
+
+TIEBREAKER_CRITERIA = TABLE_CRITERIA + ("head_to_head", "fair_play")
+
+# Everything else ranks higher values first
+LOWER_IS_BETTER = {"goals_against", "losses", "fair_play"}
+
+# Fair play points per card (fewer is better)
+CARD_POINTS = {
+    EventType.yellow_card: 1,
+    EventType.red_card: 3,
+}
+
+
+class TiebreakerService:
+    """Ranks standings rows by a configurable tiebreaker order"""
+
+    @staticmethod
+    def validate_order(order):
+        """Return the order as a list, raising ValueError on unknown criteria"""
+        if order is None:
+            return None
+        if not isinstance(order, (list, tuple)):
+            raise ValueError("tiebreaker_order must be a list")
+
+        unknown = [c for c in order if c not in TIEBREAKER_CRITERIA]
+        if unknown:
+            raise ValueError(
+                f"Unknown tiebreaker criteria: {', '.join(map(str, unknown))}. "
+                f"Allowed: {', '.join(TIEBREAKER_CRITERIA)}"
+            )
+        return list(order)
+
+    @staticmethod
+    def order_for(competition_id):
+        """
+        Configured order for a competition, falling back to a tournament
+        with the same id and then to the default order
+        """
+        competition = db.session.get(Competition, competition_id)
+        if competition is not None and competition.tiebreaker_order:
+            return list(competition.tiebreaker_order)
+
+        if competition is None:
+            tournament = db.session.get(Tournament, competition_id)
+            if tournament is not None and tournament.tiebreaker_order:
+                return list(tournament.tiebreaker_order)
+
+        return list(DEFAULT_TIEBREAKER_ORDER)
+
+    @staticmethod
+    def rank(rows, order=None, matches=None, fair_play=None, points=(3, 1, 0)):
+        """
+        Return `rows` (dicts with team_id, team_name and table columns) sorted
+        by `order`. Teams level on every criterion are ordered by name.
+
+        `matches` is an iterable of (home_team_id, away_team_id, home_score,
+        away_score) finished results, or a callable returning one; `fair_play`
+        is a {team_id: points} mapping or a callable returning one. Callables
+        are only invoked if a tie actually reaches that criterion.
+        """
+        order = order or DEFAULT_TIEBREAKER_ORDER
+        context = _RankContext(matches, fair_play, points)
+
+        ordered = sorted(rows, key=lambda row: (row.get("team_name") or "").lower())
+        return TiebreakerService._rank_block(ordered, list(order), context)
+
+    @staticmethod
+    def _rank_block(block, criteria, context):
+        """Sort a block on the first criterion and recurse into remaining ties"""
+        if len(block) < 2 or not criteria:
+            return block
+
+        criterion, rest = criteria[0], criteria[1:]
+        values = context.values(criterion, block)
+
+        # Stable sort, so ties keep the order from the previous criterion
+        block = sorted(
+            block,
+            key=lambda row: values[str(row["team_id"])],
+            reverse=criterion not in LOWER_IS_BETTER
+        )
+
+        ranked = []
+        start = 0
+        for end in range(1, len(block) + 1):
+            if end < len(block) and values[str(block[end]["team_id"])] == values[str(block[start]["team_id"])]:
+                continue
+
+            tied = block[start:end]
+            if criterion == "head_to_head" and 1 < len(tied) < len(block):
+                # Teams still level re-run the mini-league among themselves
+                ranked.extend(TiebreakerService._rank_block(tied, criteria, context))
+            else:
+                ranked.extend(TiebreakerService._rank_block(tied, rest, context))
+            start = end
+
+        return ranked
+
+    # ---------------------------------------------------------
+    # Loaders
+    # ---------------------------------------------------------
+
+    @staticmethod
+    def finished_results(competition_id, by=Match.competition_id):
+        """
+        Finished results as plain (home, away, home_score, away_score) tuples.
+        `by` is the match column the id is matched against (Match.tournament_id
+        for a tournament).
+        """
+        return [
+            tuple(row) for row in (
+                db.session.query(
+                    Match.home_team_id,
+                    Match.away_team_id,
+                    Match.home_score,
+                    Match.away_score,
+                )
+                .filter(
+                    by == competition_id,
+                    Match.status == MatchStatus.finished
+                )
+                .all()
+            )
+        ]
+
+    @staticmethod
+    def finished_results_by_competition(competition_ids):
+        """finished_results() for several competitions in one query, keyed by competition"""
+        results = defaultdict(list)
+        rows = (
+            db.session.query(
+                Match.competition_id,
+                Match.home_team_id,
+                Match.away_team_id,
+                Match.home_score,
+                Match.away_score,
+            )
+            .filter(
+                Match.competition_id.in_(competition_ids),
+                Match.status == MatchStatus.finished
+            )
+            .all()
+        )
+        for competition_id, *result in rows:
+            results[competition_id].append(tuple(result))
+        return results
+
+    @staticmethod
+    def fair_play_points(competition_id, by=Match.competition_id):
+        """Card points per team over a competition's finished matches; `by` as for finished_results()"""
+        card_points = case(
+            *[(MatchEvent.event_type == event, value) for event, value in CARD_POINTS.items()],
+            else_=0
+        )
+        rows = (
+            db.session.query(MatchEvent.team_id, func.sum(card_points))
+            .join(Match, Match.id == MatchEvent.match_id)
+            .filter(
+                by == competition_id,
+                Match.status == MatchStatus.finished,
+                MatchEvent.event_type.in_(list(CARD_POINTS))
+            )
+            .group_by(MatchEvent.team_id)
+            .all()
+        )
+        return {team_id: int(total or 0) for team_id, total in rows}
+
+    @staticmethod
+    def fair_play_points_by_competition(competition_ids):
+        """fair_play_points() for several competitions in one query, keyed by competition"""
+        card_points = case(
+            *[(MatchEvent.event_type == event, value) for event, value in CARD_POINTS.items()],
+            else_=0
+        )
+        rows = (
+            db.session.query(Match.competition_id, MatchEvent.team_id, func.sum(card_points))
+            .join(Match, Match.id == MatchEvent.match_id)
+            .filter(
+                Match.competition_id.in_(competition_ids),
+                Match.status == MatchStatus.finished,
+                MatchEvent.event_type.in_(list(CARD_POINTS))
+            )
+            .group_by(Match.competition_id, MatchEvent.team_id)
+            .all()
+        )
+        totals = defaultdict(dict)
+        for competition_id, team_id, total in rows:
+            totals[competition_id][team_id] = int(total or 0)
+        return totals
+
+
+class _RankContext:
+    """Lazily loaded match index and fair play totals shared by one rank() call"""
+
+    def __init__(self, matches, fair_play, points):
+        self._matches = matches
+        self._fair_play = fair_play
+        self._points = points
+        self._by_team = None
+        self._fair_play_totals = None
+
+    def values(self, criterion, block):
+        """Comparable value per team key for every row in a block"""
+        if criterion == "head_to_head":
+            return self._head_to_head(block)
+
+        if criterion == "fair_play":
+            totals = self._load_fair_play()
+            return {str(row["team_id"]): totals.get(str(row["team_id"]), 0) for row in block}
+
+        return {str(row["team_id"]): row.get(criterion, 0) for row in block}
+
+    def _head_to_head(self, block):
+        """Mini-league among the block built from matches already in memory"""
+        by_team = self._load_matches()
+        team_ids = {str(row["team_id"]) for row in block}
+
+        # Each match is reached through its home team only, so it counts once
+        matches = [
+            match
+            for team_id in team_ids
+            for match in by_team.get(team_id, ())
+            if match[0] == team_id and match[1] in team_ids
+        ]
+        stats = HeadToHeadService.mini_league(matches, team_ids, self._points)
+
+        values = {}
+        for team_id in team_ids:
+            team = stats.get(team_id)
+            values[team_id] = (
+                (team["points"], team["goal_diff"], team["goals_for"]) if team else (0, 0, 0)
+            )
+        return values
+
+    def _load_matches(self):
+        if self._by_team is None:
+            matches = self._matches() if callable(self._matches) else (self._matches or ())
+
+            self._by_team = defaultdict(list)
+            for home_id, away_id, home_score, away_score in matches:
+                match = (str(home_id), str(away_id), home_score or 0, away_score or 0)
+                self._by_team[match[0]].append(match)
+                self._by_team[match[1]].append(match)
+        return self._by_team
+
+    def _load_fair_play(self):
+        if self._fair_play_totals is None:
+            totals = self._fair_play() if callable(self._fair_play) else (self._fair_play or {})
+            self._fair_play_totals = {str(team_id): value for team_id, value in totals.items()}
+        return self._fair_play_totals
@@ -2,6 +2,7 @@ import uuid
 from app.extensions.db import db
 from app.models.tournament import Tournament
 from app.models.tournament_team import TournamentTeam
+from app.services.cache_service import invalidate_competition
 import datetime
 
 
@@ -40,6 +41,7 @@ class TournamentService:
         )
         db.session.add(entry)
         db.session.commit()
+        invalidate_competition(tournament_id)
         return entry
 
     @staticmethod
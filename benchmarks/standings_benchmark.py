@@ -0,0 +1,322 @@
+#!/usr/bin/env python
+"""
+Benchmark the standings and table-engine paths on synthetic competitions.
+
+Generates leagues (and optionally group stages) of the requested sizes in a
+throwaway database, then times each standings entry point, counting SQL
+statements and peak Python memory. Results are written as JSON so runs can
+be compared.
+
+Run:
+    python benchmarks/standings_benchmark.py
+    python benchmarks/standings_benchmark.py --sizes 10,100,1000,5000 --legs 1,2 --group-size 4
+    python benchmarks/standings_benchmark.py --database-url postgresql://localhost/bench --output bench.json
+
+Without --database-url a temporary SQLite file is used. Never point it at a
+database you care about: it creates tables and inserts synthetic data.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10,100,1000,5000', help='Comma-separated team counts')
+    parser.add_argument('--legs', default='1,2', help='Comma-separated leg counts')
+    parser.add_argument('--group-size', type=int, default=4,
+                        help='Also benchmark a group stage with groups of this size (0 to skip)')
+    parser.add_argument('--max-rounds', type=int, default=38,
+                        help='Cap on matchdays per leg so large leagues stay a realistic size')
+    parser.add_argument('--finished-ratio', type=float, default=0.8, help='Share of fixtures already played')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per target')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--database-url', default=None, help='Throwaway database (default: temporary SQLite)')
+    parser.add_argument('--output', default=None, help='Write JSON here instead of stdout')
+    return parser.parse_args()
+
+
+# ---------------------------------------------------------
+# Synthetic data
+# ---------------------------------------------------------
+
+def circle_rounds(team_ids, max_rounds):
+    """Round-robin matchdays via the circle method, one leg"""
+    teams = list(team_ids)
+    if len(teams) % 2:
+        teams.append(None)
+    n = len(teams)
+
+    for _ in range(min(n - 1, max_rounds)):
+        yield [
+            (teams[i], teams[n - 1 - i]) if i % 2 == 0 else (teams[n - 1 - i], teams[i])
+            for i in range(n // 2)
+            if teams[i] is not None and teams[n - 1 - i] is not None
+        ]
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+
+
+def generate_competition(db, models, rnd, coach_id, num_teams, legs, group_size, args):
+    """Insert one synthetic competition and return its id, team ids, groups and match count"""
+    from sqlalchemy import insert
+    from app.models.tournament_team import TournamentTeam
+
+    competition_id = uuid.uuid4()
+    db.session.execute(insert(models.Competition), [{
+        'id': competition_id,
+        'season_id': uuid.uuid4(),
+        'name': f'Bench {num_teams}x{legs}{" groups" if group_size else ""} {competition_id.hex[:6]}',
+        'stage_level': 'county',
+        'format_type': 'group_knockout' if group_size else 'round_robin',
+        'legs': legs,
+        'points_win': 3,
+        'points_draw': 1,
+        'points_loss': 0,
+        'status': 'ongoing',
+    }])
+
+    team_ids = [uuid.uuid4() for _ in range(num_teams)]
+    db.session.execute(insert(models.Team), [
+        {'id': team_id, 'coach_id': coach_id, 'name': f'Team {i:05d}'}
+        for i, team_id in enumerate(team_ids)
+    ])
+
+    groups = [(None, team_ids)]
+    if group_size:
+        groups = []
+        for g, start in enumerate(range(0, num_teams, group_size)):
+            groups.append((uuid.uuid4(), team_ids[start:start + group_size]))
+        db.session.execute(insert(models.CompetitionGroup), [
+            {'id': group_id, 'competition_id': competition_id, 'name': f'Group {g + 1}', 'group_order': g + 1}
+            for g, (group_id, _) in enumerate(groups)
+        ])
+
+    competition_teams = []
+    tournament_teams = []
+    for group_id, members in groups:
+        for team_id in members:
+            competition_teams.append({
+                'id': uuid.uuid4(), 'competition_id': competition_id,
+                'team_id': team_id, 'group_id': group_id,
+            })
+            tournament_teams.append({'id': uuid.uuid4(), 'tournament_id': competition_id, 'team_id': team_id})
+    db.session.execute(insert(models.CompetitionTeam), competition_teams)
+    db.session.execute(insert(TournamentTeam), tournament_teams)
+
+    matches = []
+    start = datetime(2026, 1, 3)
+    for group_id, members in groups:
+        rounds = list(circle_rounds(members, args.max_rounds))
+        for leg in range(legs):
+            for r, pairs in enumerate(rounds):
+                day = start + timedelta(days=7 * (leg * len(rounds) + r))
+                for home_id, away_id in pairs:
+                    if leg % 2:
+                        home_id, away_id = away_id, home_id
+                    finished = rnd.random() < args.finished_ratio
+                    matches.append({
+                        'id': uuid.uuid4(),
+                        'competition_id': competition_id,
+                        'group_id': group_id,
+                        'home_team_id': home_id,
+                        'away_team_id': away_id,
+                        'match_date': day,
+                        'status': models.MatchStatus.finished if finished else models.MatchStatus.scheduled,
+                        'home_score': rnd.randint(0, 4) if finished else 0,
+                        'away_score': rnd.randint(0, 4) if finished else 0,
+                    })
+
+    for chunk in range(0, len(matches), 5000):
+        db.session.execute(insert(models.Match), matches[chunk:chunk + 5000])
+
+    from app.services.competition_standings_service import CompetitionStandingsService
+    CompetitionStandingsService.rebuild(competition_id)
+    db.session.commit()
+
+    return competition_id, team_ids, groups, len(matches)
+
+
+# ---------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------
+
+class QueryCounter:
+    """Counts statements executed on an engine while active"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def measure(db, name, func, repeat):
+    """Time `func` `repeat` times; one extra run records queries and peak memory"""
+    timings = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    db.session.expunge_all()
+    tracemalloc.start()
+    with QueryCounter(db.engine) as counter:
+        func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'target': name,
+        'wall_ms': {
+            'min': round(min(timings), 3),
+            'median': round(statistics.median(timings), 3),
+            'max': round(max(timings), 3),
+        },
+        'queries': counter.count,
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def targets_for(competition_id, team_ids, groups):
+    """Standings entry points to time for one competition"""
+    from app.services.standings_service import StandingsService
+    from app.services.competition_service import CompetitionService
+    from app.services.h2h_service import HeadToHeadService
+
+    targets = [
+        ('StandingsService.get_standings', lambda: StandingsService.get_standings(competition_id)),
+        ('CompetitionService.get_competition_standings',
+         lambda: CompetitionService.get_competition_standings(competition_id)),
+        ('HeadToHeadService.compute', lambda: HeadToHeadService.compute(competition_id, team_ids[:4])),
+    ]
+
+    group_id = groups[0][0]
+    if group_id is not None:
+        targets += [
+            ('CompetitionService.get_group_standings',
+             lambda: CompetitionService.get_group_standings(competition_id, group_id)),
+            ('CompetitionService.get_all_group_standings',
+             lambda: CompetitionService.get_all_group_standings(competition_id)),
+        ]
+    return targets
+
+
+def main():
+    args = parse_args()
+
+    database_url = args.database_url
+    temp_path = None
+    if not database_url:
+        handle, temp_path = tempfile.mkstemp(prefix='standings_bench_', suffix='.db')
+        os.close(handle)
+        database_url = f'sqlite:///{temp_path}'
+    os.environ['DATABASE_URL'] = database_url
+
+    from app import create_app
+    from app.extensions.db import db
+    from app import models
+
+    app = create_app()
+    results = []
+
+    with app.app_context():
+        # A .env file may override DATABASE_URL; refuse to touch anything else
+        if db.engine.url.render_as_string(hide_password=False) != database_url:
+            sys.exit(f'[ERROR] App is configured for {db.engine.url!r}, not {database_url!r}; aborting')
+
+        for table in db.metadata.sorted_tables:
+            try:
+                table.create(db.engine, checkfirst=True)
+            except Exception as e:
+                # Postgres-only column types (e.g. ARRAY) on SQLite; those tables aren't benchmarked
+                print(f'[!] Skipped table {table.name}: {e.__class__.__name__}', file=sys.stderr)
+
+        rnd = random.Random(args.seed)
+        coach_id = uuid.uuid4()
+        db.session.add(models.Coach(
+            id=coach_id, full_name='Benchmark', email=f'{coach_id.hex}@bench.invalid',
+            phone=coach_id.hex[:15], password_hash='-'
+        ))
+        db.session.commit()
+
+        sizes = [int(s) for s in args.sizes.split(',') if s]
+        legs_options = [int(s) for s in args.legs.split(',') if s]
+        layouts = [0] + ([args.group_size] if args.group_size else [])
+
+        for num_teams in sizes:
+            for legs in legs_options:
+                for group_size in layouts:
+                    started = time.perf_counter()
+                    competition_id, team_ids, groups, match_count = generate_competition(
+                        db, models, rnd, coach_id, num_teams, legs, group_size, args
+                    )
+                    print(
+                        f'[*] {num_teams} teams, {legs} leg(s), '
+                        f'{"groups of " + str(group_size) if group_size else "league"}: '
+                        f'{match_count} matches generated in {time.perf_counter() - started:.1f}s',
+                        file=sys.stderr
+                    )
+
+                    for name, func in targets_for(competition_id, team_ids, groups):
+                        result = measure(db, name, func, args.repeat)
+                        result.update({
+                            'teams': num_teams,
+                            'legs': legs,
+                            'group_size': group_size or None,
+                            'matches': match_count,
+                        })
+                        results.append(result)
+
+    report = {
+        'generated_at': datetime.utcnow().isoformat() + 'Z',
+        'database': database_url.split(':', 1)[0],
+        'python': platform.python_version(),
+        'config': {
+            'sizes': sizes,
+            'legs': legs_options,
+            'group_size': args.group_size or None,
+            'max_rounds': args.max_rounds,
+            'finished_ratio': args.finished_ratio,
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+        print(f'[OK] Wrote {len(results)} results to {args.output}', file=sys.stderr)
+    else:
+        print(output)
+
+    if temp_path:
+        os.remove(temp_path)
+
+
+if __name__ == '__main__':
+    main()
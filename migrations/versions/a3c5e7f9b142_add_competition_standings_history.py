@@ -0,0 +1,41 @@
+"""Add competition_standings_history snapshots
+
+Revision ID: a3c5e7f9b142
+Revises: f1a7d4e2b953
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c5e7f9b142'
+down_revision = 'f1a7d4e2b953'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('competition_standings_history',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('competition_id', sa.UUID(), nullable=False),
+    sa.Column('team_id', sa.UUID(), nullable=False),
+    sa.Column('as_of', sa.Date(), nullable=False),
+    sa.Column('matchday', sa.SmallInteger(), nullable=False),
+    sa.Column('position', sa.SmallInteger(), nullable=False),
+    sa.Column('played', sa.SmallInteger(), nullable=False),
+    sa.Column('points', sa.SmallInteger(), nullable=False),
+    sa.Column('goals_for', sa.SmallInteger(), nullable=False),
+    sa.Column('goals_against', sa.SmallInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['competition_id'], ['competitions.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('competition_id', 'as_of', 'team_id', name='uq_competition_standing_snapshot')
+    )
+
+    # Populate from existing results with `flask backfill-standings-history`
+
+
+def downgrade():
+    op.drop_table('competition_standings_history')
@@ -0,0 +1,33 @@
+"""Add matches.tournament_id
+
+Revision ID: a6c8e0f2b475
+Revises: f5b7d9e1a364
+Create Date: 2026-10-20 09:00:00.000000
+
+Tournament matches used to be written with the tournament's id in
+competition_id, which the foreign key to competitions rejects. They now
+reference their tournament directly.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c8e0f2b475'
+down_revision = 'f5b7d9e1a364'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('matches', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('tournament_id', sa.UUID(), nullable=True))
+        batch_op.create_foreign_key('fk_matches_tournament_id', 'tournaments', ['tournament_id'], ['id'])
+        batch_op.create_index('ix_matches_tournament_status', ['tournament_id', 'status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('matches', schema=None) as batch_op:
+        batch_op.drop_index('ix_matches_tournament_status')
+        batch_op.drop_constraint('fk_matches_tournament_id', type_='foreignkey')
+        batch_op.drop_column('tournament_id')
@@ -0,0 +1,82 @@
+"""Merge duplicate stats rows and make them unique per season
+
+Revision ID: a8c0e2f4b619
+Revises: f2b4d6e8a017
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8c0e2f4b619'
+down_revision = 'f2b4d6e8a017'
+branch_labels = None
+depends_on = None
+
+
+PLAYER_COLUMNS = (
+    'matches_played', 'minutes_played', 'goals', 'assists', 'yellow_cards', 'red_cards',
+    'shots_on_target', 'shots_off_target',
+)
+TEAM_COLUMNS = (
+    'matches_played', 'wins', 'draws', 'losses', 'goals_for', 'goals_against', 'clean_sheets',
+)
+
+
+def _merge_duplicates(table, key, columns):
+    """Fold every (key, season) group into its first row, summing the counters"""
+    op.execute(f"UPDATE {table} SET season = '2024' WHERE season IS NULL")
+
+    sums = ', '.join(f"SUM(COALESCE({c}, 0)) AS {c}" for c in columns)
+    assignments = ', '.join(f"{c} = merged.{c}" for c in columns)
+    op.execute(f"""
+        WITH ranked AS (
+            SELECT id, {key}, season,
+                   ROW_NUMBER() OVER (PARTITION BY {key}, season ORDER BY updated_at, id) AS rn
+            FROM {table}
+        ),
+        merged AS (
+            SELECT {key}, season, {sums}
+            FROM {table}
+            GROUP BY {key}, season
+            HAVING COUNT(*) > 1
+        )
+        UPDATE {table} SET {assignments}
+        FROM ranked JOIN merged USING ({key}, season)
+        WHERE {table}.id = ranked.id AND ranked.rn = 1
+    """)
+    op.execute(f"""
+        DELETE FROM {table} WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (PARTITION BY {key}, season ORDER BY updated_at, id) AS rn
+                FROM {table}
+            ) ranked
+            WHERE rn > 1
+        )
+    """)
+
+
+def upgrade():
+    _merge_duplicates('player_stats', 'player_id', PLAYER_COLUMNS)
+    _merge_duplicates('team_stats', 'team_id', TEAM_COLUMNS)
+
+    with op.batch_alter_table('player_stats', schema=None) as batch_op:
+        batch_op.alter_column('season', existing_type=sa.Text(), nullable=False)
+        batch_op.create_unique_constraint('uq_player_stats_player_season', ['player_id', 'season'])
+
+    with op.batch_alter_table('team_stats', schema=None) as batch_op:
+        batch_op.alter_column('season', existing_type=sa.Text(), nullable=False)
+        batch_op.create_unique_constraint('uq_team_stats_team_season', ['team_id', 'season'])
+
+
+def downgrade():
+    # Merged duplicates are not restored
+    with op.batch_alter_table('team_stats', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_team_stats_team_season', type_='unique')
+        batch_op.alter_column('season', existing_type=sa.Text(), nullable=True)
+
+    with op.batch_alter_table('player_stats', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_player_stats_player_season', type_='unique')
+        batch_op.alter_column('season', existing_type=sa.Text(), nullable=True)
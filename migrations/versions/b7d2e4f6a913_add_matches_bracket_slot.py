@@ -0,0 +1,28 @@
+"""Add bracket_slot to matches
+
+Revision ID: b7d2e4f6a913
+Revises: a3c5e7f9b142
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2e4f6a913'
+down_revision = 'a3c5e7f9b142'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('matches', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('bracket_slot', sa.SmallInteger(), nullable=True))
+
+    # Existing knockout matches have no slot; the bracket falls back to date order for them
+
+
+def downgrade():
+    with op.batch_alter_table('matches', schema=None) as batch_op:
+        batch_op.drop_column('bracket_slot')
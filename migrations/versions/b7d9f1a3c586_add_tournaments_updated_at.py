@@ -0,0 +1,27 @@
+"""Add tournaments.updated_at
+
+Revision ID: b7d9f1a3c586
+Revises: a6c8e0f2b475
+Create Date: 2026-10-20 11:00:00.000000
+
+Part of the version token of cached tournament tables.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d9f1a3c586'
+down_revision = 'a6c8e0f2b475'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tournaments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('tournaments', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
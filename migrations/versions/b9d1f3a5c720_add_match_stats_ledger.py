@@ -0,0 +1,69 @@
+"""Add per-match stats ledger tables
+
+Revision ID: b9d1f3a5c720
+Revises: a8c0e2f4b619
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9d1f3a5c720'
+down_revision = 'a8c0e2f4b619'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('team_stats_ledger',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('match_id', sa.UUID(), nullable=False),
+    sa.Column('team_id', sa.UUID(), nullable=False),
+    sa.Column('season', sa.Text(), nullable=False),
+    sa.Column('matches_played', sa.Integer(), nullable=False),
+    sa.Column('wins', sa.Integer(), nullable=False),
+    sa.Column('draws', sa.Integer(), nullable=False),
+    sa.Column('losses', sa.Integer(), nullable=False),
+    sa.Column('goals_for', sa.Integer(), nullable=False),
+    sa.Column('goals_against', sa.Integer(), nullable=False),
+    sa.Column('clean_sheets', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['match_id'], ['matches.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('match_id', 'team_id', name='uq_team_stats_ledger_match_team')
+    )
+    with op.batch_alter_table('team_stats_ledger', schema=None) as batch_op:
+        batch_op.create_index('ix_team_stats_ledger_season_team', ['season', 'team_id'], unique=False)
+
+    op.create_table('player_stats_ledger',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('match_id', sa.UUID(), nullable=False),
+    sa.Column('player_id', sa.UUID(), nullable=False),
+    sa.Column('season', sa.Text(), nullable=False),
+    sa.Column('matches_played', sa.Integer(), nullable=False),
+    sa.Column('minutes_played', sa.Integer(), nullable=False),
+    sa.Column('goals', sa.Integer(), nullable=False),
+    sa.Column('yellow_cards', sa.Integer(), nullable=False),
+    sa.Column('red_cards', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['match_id'], ['matches.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['player_id'], ['players.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('match_id', 'player_id', name='uq_player_stats_ledger_match_player')
+    )
+    with op.batch_alter_table('player_stats_ledger', schema=None) as batch_op:
+        batch_op.create_index('ix_player_stats_ledger_season_player', ['season', 'player_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('player_stats_ledger', schema=None) as batch_op:
+        batch_op.drop_index('ix_player_stats_ledger_season_player')
+
+    op.drop_table('player_stats_ledger')
+    with op.batch_alter_table('team_stats_ledger', schema=None) as batch_op:
+        batch_op.drop_index('ix_team_stats_ledger_season_team')
+
+    op.drop_table('team_stats_ledger')
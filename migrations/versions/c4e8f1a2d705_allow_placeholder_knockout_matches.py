@@ -0,0 +1,38 @@
+"""Allow knockout placeholder matches without teams
+
+Revision ID: c4e8f1a2d705
+Revises: b7d2e4f6a913
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8f1a2d705'
+down_revision = 'b7d2e4f6a913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('matches', schema=None) as batch_op:
+        batch_op.alter_column('home_team_id',
+               existing_type=sa.UUID(),
+               nullable=True)
+        batch_op.alter_column('away_team_id',
+               existing_type=sa.UUID(),
+               nullable=True)
+
+
+def downgrade():
+    # Placeholders must be filled in or removed before teams can be required again
+    op.execute("DELETE FROM matches WHERE home_team_id IS NULL OR away_team_id IS NULL")
+    with op.batch_alter_table('matches', schema=None) as batch_op:
+        batch_op.alter_column('away_team_id',
+               existing_type=sa.UUID(),
+               nullable=False)
+        batch_op.alter_column('home_team_id',
+               existing_type=sa.UUID(),
+               nullable=False)
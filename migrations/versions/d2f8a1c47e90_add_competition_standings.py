@@ -0,0 +1,48 @@
+"""Add competition_standings read model
+
+Revision ID: d2f8a1c47e90
+Revises: 3ca132359409
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f8a1c47e90'
+down_revision = '3ca132359409'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('competition_standings',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('competition_id', sa.UUID(), nullable=False),
+    sa.Column('team_id', sa.UUID(), nullable=False),
+    sa.Column('group_id', sa.UUID(), nullable=True),
+    sa.Column('played', sa.Integer(), nullable=False),
+    sa.Column('wins', sa.Integer(), nullable=False),
+    sa.Column('draws', sa.Integer(), nullable=False),
+    sa.Column('losses', sa.Integer(), nullable=False),
+    sa.Column('goals_for', sa.Integer(), nullable=False),
+    sa.Column('goals_against', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['competition_id'], ['competitions.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['group_id'], ['competition_groups.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('competition_id', 'group_id', 'team_id', name='uq_competition_standing')
+    )
+    with op.batch_alter_table('competition_standings', schema=None) as batch_op:
+        batch_op.create_index('ix_competition_standings_competition_group', ['competition_id', 'group_id'], unique=False)
+
+    # Populate from existing results with `flask rebuild-standings`
+
+
+def downgrade():
+    with op.batch_alter_table('competition_standings', schema=None) as batch_op:
+        batch_op.drop_index('ix_competition_standings_competition_group')
+
+    op.drop_table('competition_standings')
@@ -0,0 +1,42 @@
+"""Add match clock columns
+
+Revision ID: d3f5b7c9e142
+Revises: c2e4a6b8d931
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3f5b7c9e142'
+down_revision = 'c2e4a6b8d931'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('matches', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('period', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('period_started_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('paused_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('paused_seconds', sa.Integer(), server_default='0', nullable=False))
+
+    # Matches in progress get a clock from their kickoff; paused ones stay stopped from now
+    op.execute(
+        "UPDATE matches SET period = '1H', period_started_at = started_at "
+        "WHERE status IN ('live', 'paused') AND started_at IS NOT NULL"
+    )
+    op.execute(
+        "UPDATE matches SET paused_at = now() AT TIME ZONE 'utc' "
+        "WHERE status = 'paused' AND started_at IS NOT NULL"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('matches', schema=None) as batch_op:
+        batch_op.drop_column('paused_seconds')
+        batch_op.drop_column('paused_at')
+        batch_op.drop_column('period_started_at')
+        batch_op.drop_column('period')
@@ -0,0 +1,72 @@
+"""Make competition standings unique when group_id is NULL
+
+Revision ID: e4a6c8d0f253
+Revises: d3f5b7c9e142
+Create Date: 2026-10-19 10:00:00.000000
+
+The old unique constraint treated NULL group_ids as distinct, so league and
+knockout rows could be duplicated by concurrent finishes. Duplicates are
+folded into one row and replaced by a unique index with NULLS NOT
+DISTINCT (PostgreSQL 15+).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a6c8d0f253'
+down_revision = 'd3f5b7c9e142'
+branch_labels = None
+depends_on = None
+
+
+RESULT_COLUMNS = ('played', 'wins', 'draws', 'losses', 'goals_for', 'goals_against')
+
+
+def upgrade():
+    sums = ', '.join(f"SUM({c}) AS {c}" for c in RESULT_COLUMNS)
+    assignments = ', '.join(f"{c} = merged.{c}" for c in RESULT_COLUMNS)
+    op.execute(f"""
+        WITH ranked AS (
+            SELECT id, competition_id, group_id, team_id,
+                   ROW_NUMBER() OVER (PARTITION BY competition_id, group_id, team_id ORDER BY updated_at, id) AS rn
+            FROM competition_standings
+        ),
+        merged AS (
+            SELECT competition_id, group_id, team_id, {sums}
+            FROM competition_standings
+            GROUP BY competition_id, group_id, team_id
+            HAVING COUNT(*) > 1
+        )
+        UPDATE competition_standings SET {assignments}
+        FROM ranked JOIN merged
+          ON merged.competition_id = ranked.competition_id
+         AND merged.group_id IS NOT DISTINCT FROM ranked.group_id
+         AND merged.team_id = ranked.team_id
+        WHERE competition_standings.id = ranked.id AND ranked.rn = 1
+    """)
+    op.execute("""
+        DELETE FROM competition_standings WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY competition_id, group_id, team_id ORDER BY updated_at, id
+                ) AS rn
+                FROM competition_standings
+            ) ranked
+            WHERE rn > 1
+        )
+    """)
+
+    with op.batch_alter_table('competition_standings', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_competition_standing', type_='unique')
+        batch_op.create_index(
+            'uq_competition_standing', ['competition_id', 'group_id', 'team_id'],
+            unique=True, postgresql_nulls_not_distinct=True
+        )
+
+
+def downgrade():
+    # Merged duplicates are not restored
+    with op.batch_alter_table('competition_standings', schema=None) as batch_op:
+        batch_op.drop_index('uq_competition_standing')
+        batch_op.create_unique_constraint('uq_competition_standing', ['competition_id', 'group_id', 'team_id'])
@@ -0,0 +1,26 @@
+"""Add index on matches (competition_id, status)
+
+Revision ID: e6b3c9d2a418
+Revises: d2f8a1c47e90
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b3c9d2a418'
+down_revision = 'd2f8a1c47e90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('matches', schema=None) as batch_op:
+        batch_op.create_index('ix_matches_competition_status', ['competition_id', 'status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('matches', schema=None) as batch_op:
+        batch_op.drop_index('ix_matches_competition_status')
@@ -0,0 +1,28 @@
+"""Add centroid coordinates to counties
+
+Revision ID: e7a1c3d5f208
+Revises: d5f9a3b1c806
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a1c3d5f208'
+down_revision = 'd5f9a3b1c806'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('counties', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('latitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('longitude', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('counties', schema=None) as batch_op:
+        batch_op.drop_column('longitude')
+        batch_op.drop_column('latitude')
@@ -0,0 +1,26 @@
+"""Add tiebreaker_order to competitions
+
+Revision ID: f1a7d4e2b953
+Revises: e6b3c9d2a418
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a7d4e2b953'
+down_revision = 'e6b3c9d2a418'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('competitions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('tiebreaker_order', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('competitions', schema=None) as batch_op:
+        batch_op.drop_column('tiebreaker_order')
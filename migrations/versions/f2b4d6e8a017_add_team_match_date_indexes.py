@@ -0,0 +1,28 @@
+"""Add per-team match date indexes for calendar conflict checks
+
+Revision ID: f2b4d6e8a017
+Revises: e7a1c3d5f208
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b4d6e8a017'
+down_revision = 'e7a1c3d5f208'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('matches', schema=None) as batch_op:
+        batch_op.create_index('ix_matches_home_team_date', ['home_team_id', 'match_date'], unique=False)
+        batch_op.create_index('ix_matches_away_team_date', ['away_team_id', 'match_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('matches', schema=None) as batch_op:
+        batch_op.drop_index('ix_matches_away_team_date')
+        batch_op.drop_index('ix_matches_home_team_date')
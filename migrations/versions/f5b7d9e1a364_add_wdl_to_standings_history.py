@@ -0,0 +1,33 @@
+"""Add wins/draws/losses to standings history snapshots
+
+Revision ID: f5b7d9e1a364
+Revises: e4a6c8d0f253
+Create Date: 2026-10-19 11:00:00.000000
+
+Snapshots written before this have zeros here; the first result change in
+each competition replays it in full and fills them in (or run
+`flask backfill-standings-history`).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5b7d9e1a364'
+down_revision = 'e4a6c8d0f253'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('competition_standings_history', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('wins', sa.SmallInteger(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('draws', sa.SmallInteger(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('losses', sa.SmallInteger(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('competition_standings_history', schema=None) as batch_op:
+        batch_op.drop_column('losses')
+        batch_op.drop_column('draws')
+        batch_op.drop_column('wins')
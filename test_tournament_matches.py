@@ -0,0 +1,89 @@
+# test_tournament_matches.py
+"""
+Creates tournament matches against the configured database and checks they
+reference their tournament (matches.tournament_id -> tournaments.id), then
+removes everything it created. Run with: python test_tournament_matches.py
+"""
+import io
+import uuid
+from datetime import datetime, timedelta
+
+from app import create_app
+from app.extensions.db import db
+from app.models.coach import Coach
+from app.models.match import Match
+from app.models.team import Team
+from app.models.tournament import Tournament
+from app.models.enums import MatchStatus
+from app.services.match_service import create_tournament_matches, generate_round_robin
+from app.services.result_import_service import ResultImportService, read_rows
+
+app = create_app()
+
+with app.app_context():
+    suffix = uuid.uuid4().hex[:8]
+    coach = Coach(
+        full_name=f"Check Coach {suffix}",
+        phone=f"+2547{suffix}",
+        email=f"check-{suffix}@example.com",
+        password_hash="x",
+        user_id=uuid.uuid4(),
+    )
+    db.session.add(coach)
+    db.session.flush()
+
+    teams = [Team(name=f"Check {name} {suffix}", coach_id=coach.id) for name in ("Eagles", "Falcons", "Hawks")]
+    tournament = Tournament(name=f"Check Cup {suffix}", tournament_type="league", slots=4, created_by=coach.id)
+    db.session.add_all(teams + [tournament])
+    db.session.commit()
+
+    try:
+        kickoff = datetime.utcnow().replace(microsecond=0) + timedelta(days=3)
+
+        # 1️⃣ Bulk create, one of them already finished
+        created = create_tournament_matches(tournament.id, [
+            {"home_team_id": teams[0].id, "away_team_id": teams[1].id, "match_date": kickoff},
+            {"home_team_id": teams[1].id, "away_team_id": teams[2].id, "match_date": kickoff + timedelta(days=7),
+             "status": "finished", "home_score": 2, "away_score": 1},
+        ])
+        assert all(m["tournament_id"] == str(tournament.id) for m in created), created
+        assert all(m["competition_id"] is None for m in created), created
+        print("Bulk create OK:", [m["id"] for m in created])
+
+        # 2️⃣ Results import creating a missing fixture
+        csv_file = io.StringIO(
+            "home_team,away_team,match_date,home_score,away_score\n"
+            f"{teams[2].id},{teams[0].id},{(kickoff + timedelta(days=14)).date().isoformat()},0,0\n"
+        )
+        report = ResultImportService.import_results(read_rows(csv_file, "csv"), tournament_id=tournament.id)
+        assert report["created"] == 1 and report["failed"] == 0, report
+        print("Import create OK:", report)
+
+        matches = Match.query.filter_by(tournament_id=tournament.id).all()
+        assert len(matches) == 3, matches
+        assert sum(m.status == MatchStatus.finished for m in matches) == 2
+
+        # 3️⃣ Round-robin generation (one bulk INSERT)
+        fixtures = generate_round_robin(
+            tournament.id, [team.id for team in teams], (kickoff + timedelta(days=30)).isoformat()
+        )
+        assert len(fixtures) == 3, fixtures
+        assert all(m["tournament_id"] == str(tournament.id) for m in fixtures), fixtures
+        print("Round robin OK:", len(fixtures), "fixtures")
+
+        # 4️⃣ Unknown tournaments are refused before anything is written
+        try:
+            create_tournament_matches(uuid.uuid4(), [
+                {"home_team_id": teams[0].id, "away_team_id": teams[2].id, "match_date": kickoff},
+            ])
+            raise AssertionError("created matches for a tournament that does not exist")
+        except ValueError as e:
+            db.session.rollback()
+            print("Unknown tournament refused:", e)
+    finally:
+        Match.query.filter_by(tournament_id=tournament.id).delete()
+        db.session.delete(tournament)
+        for team in teams:
+            db.session.delete(team)
+        db.session.delete(coach)
+        db.session.commit()